@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from .authentication import invalidate_user
+
 User = get_user_model()
 
 @admin.register(User)
@@ -15,6 +17,21 @@ class UserAdmin(BaseUserAdmin):
         ("Role", {"fields": ("role",)}),
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_user(obj.pk)
+
+    def delete_model(self, request, obj):
+        pk = obj.pk
+        super().delete_model(request, obj)
+        invalidate_user(pk)
+
+    def delete_queryset(self, request, queryset):
+        pks = list(queryset.values_list("pk", flat=True))
+        super().delete_queryset(request, queryset)
+        for pk in pks:
+            invalidate_user(pk)
+
     add_fieldsets = (
         (None, {
             "classes": ("wide",),
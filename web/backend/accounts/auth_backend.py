@@ -11,7 +11,7 @@ class EmailBackend(ModelBackend):
             return None
 
         try:
-            user = User.objects.get(email__iexact=email)
+            user = User.by_email(email).get()
         except User.DoesNotExist:
             return None
 
@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+# Everything permission checks and scoped querysets read; other fields stay
+# deferred and load lazily if some view really needs them.
+SNAPSHOT_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "restaurant_id",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+def _cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def user_snapshot(user):
+    snap = {f: getattr(user, f) for f in SNAPSHOT_FIELDS}
+    # lets CHECK_REVOKE_TOKEN work without keeping the hash itself in the cache
+    snap["password_md5"] = get_md5_hash_password(user.password)
+    return snap
+
+
+def invalidate_user(user_id):
+    """Call after changing a user's role, restaurant, active flag or password."""
+    cache.delete(_cache_key(user_id))
+
+
+def user_from_snapshot(snap):
+    # from_db() marks the remaining fields deferred, so a save() on this
+    # instance only writes the snapshot fields instead of blanking the rest.
+    # Values must follow concrete field order.
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in snap]
+    return User.from_db(DEFAULT_DB_ALIAS, names, [snap[n] for n in names])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query.
+
+    The user is served from a short-TTL cache snapshot (AUTH_USER_CACHE_TTL
+    seconds); TeamUserViewSet and the admin invalidate it on role/active
+    changes. The snapshot is authoritative: restaurant_id/role claims in the
+    token are for clients and can be stale until the refresh token rotates.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _cache_key(user_id)
+        snap = cache.get(key)
+        if snap is None:
+            try:
+                user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            snap = user_snapshot(user)
+            cache.set(key, snap, getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snap["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snap["password_md5"]:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user_from_snapshot(snap)
+
+
+def authenticate_request(request, query_token=False):
+    """
+    User for a plain Django request (async views outside DRF), or None.
+    query_token=True also accepts ?token=<access token>, for EventSource
+    clients that cannot set headers.
+    """
+    auth = CachedJWTAuthentication()
+    try:
+        result = auth.authenticate(request)
+        if result is not None:
+            return result[0]
+        raw = request.GET.get("token") if query_token else None
+        return auth.get_user(auth.get_validated_token(raw)) if raw else None
+    except (AuthenticationFailed, InvalidToken):
+        return None
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    pbkdf2_sha256 with the iteration count taken from PASSWORD_PBKDF2_ITERATIONS
+    (0 = Django's default). Same algorithm name, so existing hashes verify;
+    must_update() sees the different count and Django re-hashes on the next
+    successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", 0) or PBKDF2PasswordHasher.iterations
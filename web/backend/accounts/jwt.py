@@ -7,6 +7,14 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
     # Tell SimpleJWT the "username field" is email for validation/UI
     username_field = "email"
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # informational for clients; authorization uses the server-side user snapshot
+        token["restaurant_id"] = user.restaurant_id
+        token["role"] = user.role
+        return token
+
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
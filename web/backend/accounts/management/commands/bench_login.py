@@ -0,0 +1,94 @@
+import itertools
+import json
+import os
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from accounts.jwt import EmailTokenObtainPairSerializer
+from accounts.models import User
+from core.bench import speedup, timeit
+
+PASSWORD = "bench-login-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Login throughput (logins/sec on one core) for the email lookup and for each PBKDF2 "
+        "iteration count. Bench users are created inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--iterations",
+            help="Comma-separated PBKDF2 iteration counts to compare "
+            "(default: Django's default and PASSWORD_PBKDF2_ITERATIONS if set)",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        from django.conf import settings
+
+        if settings.PASSWORD_HASHERS[0] != "accounts.hashers.TunedPBKDF2PasswordHasher":
+            raise CommandError("bench_login compares PBKDF2 iteration counts; set PASSWORD_HASHER=pbkdf2.")
+
+        if opts["iterations"]:
+            counts = [int(x) for x in opts["iterations"].split(",") if x.strip()]
+        else:
+            counts = [PBKDF2PasswordHasher.iterations]
+            if settings.PASSWORD_PBKDF2_ITERATIONS and settings.PASSWORD_PBKDF2_ITERATIONS not in counts:
+                counts.append(settings.PASSWORD_PBKDF2_ITERATIONS)
+
+        report = {"cpu_count": os.cpu_count(), "users": opts["users"], "lookup": {}, "policies": []}
+
+        with transaction.atomic():
+            emails = self._create_users(opts["users"])
+            cycle = itertools.cycle(emails)
+
+            # email lookup alone: UPPER() iexact vs the LOWER(email) functional index
+            report["lookup"]["iexact"] = timeit(lambda: User.objects.get(email__iexact=next(cycle).upper()), opts["repeat"])
+            report["lookup"]["lower_index"] = timeit(lambda: User.by_email(next(cycle).upper()).get(), opts["repeat"])
+            report["lookup"]["speedup"] = speedup(report["lookup"]["iexact"], report["lookup"]["lower_index"])
+
+            for count in counts:
+                with override_settings(PASSWORD_PBKDF2_ITERATIONS=count):
+                    # hash once at this cost so logins below don't trigger a re-hash
+                    User.objects.filter(email__in=emails).update(password=make_password(PASSWORD))
+                    stats = timeit(lambda: self._login(next(cycle)), opts["repeat"])
+                stats["iterations"] = count
+                stats["logins_per_sec"] = round(1000.0 / stats["mean_ms"], 1) if stats["mean_ms"] else None
+                report["policies"].append(stats)
+
+            transaction.set_rollback(True)
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        lk = report["lookup"]
+        self.stdout.write(
+            f"lookup  iexact {lk['iexact']['mean_ms']:.3f} ms  lower-index {lk['lower_index']['mean_ms']:.3f} ms  x{lk['speedup']}"
+        )
+        for p in report["policies"]:
+            self.stdout.write(
+                f"pbkdf2 {p['iterations']:>9}  {p['mean_ms']:>8.2f} ms/login  {p['logins_per_sec']:>7} logins/s/core"
+            )
+
+    def _create_users(self, n):
+        encoded = make_password(PASSWORD)
+        users = [
+            User(username=f"bench-login-{i}", email=f"bench-login-{i}@example.com", password=encoded, role=User.Role.STAFF)
+            for i in range(n)
+        ]
+        User.objects.bulk_create(users)
+        return [u.email for u in users]
+
+    def _login(self, email):
+        s = EmailTokenObtainPairSerializer(data={"email": email.upper(), "password": PASSWORD}, context={"request": None})
+        if not s.is_valid():
+            raise CommandError(f"login failed for {email}: {s.errors}")
+        return s.validated_data
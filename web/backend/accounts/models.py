@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Lower
 from django.utils.text import slugify
 
 
@@ -58,6 +60,20 @@ class User(AbstractUser):
         blank=True,
     )
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # case-insensitive uniqueness; also the index behind login lookups
+            models.UniqueConstraint(Lower("email"), name="accounts_user_email_lower_uniq"),
+        ]
+
+    @classmethod
+    def by_email(cls, email):
+        """
+        Case-insensitive email match written as LOWER(email) = LOWER(%s) so it
+        hits the functional unique index (email__iexact compiles to UPPER(...)).
+        """
+        return cls.objects.alias(email_lower=Lower("email")).filter(email_lower=Lower(Value(email)))
+
     def save(self, *args, **kwargs):
         # Global admin
         if self.is_superuser or self.role == self.Role.ADMIN:
@@ -20,6 +20,12 @@ class IsOwnerOrManager(BasePermission):
         return is_role(request.user, User.Role.OWNER, User.Role.MANAGER, User.Role.ADMIN)
 
 
+class IsSuperuser(BasePermission):
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and user.is_superuser)
+
+
 class IsRestaurantReadWriteByStaff(BasePermission):
     """
     Auth required always.
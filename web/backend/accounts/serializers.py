@@ -56,7 +56,7 @@ class RegisterOwnerSerializer(serializers.Serializer):
     def validate(self, attrs):
         if attrs["password"] != attrs["password2"]:
             raise serializers.ValidationError({"password": "Passwords do not match."})
-        if User.objects.filter(email__iexact=attrs["email"]).exists():
+        if User.by_email(attrs["email"]).exists():
             raise serializers.ValidationError({"email": "Email already exists."})
         
         # Auto-generate username if not provided
@@ -125,7 +125,7 @@ class TeamUserCreateSerializer(serializers.Serializer):
     def validate(self, attrs):
         if attrs["password"] != attrs["password2"]:
             raise serializers.ValidationError({"password": "Passwords do not match."})
-        if User.objects.filter(email__iexact=attrs["email"]).exists():
+        if User.by_email(attrs["email"]).exists():
             raise serializers.ValidationError({"email": "Email already exists."})
         
         # Auto-generate username if not provided
@@ -151,7 +151,7 @@ class TeamUserCreateSerializer(serializers.Serializer):
             first_name=validated_data.get("first_name", ""),
             last_name=validated_data.get("last_name", ""),
             role=validated_data["role"],
-            restaurant=owner.restaurant,
+            restaurant_id=owner.restaurant_id,
             is_active=True,
         )
         user.set_password(password)
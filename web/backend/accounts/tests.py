@@ -1,3 +1,72 @@
+from django.contrib.admin.sites import site
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication
+from .models import Restaurant, User
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    team_url = "/api/auth/team-users/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name="Auth", slug="auth")
+        cls.owner = User.objects.create_user(
+            username="auth-owner", email="owner@auth.test", password="x", role=User.Role.OWNER, restaurant=cls.restaurant
+        )
+        cls.staff = User.objects.create_user(
+            username="auth-staff", email="staff@auth.test", password="x", role=User.Role.STAFF, restaurant=cls.restaurant
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def test_snapshot_served_without_query(self):
+        auth = CachedJWTAuthentication()
+        token = auth.get_validated_token(str(AccessToken.for_user(self.staff)))
+        auth.get_user(token)
+
+        with self.assertNumQueries(0):
+            user = auth.get_user(token)
+            self.assertEqual((user.pk, user.role, user.restaurant_id), (self.staff.pk, "STAFF", self.restaurant.pk))
+            self.assertTrue(user.is_authenticated)
+
+    def test_snapshot_save_keeps_deferred_fields(self):
+        auth = CachedJWTAuthentication()
+        token = auth.get_validated_token(str(AccessToken.for_user(self.staff)))
+        auth.get_user(token)
+        user = auth.get_user(token)
+        user.first_name = "Changed"
+        user.save()
+
+        self.staff.refresh_from_db()
+        self.assertEqual(self.staff.first_name, "Changed")
+        self.assertTrue(self.staff.check_password("x"))
+
+    def test_team_update_applies_on_next_request(self):
+        staff = self.client_for(self.staff)
+        self.assertEqual(staff.get(self.team_url).status_code, 403)  # warms the snapshot
+
+        owner = self.client_for(self.owner)
+        r = owner.patch(f"{self.team_url}{self.staff.pk}/", {"role": "MANAGER"}, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(staff.get(self.team_url).status_code, 200)
+
+        self.assertEqual(owner.delete(f"{self.team_url}{self.staff.pk}/").status_code, 204)
+        self.assertEqual(staff.get(self.team_url).status_code, 401)
+
+    def test_admin_save_invalidates(self):
+        staff = self.client_for(self.staff)
+        self.assertEqual(staff.get(self.team_url).status_code, 403)
+
+        self.staff.is_active = False
+        site._registry[User].save_model(None, self.staff, None, True)
+        self.assertEqual(staff.get(self.team_url).status_code, 401)
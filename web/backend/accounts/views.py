@@ -14,6 +14,7 @@ from .serializers import (
     TeamUserCreateSerializer,
     TeamUserUpdateSerializer,
 )
+from .authentication import invalidate_user
 from .permissions import IsOwner, IsOwnerOrManager
 
 User = get_user_model()
@@ -117,6 +118,11 @@ class TeamUserViewSet(viewsets.ModelViewSet):
             raise ValidationError({"detail": "Cannot edit OWNER via this endpoint."})
         return super().partial_update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        user = serializer.save()
+        # role / is_active changes must not wait for the auth cache TTL
+        invalidate_user(user.pk)
+
     def destroy(self, request, *args, **kwargs):
         self._ensure_owner()
         target = self.get_object()
@@ -126,4 +132,5 @@ class TeamUserViewSet(viewsets.ModelViewSet):
         # soft delete
         target.is_active = False
         target.save(update_fields=["is_active"])
+        invalidate_user(target.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -2,7 +2,8 @@ import os
 import environ
 from pathlib import Path
 from datetime import timedelta
-from urllib.parse import urlparse, parse_qsl
+
+from .database import database_from_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     "purchases",
     "imports",
     "forecasting",
+    "reports",
 
 
 
@@ -44,6 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "core.instrumentation.RequestMetricsMiddleware",
+    "core.db_routing.PinPrimaryAfterWriteMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -72,20 +76,21 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
-tmpPostgres = urlparse(env("DATABASE_URL"))
-
+# DATABASE_URL query params also set CONN_MAX_AGE / CONN_HEALTH_CHECKS and the
+# psycopg3 pool (see config/database.py), e.g. ?pool=true&pool_max_size=10
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': tmpPostgres.path.replace('/', ''),
-        'USER': tmpPostgres.username,
-        'PASSWORD': tmpPostgres.password,
-        'HOST': tmpPostgres.hostname,
-        'PORT': 5432,
-        'OPTIONS': dict(parse_qsl(tmpPostgres.query)),
-    }
+    'default': database_from_url(env("DATABASE_URL")),
 }
 
+# Optional read replica for reporting/forecasting reads (core.db_routing.use_replica)
+if env("DATABASE_REPLICA_URL", default=""):
+    DATABASES["replica"] = database_from_url(env("DATABASE_REPLICA_URL"))
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_ROUTERS = ["core.db_routing.ReplicaRouter"]
+# seconds a user's replica reads stay on the primary after they write
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=5)
+
 # ✅ CORS (allow both localhost and 127.0.0.1 to avoid token mismatch)
 CORS_ALLOWED_ORIGINS = env.list(
     "CORS_ALLOWED_ORIGINS",
@@ -97,15 +102,31 @@ CORS_ALLOWED_ORIGINS = env.list(
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    # orjson-backed JSON (falls back to stdlib json if orjson isn't installed)
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# Shared cache: use redis://... in production so auth-cache invalidation reaches every worker
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# Seconds a JWT user snapshot is served from cache (accounts.authentication)
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=60)
+
 # JWT config (optional but recommended)
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
@@ -115,6 +136,20 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = "accounts.User"
 
+# Password hashing policy. The first hasher is used for new/re-hashed passwords;
+# the others stay listed so older hashes still verify (and get upgraded on login).
+# argon2 needs argon2-cffi installed.
+PASSWORD_HASHER = env("PASSWORD_HASHER", default="pbkdf2")
+PASSWORD_PBKDF2_ITERATIONS = env.int("PASSWORD_PBKDF2_ITERATIONS", default=0)  # 0 = Django default
+_PASSWORD_HASHERS = {
+    "pbkdf2": "accounts.hashers.TunedPBKDF2PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    h for name, h in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ["django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher"]
+
 AUTHENTICATION_BACKENDS = [
     "accounts.auth_backend.EmailBackend",
     "django.contrib.auth.backends.ModelBackend",
@@ -128,3 +163,53 @@ USE_TZ = True
 STATIC_URL = "static/"
 
 FORECAST_MODEL_PATH = os.path.join(BASE_DIR, "artifacts", "forecasting", "menu_item_demand_model.pkl")
+# train_forecast_model writes versioned models here; current.json (when present) selects the served one
+FORECAST_MODEL_DIR = env("FORECAST_MODEL_DIR", default=os.path.join(BASE_DIR, "artifacts", "forecasting"))
+# forecasting.inference: concurrent forecasts per process, seconds a request waits for a slot (then 503)
+FORECAST_WORKERS = env.int("FORECAST_WORKERS", default=2)
+FORECAST_QUEUE_TIMEOUT = env.float("FORECAST_QUEUE_TIMEOUT", default=5.0)
+# upper bound for a cached 30-day ForecastResult (sales/menu writes and midnight invalidate it anyway)
+FORECAST_CACHE_SECONDS = env.int("FORECAST_CACHE_SECONDS", default=6 * 3600)
+# forecasting.accuracy: days of each computed forecast stored for scoring against actuals
+FORECAST_TRACK_DAYS = env.int("FORECAST_TRACK_DAYS", default=7)
+
+# core.singleflight: identical concurrent forecasts are computed once per process;
+# SINGLEFLIGHT_ADVISORY also coalesces across workers (PostgreSQL advisory lock + shared cache)
+SINGLEFLIGHT_ADVISORY = env.bool("SINGLEFLIGHT_ADVISORY", default=False)
+# longest wait for another caller's result (in process or on the advisory lock) before computing locally
+SINGLEFLIGHT_WAIT_SECONDS = env.int("SINGLEFLIGHT_WAIT_SECONDS", default=60)
+SINGLEFLIGHT_RESULT_SECONDS = env.int("SINGLEFLIGHT_RESULT_SECONDS", default=30)
+
+# Request metrics (core.instrumentation): query counts, N+1 fingerprints, Server-Timing
+PERF_INSTRUMENTATION = env.bool("PERF_INSTRUMENTATION", default=DEBUG)
+PERF_RING_SIZE = env.int("PERF_RING_SIZE", default=500)
+PERF_N_PLUS_ONE_THRESHOLD = env.int("PERF_N_PLUS_ONE_THRESHOLD", default=5)
+
+# GET /api/inventory/low-stock-events/?wait=: long-polls waiting at once per process
+# (each holds a worker thread; prefer the SSE stream below)
+LOW_STOCK_MAX_WAITERS = env.int("LOW_STOCK_MAX_WAITERS", default=8)
+
+# Live events (core.events, GET /api/events/): LocalBackend delivers within one
+# process; PostgresBackend uses LISTEN/NOTIFY so every ASGI worker sees every event
+EVENTS_BACKEND = env("EVENTS_BACKEND", default="core.events.LocalBackend")
+EVENTS_QUEUE_SIZE = env.int("EVENTS_QUEUE_SIZE", default=100)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "foresto.perf": {
+            "handlers": ["console"],
+            "level": env("PERF_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+        "foresto.events": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import event_stream
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/", include("accounts.urls")),
@@ -10,6 +12,9 @@ urlpatterns = [
     path("api/purchases/", include("purchases.urls")),
     path("api/import/", include("imports.urls")),
     path("api/forecasting/", include("forecasting.urls")),
+    path("api/perf/", include("core.urls")),
+    path("api/reports/", include("reports.urls")),
+    path("api/events/", event_stream),
 
 
 
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = "core"
+
+    def ready(self):
+        from .scoping import resolve_pending
+        from .versioning import connect_signals
+
+        connect_signals()
+        resolve_pending()
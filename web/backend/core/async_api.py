@@ -0,0 +1,39 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+
+from accounts.authentication import authenticate_request
+from .db_routing import ais_pinned, read_your_writes
+from .renderers import FastJSONRenderer
+
+_renderer = FastJSONRenderer()
+
+
+def json_response(data, status=200):
+    """Same JSON bytes DRF would render (orjson, Decimal/date handling)."""
+    return HttpResponse(_renderer.render(data), status=status, content_type="application/json")
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of a DRF APIView with permission_classes = [IsStaff], for
+    endpoints that should not hold a worker thread while they wait (DRF views
+    are sync only). That only holds under an ASGI server and with every
+    middleware async capable; a sync-only middleware makes Django run the
+    whole chain in a thread again.
+    Handlers are `async def get(self, request)` and return json_response().
+    Replica reads in the services they call honour the user's
+    read-your-writes pin (core.db_routing.read_your_writes).
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await sync_to_async(authenticate_request)(request)
+        if user is None:
+            return json_response({"detail": "Authentication credentials were not provided."}, status=401)
+        if not user.is_staff:
+            return json_response({"detail": "You do not have permission to perform this action."}, status=403)
+        request.user = user
+        with read_your_writes(await ais_pinned(user)):
+            return await super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,40 @@
+from django.db.models import Max, Min, OuterRef, Subquery
+
+# (app_label, model, parent FK) - child rows copy restaurant_id from the parent
+DENORMALIZED_RESTAURANT = (
+    ("sales", "SaleItem", "sale"),
+    ("inventory", "StockMovement", "item"),
+    ("purchases", "PurchaseLine", "invoice"),
+)
+
+
+def backfill_restaurant(model, parent_field, batch_size=5000, dry_run=False):
+    """
+    Copy restaurant_id from `parent_field` onto rows of `model` where it is NULL,
+    one pk range per UPDATE so a big table is not locked in a single statement.
+    Works with migration (historical) models. Returns the number of rows updated
+    (or that would be, with dry_run).
+    """
+    missing = model._default_manager.filter(restaurant__isnull=True)
+    if dry_run:
+        return missing.exclude(**{f"{parent_field}__restaurant__isnull": True}).count()
+
+    bounds = missing.aggregate(lo=Min("pk"), hi=Max("pk"))
+    if bounds["lo"] is None:
+        return 0
+
+    parent = model._meta.get_field(parent_field).related_model
+    restaurant = Subquery(parent._default_manager.filter(pk=OuterRef(f"{parent_field}_id")).values("restaurant_id")[:1])
+
+    updated = 0
+    for start in range(bounds["lo"], bounds["hi"] + 1, batch_size):
+        updated += missing.filter(pk__gte=start, pk__lt=start + batch_size).update(restaurant_id=restaurant)
+    return updated
+
+
+def backfill_all(get_model, batch_size=5000, dry_run=False):
+    """{"sales.SaleItem": n, ...}; get_model is apps.get_model (global or migration state)."""
+    return {
+        f"{app_label}.{name}": backfill_restaurant(get_model(app_label, name), parent_field, batch_size, dry_run)
+        for app_label, name, parent_field in DENORMALIZED_RESTAURANT
+    }
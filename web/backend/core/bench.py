@@ -0,0 +1,45 @@
+import gc
+import statistics
+import time
+
+
+def timeit(fn, repeat=20, warmup=2, setup=None):
+    """
+    Calls fn() `repeat` times (after `warmup` untimed calls).
+    With setup, each call is fn(setup()) and only fn is timed.
+    Returns timing stats in milliseconds. GC is paused while timing, like timeit.
+    """
+    def once():
+        arg = setup() if setup is not None else None
+        t0 = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        return (time.perf_counter() - t0) * 1000.0
+
+    for _ in range(warmup):
+        once()
+
+    samples = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.append(once())
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    samples.sort()
+    return {
+        "runs": repeat,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+    }
+
+
+def speedup(baseline, candidate):
+    if not candidate["mean_ms"]:
+        return None
+    return round(baseline["mean_ms"] / candidate["mean_ms"], 2)
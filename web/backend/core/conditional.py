@@ -0,0 +1,95 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .versioning import get_versions
+
+
+def _validators(restaurant_id, scopes, daily, tag=None):
+    """(etag, last_modified) from the restaurant's version counters; one query."""
+    versions = get_versions(restaurant_id, scopes)
+    parts = [f"r{restaurant_id}"] + [f"{s}{versions[s][0]}" for s in scopes]
+    if daily:
+        parts.append(timezone.localdate().isoformat())
+    if tag is not None:
+        parts.append(str(tag()))
+    etag = quote_etag("-".join(parts))
+
+    stamps = [v[1] for v in versions.values() if v[1] is not None]
+    last_modified = int(max(stamps).timestamp()) if stamps and not daily else None
+    return etag, last_modified
+
+
+def _finish(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # let browsers keep the body but always revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(*scopes, daily=False, tag=None):
+    """
+    Decorator for DRF view handlers (get / list / retrieve / @action).
+
+    Builds a strong ETag + Last-Modified from the restaurant's version
+    counters for `scopes` and answers 304 before running the view when the
+    client's copy is current. A repeated poll costs one indexed lookup.
+
+    daily=True also keys the ETag on today's date (forecasts roll over at
+    midnight even without writes); `tag`, a callable, adds another part
+    (the forecast model version). Superusers / users without a restaurant
+    skip the check.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            user = request.user
+            restaurant_id = getattr(user, "restaurant_id", None)
+            if user.is_superuser or not restaurant_id:
+                return handler(self, request, *args, **kwargs)
+
+            etag, last_modified = _validators(restaurant_id, scopes, daily, tag)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            elif response.status_code != 304:
+                return response  # 412 from If-Match / If-Unmodified-Since
+
+            return _finish(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
+
+
+def aconditional_get(*scopes, daily=False, tag=None):
+    """conditional_get for the async handlers of core.async_api.AsyncAPIView."""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(self, request, *args, **kwargs):
+            user = request.user
+            restaurant_id = getattr(user, "restaurant_id", None)
+            if user.is_superuser or not restaurant_id:
+                return await handler(self, request, *args, **kwargs)
+
+            etag, last_modified = await sync_to_async(_validators)(restaurant_id, scopes, daily, tag)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await handler(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            elif response.status_code != 304:
+                return response
+
+            return _finish(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
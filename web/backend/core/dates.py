@@ -0,0 +1,17 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def day_bounds(start, end=None):
+    """
+    Aware [start 00:00, end+1 00:00) in the current timezone for local dates.
+
+    Filter with field__gte / field__lt instead of field__date__gte/lte or a
+    TruncDate annotation: a plain range on the column can use its index.
+    """
+    end = end or start
+    tz = timezone.get_current_timezone()
+    lo = timezone.make_aware(datetime.combine(start, time.min), tz)
+    hi = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    return lo, hi
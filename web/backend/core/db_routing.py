@@ -0,0 +1,178 @@
+import functools
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = "replica"
+
+# alias reads are routed to inside use_replica(); None = router default (primary)
+_read_alias = ContextVar("read_alias", default=None)
+# the request's user has just written (see read_your_writes)
+_pinned = ContextVar("pinned", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def pin_primary(user):
+    """
+    Keep `user`'s replica reads on the primary for REPLICA_PIN_SECONDS, so
+    the summary they open right after posting a sale includes that sale.
+    """
+    if user is not None and getattr(user, "pk", None):
+        cache.set(_pin_key(user.pk), 1, getattr(settings, "REPLICA_PIN_SECONDS", 5))
+
+
+def is_pinned(user):
+    if not replica_configured() or user is None or not getattr(user, "pk", None):
+        return False
+    return bool(cache.get(_pin_key(user.pk)))
+
+
+async def ais_pinned(user):
+    if not replica_configured() or user is None or not getattr(user, "pk", None):
+        return False
+    return bool(await cache.aget(_pin_key(user.pk)))
+
+
+@contextmanager
+def read_your_writes(pinned):
+    """
+    Keep use_replica() blocks inside on the primary when `pinned` (from
+    is_pinned / ais_pinned for the request user). For services that read
+    through use_replica() without knowing who asked, e.g. forecasting;
+    nothing is routed to the replica by this block itself.
+    """
+    token = _pinned.set(bool(pinned))
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class use_replica(ContextDecorator):
+    """
+    Route ORM reads in the block (or decorated function) to the replica:
+
+        with use_replica(user=request.user):
+            rows = list(qs)
+
+        @use_replica()
+        def _daily_qty_map(...): ...
+
+    Falls back to the primary when no replica is configured, inside an atomic
+    block (reads must see the transaction's own writes), or when the user has
+    just written (see pin_primary; a block without a user honours an
+    enclosing read_your_writes()). Nested blocks keep the outer decision.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self._token = None
+
+    def _recreate_cm(self):
+        # fresh instance per decorated call: the token must not be shared between threads
+        return type(self)(self.user)
+
+    def __enter__(self):
+        if _read_alias.get() is not None:
+            return self
+
+        alias = REPLICA_ALIAS
+        if (
+            not replica_configured()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or _pinned.get()
+            or is_pinned(self.user)
+        ):
+            alias = DEFAULT_DB_ALIAS
+        self._token = _read_alias.set(alias)
+        return self
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _read_alias.reset(self._token)
+            self._token = None
+        return False
+
+
+def replica_reads(handler):
+    """DRF handler decorator: use_replica() with the request user's read-your-writes pin."""
+
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        with use_replica(user=request.user):
+            return handler(self, request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads go to the replica only inside use_replica(); writes and migrations stay on the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class PinPrimaryAfterWriteMiddleware:
+    """
+    After a successful POST/PUT/PATCH/DELETE by an authenticated user, pin
+    that user's reads to the primary for a few seconds (replication lag).
+    Only installed when a replica is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._is_write(request, response):
+            self._pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._is_write(request, response):
+            await sync_to_async(self._pin)(request)
+        return response
+
+    @staticmethod
+    def _is_write(request, response):
+        return request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400
+
+    @staticmethod
+    def _pin(request):
+        # request.user is set by DRF authentication during the view
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_primary(user)
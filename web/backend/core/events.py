@@ -0,0 +1,182 @@
+"""
+Per-restaurant live events for the SSE stream (GET /api/events/).
+
+Write paths call publish() once their transaction commits; the configured
+backend carries the message to every worker, and each worker's hub fans it
+out to its connected clients:
+
+- LocalBackend: same process only (runserver, a single ASGI worker);
+- PostgresBackend: NOTIFY on publish, one LISTEN connection per worker, so
+  a sale posted on any worker reaches streams held by the others.
+
+Every client has a bounded queue. A client that falls behind loses its
+oldest events and gets a `resync` event telling it to refetch.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("foresto.events")
+
+SALE_POSTED = "sale.posted"
+STOCK_CHANGED = "stock.changed"
+STOCK_LOW = "stock.low"
+FORECAST_REFRESHED = "forecast.refreshed"
+RESYNC = "resync"
+
+
+class Subscription:
+    """One stream's queue, bound to the event loop serving it."""
+
+    def __init__(self, restaurant_id, maxsize):
+        self.restaurant_id = restaurant_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, message):
+        # runs on self.loop; drop the oldest rather than block publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        if self.overflowed:
+            self.overflowed = False
+            return {"type": RESYNC, "data": {}}
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+# restaurant_id -> subscriptions in this process; None = superusers, who see every restaurant
+_subscribers = {}
+_lock = threading.Lock()
+
+
+def subscribe(restaurant_id):
+    get_backend().start()
+    sub = Subscription(restaurant_id, getattr(settings, "EVENTS_QUEUE_SIZE", 100))
+    with _lock:
+        _subscribers.setdefault(restaurant_id, set()).add(sub)
+    return sub
+
+
+def unsubscribe(sub):
+    with _lock:
+        subs = _subscribers.get(sub.restaurant_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del _subscribers[sub.restaurant_id]
+
+
+def deliver(message):
+    """Hand a published message to this process's matching streams (any thread)."""
+    with _lock:
+        targets = list(_subscribers.get(message["restaurant"], ())) + list(_subscribers.get(None, ()))
+    for sub in targets:
+        try:
+            sub.loop.call_soon_threadsafe(sub.offer, message)
+        except RuntimeError:
+            # loop already closed: the stream is gone
+            unsubscribe(sub)
+
+
+def subscriber_count():
+    with _lock:
+        return sum(len(s) for s in _subscribers.values())
+
+
+class LocalBackend:
+    """Delivers in the publishing process only."""
+
+    def start(self):
+        pass
+
+    def publish(self, message):
+        deliver(message)
+
+
+class PostgresBackend:
+    """
+    pg_notify() on publish; a daemon thread per process LISTENs on its own
+    connection (outside Django's pool) and reconnects with backoff.
+    Payloads must stay under PostgreSQL's 8000 byte NOTIFY limit.
+    """
+
+    channel = "foresto_events"
+
+    def __init__(self, alias=DEFAULT_DB_ALIAS):
+        self.alias = alias
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name="events-listen", daemon=True)
+                self._thread.start()
+
+    def publish(self, message):
+        payload = json.dumps(message, cls=DjangoJSONEncoder)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def _listen(self):
+        import psycopg
+
+        params = connections[self.alias].get_connection_params()
+        backoff = 1
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self.channel}")
+                    backoff = 1
+                    for notify in conn.notifies():
+                        deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception("events listener failed, reconnecting in %ss", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, "EVENTS_BACKEND", "core.events.LocalBackend"))()
+    return _backend
+
+
+def publish(restaurant_id, type, data=None):
+    """
+    Send `type` to the restaurant's streams. Inside a transaction it is sent
+    on commit, so a rolled back write never reaches a dashboard.
+    """
+    if not restaurant_id:
+        return
+    message = {"restaurant": restaurant_id, "type": type, "data": data or {}}
+
+    def send():
+        try:
+            get_backend().publish(message)
+        except Exception:
+            # live updates are best effort; the write itself already committed
+            logger.exception("could not publish %s", type)
+
+    transaction.on_commit(send)
+
+
+def format_sse(message):
+    # no `id:` line: nothing is replayed, so a Last-Event-ID would mean nothing
+    data = json.dumps(message["data"], cls=DjangoJSONEncoder)
+    return f"event: {message['type']}\ndata: {data}\n\n"
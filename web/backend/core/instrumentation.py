@@ -0,0 +1,217 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger("foresto.perf")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)", re.IGNORECASE)
+
+_recent = deque(maxlen=getattr(settings, "PERF_RING_SIZE", 500))
+_recent_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """
+    SQL shape with literals and IN-lists collapsed, so the same query issued
+    for different ids counts as one pattern.
+    """
+    sql = _LITERALS.sub("?", sql)
+    return _IN_LISTS.sub("IN (...)", sql)
+
+
+class QueryStats:
+    """
+    connection.execute_wrapper() callable: counts queries, DB time and
+    repeated SQL fingerprints (N+1 candidates).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time_ms += (time.perf_counter() - t0) * 1000.0
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold=None):
+        threshold = threshold or getattr(settings, "PERF_N_PLUS_ONE_THRESHOLD", 5)
+        return [
+            {"sql": sql[:300], "count": n}
+            for sql, n in self.fingerprints.most_common()
+            if n >= threshold
+        ]
+
+
+@contextmanager
+def track_queries():
+    """Collects QueryStats for every DB alias while the block runs."""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(stats))
+        yield stats
+
+
+def publish(record):
+    """Sends a metrics record to the structured log and the in-process ring buffer."""
+    with _recent_lock:
+        _recent.append(record)
+
+    level = logging.WARNING if record.get("n_plus_one") else logging.INFO
+    logger.log(level, json.dumps(record, default=str))
+
+
+def recent(limit=100, label=None):
+    with _recent_lock:
+        rows = list(_recent)
+    if label:
+        rows = [r for r in rows if r.get("label") == label]
+    return rows[-limit:][::-1]
+
+
+def _build_record(label, stats, total_ms, **extra):
+    record = {
+        "ts": timezone.now().isoformat(),
+        "label": label,
+        "total_ms": round(total_ms, 2),
+        "db_queries": stats.count,
+        "db_ms": round(stats.time_ms, 2),
+        "n_plus_one": stats.repeated(),
+    }
+    record.update(extra)
+    return record
+
+
+@contextmanager
+def instrument(label, restaurant_id=None, **extra):
+    """
+    Measure an arbitrary block (command, service call, benchmark step):
+
+        with instrument("forecast.predict_menu_demand", restaurant_id=rid):
+            predict_menu_demand(...)
+    """
+    t0 = time.perf_counter()
+    with track_queries() as stats:
+        yield stats
+    publish(_build_record(label, stats, (time.perf_counter() - t0) * 1000.0, restaurant_id=restaurant_id, **extra))
+
+
+def view_label(view_func, method):
+    """
+    "SaleViewSet.summary", "DemandForecastView.get", or module.function for
+    plain Django views.
+    """
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if cls is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{cls.__name__}.{actions.get(method.lower(), method.lower())}"
+
+
+class RequestMetricsMiddleware:
+    """
+    Per-request DB query count/time, N+1 fingerprints, view time and render
+    (serialization) time, tagged with restaurant_id and the DRF view/action.
+
+    Output: structured log line on "foresto.perf", a Server-Timing header and
+    the ring buffer behind GET /api/perf/recent/ (superusers only).
+    Enabled with PERF_INSTRUMENTATION.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERF_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request._perf = {"start": time.perf_counter()}
+        with track_queries() as stats:
+            response = self.get_response(request)
+        return self._finish(request, stats, response)
+
+    async def __acall__(self, request):
+        request._perf = {"start": time.perf_counter()}
+        # connections are per thread: hook the ones of the thread the request's ORM calls run on
+        tracking = track_queries()
+        stats = await sync_to_async(tracking.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(tracking.__exit__)(None, None, None)
+        # request.user may still be a lazy session lookup: resolve it off the event loop
+        return await sync_to_async(self._finish)(request, stats, response)
+
+    def _finish(self, request, stats, response):
+        marks = request._perf
+        end = time.perf_counter()
+        view_start = marks.get("view_start", marks["start"])
+        view_end = marks.get("view_end", end)
+        render_end = marks.get("render_end", view_end)
+
+        user = getattr(request, "user", None)
+        is_authenticated = bool(user and user.is_authenticated)
+        record = _build_record(
+            marks.get("label", request.path),
+            stats,
+            (end - marks["start"]) * 1000.0,
+            view_ms=round((view_end - view_start) * 1000.0, 2),
+            render_ms=round((render_end - view_end) * 1000.0, 2),
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            restaurant_id=getattr(user, "restaurant_id", None) if is_authenticated else None,
+            user_id=user.pk if is_authenticated else None,
+        )
+        publish(record)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={record["db_ms"]};desc="{record["db_queries"]} queries"',
+                f'view;dur={record["view_ms"]}',
+                f'render;dur={record["render_ms"]}',
+                f'total;dur={record["total_ms"]}',
+            ]
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        marks = request._perf
+        marks["label"] = view_label(view_func, request.method)
+        marks["view_start"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF Responses render after this hook; split view vs render time
+        marks = request._perf
+        marks["view_end"] = time.perf_counter()
+
+        def _rendered(resp):
+            marks["render_end"] = time.perf_counter()
+
+        response.add_post_render_callback(_rendered)
+        return response
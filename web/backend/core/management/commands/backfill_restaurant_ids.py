@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.backfill import backfill_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the denormalized restaurant_id on SaleItem, StockMovement and PurchaseLine from their "
+        "sale / item / invoice. Safe to re-run; the migrations do the same once on deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count rows that would be updated")
+
+    def handle(self, *args, **opts):
+        counts = backfill_all(apps.get_model, batch_size=opts["batch_size"], dry_run=opts["dry_run"])
+        verb = "would update" if opts["dry_run"] else "updated"
+        for label, n in counts.items():
+            self.stdout.write(f"{label}: {verb} {n}")
@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.bench import speedup, timeit
+
+MODES = ("no_persist", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-request DB latency with a fresh connection per request, persistent connections "
+        "(CONN_MAX_AGE + health checks) and the psycopg3 pool. Each run replays the request "
+        "lifecycle (request_started -> query -> request_finished) on a throwaway alias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Alias whose settings are benchmarked")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--query", default="SELECT 1")
+        parser.add_argument("--pool-size", type=int, default=4)
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **opts):
+        base = dict(connections[opts["database"]].settings_dict)
+        report = {"vendor": connections[opts["database"]].vendor, "requests": opts["requests"], "modes": {}}
+
+        for mode in MODES:
+            cfg = self._settings_for(mode, base, opts["pool_size"])
+            if cfg is None:
+                report["modes"][mode] = {"skipped": "pooling needs PostgreSQL with psycopg[pool]"}
+                continue
+            report["modes"][mode] = self._run(mode, cfg, opts)
+
+        modes = report["modes"]
+        if "mean_ms" in modes["no_persist"]:
+            for mode in ("persistent", "pool"):
+                if "mean_ms" in modes[mode]:
+                    modes[mode]["speedup_vs_no_persist"] = speedup(modes["no_persist"], modes[mode])
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"vendor={report['vendor']} requests={report['requests']}")
+        for mode, r in modes.items():
+            if "skipped" in r:
+                self.stdout.write(f"{mode:<12} skipped: {r['skipped']}")
+                continue
+            self.stdout.write(
+                f"{mode:<12} mean {r['mean_ms']:>8.3f} ms  p95 {r['p95_ms']:>8.3f} ms"
+                + (f"  x{r['speedup_vs_no_persist']}" if r.get("speedup_vs_no_persist") else "")
+            )
+
+    def _settings_for(self, mode, base, pool_size):
+        cfg = dict(base)
+        cfg["OPTIONS"] = {k: v for k, v in base.get("OPTIONS", {}).items() if k != "pool"}
+        if mode == "no_persist":
+            cfg.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        elif mode == "persistent":
+            cfg.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+        else:
+            if cfg["ENGINE"] != "django.db.backends.postgresql":
+                return None
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                return None
+            cfg.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+            cfg["OPTIONS"]["pool"] = {"min_size": pool_size, "max_size": pool_size}
+        return cfg
+
+    def _run(self, mode, cfg, opts):
+        alias = f"bench_{mode}"
+        connections.settings[alias] = cfg
+        conn = connections[alias]
+
+        def one_request():
+            # same hooks Django's handler fires; request_finished is what closes
+            # (or keeps) connections depending on CONN_MAX_AGE / pooling
+            request_started.send(sender=self.__class__)
+            with conn.cursor() as cursor:
+                cursor.execute(opts["query"])
+                cursor.fetchall()
+            request_finished.send(sender=self.__class__)
+
+        try:
+            return timeit(one_request, repeat=opts["requests"], warmup=5)
+        finally:
+            conn.close()
+            if hasattr(conn, "close_pool"):
+                conn.close_pool()
+            del connections[alias]
+            del connections.settings[alias]
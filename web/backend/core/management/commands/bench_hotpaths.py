@@ -0,0 +1,281 @@
+import csv
+import io
+import json
+import platform
+import random
+import time
+
+import django
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.bench import timeit
+from core.instrumentation import track_queries
+from core.synthetic import generate_tenants
+from inventory.models import InventoryItem
+from menu.models import Category, MenuItem
+from sales.models import Sale, SaleItem
+from sales.serializers import deduct_inventory_for_sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot paths (sale create/deduction, purchase post/void, CSV imports, sales summaries, "
+        "forecasting services) against synthetic tenants at several scale points. Emits a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="append",
+            help="RESTAURANTSxSALES_PER_DAY, repeatable (default: 1x20 and 3x80)",
+        )
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--menu-items", type=int, default=40)
+        parser.add_argument("--ingredients", type=int, default=40)
+        parser.add_argument("--import-rows", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--only", help="Comma-separated benchmark names to run")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated data (default: roll back)")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+        parser.add_argument("--baseline", help="Previous report to compare against")
+        parser.add_argument("--threshold", type=float, default=1.25, help="p50 ratio that counts as a regression")
+
+    def handle(self, *args, **opts):
+        scales = [self._parse_scale(s) for s in (opts["scale"] or ["1x20", "3x80"])]
+        only = {s.strip() for s in opts["only"].split(",")} if opts["only"] else None
+
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "days": opts["days"],
+            "repeat": opts["repeat"],
+            "scales": [],
+        }
+
+        # request metrics middleware would add its own overhead (and log lines) to every call
+        with override_settings(ALLOWED_HOSTS=["testserver"], PERF_INSTRUMENTATION=False):
+            for restaurants, per_day in scales:
+                self.stderr.write(f"scale {restaurants}x{per_day} ...")
+                report["scales"].append(self._run_scale(restaurants, per_day, opts, only))
+
+        out = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(out)
+            self.stderr.write(f"report written to {opts['output']}")
+        else:
+            self.stdout.write(out)
+
+        if opts["baseline"]:
+            self._compare(report, opts["baseline"], opts["threshold"])
+
+    def _parse_scale(self, value):
+        try:
+            restaurants, per_day = value.lower().split("x")
+            return int(restaurants), int(per_day)
+        except ValueError:
+            raise CommandError(f"Invalid --scale '{value}', expected e.g. 3x80")
+
+    def _run_scale(self, restaurants, per_day, opts, only):
+        with transaction.atomic():
+            t0 = time.perf_counter()
+            tenants = generate_tenants(
+                restaurants=restaurants,
+                prefix=f"bench{restaurants}x{per_day}",
+                seed=opts["seed"],
+                menu_items=opts["menu_items"],
+                ingredients=opts["ingredients"],
+                days=opts["days"],
+                sales_per_day=per_day,
+            )
+            seed_ms = (time.perf_counter() - t0) * 1000.0
+
+            target = tenants[0]
+            results = {}
+            for name, fn, setup in self._benchmarks(target, opts):
+                if only and name not in only:
+                    continue
+                results[name] = self._measure(fn, setup, opts["repeat"])
+
+            if not opts["keep"]:
+                transaction.set_rollback(True)
+
+        dataset = {k: sum(t[k] for t in tenants) for k in ("menu_items", "ingredients", "recipe_lines", "sales", "sale_items")}
+        return {
+            "label": f"{restaurants}x{per_day}",
+            "restaurants": restaurants,
+            "sales_per_day": per_day,
+            "dataset": dataset,
+            "target_restaurant_sales": target["sales"],
+            "seed_ms": round(seed_ms, 1),
+            "results": results,
+        }
+
+    def _measure(self, fn, setup, repeat):
+        """One query-counted call, then timed runs. Failures are recorded, not raised."""
+        try:
+            # savepoint: a failing benchmark must not poison the scale point's transaction
+            with transaction.atomic():
+                with track_queries() as stats:
+                    fn(setup()) if setup else fn()
+                result = timeit(fn, repeat=repeat, warmup=1, setup=setup)
+            result["queries"] = stats.count
+            return result
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def _benchmarks(self, target, opts):
+        rid = target["restaurant_id"]
+        owner = User.objects.get(pk=target["owner_id"])
+        client = APIClient()
+        client.force_authenticate(owner)
+
+        rng = random.Random(opts["seed"])
+        menu = list(MenuItem.objects.filter(restaurant_id=rid).select_related("category"))
+        inv = list(InventoryItem.objects.filter(restaurant_id=rid))
+        categories = list(Category.objects.filter(restaurant_id=rid))
+
+        def ok(resp):
+            if resp.status_code >= 400:
+                raise RuntimeError(f"HTTP {resp.status_code}: {resp.content[:200]!r}")
+            return resp
+
+        def sale_payload(status):
+            return {
+                "payment_method": "CASH",
+                "status": status,
+                "items": [{"menu_item": mi.id, "qty": rng.randint(1, 3)} for mi in rng.sample(menu, 3)],
+            }
+
+        def purchase_payload():
+            return {
+                "supplier": target["supplier_id"],
+                "invoice_date": str(timezone.localdate()),
+                "lines": [
+                    {"item": it.id, "qty": str(rng.randint(5, 50)), "unit_cost": str(it.cost_per_unit)}
+                    for it in rng.sample(inv, 5)
+                ],
+            }
+
+        def paid_sale_not_deducted():
+            sale = Sale.objects.create(restaurant_id=rid, created_by=owner, status=Sale.Status.PAID)
+            for order, mi in enumerate(rng.sample(menu, 3)):
+                SaleItem.objects.create(
+                    sale=sale, restaurant_id=rid, menu_item=mi, name=mi.name, qty=2, unit_price=mi.price, line_total=mi.price * 2, sort_order=order
+                )
+            return sale
+
+        def posted_invoice():
+            return ok(client.post("/api/purchases/invoices/", purchase_payload(), format="json")).json()["id"]
+
+        def csv_upload(kind, rows):
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+            data = buf.getvalue().encode("utf-8")
+
+            def run():
+                f = SimpleUploadedFile(f"{kind}.csv", data, content_type="text/csv")
+                body = ok(client.post("/api/import/csv/", {"kind": kind, "dry_run": "true", "file": f}, format="multipart")).json()
+                if body.get("errors"):
+                    raise RuntimeError(f"import errors: {body['errors'][:1]}")
+
+            return run
+
+        n = opts["import_rows"]
+        tag = f"r{rid}"
+        imports = {
+            "categories": [{"name": f"Import Cat {tag}-{i}", "slug": f"import-{tag}-{i}"} for i in range(n)],
+            "menu_items": [
+                {"name": f"Import Dish {i}", "category_slug": categories[i % len(categories)].slug, "price": "950.00"}
+                for i in range(n)
+            ],
+            "ingredients": [{"sku": f"IMP-{tag}-{i}", "name": f"Import Ing {i}", "unit": "KG"} for i in range(n)],
+            "recipes": [
+                {
+                    "menu_item_name": menu[i % len(menu)].name,
+                    "menu_category_slug": menu[i % len(menu)].category.slug,
+                    "ingredient_sku": inv[i % len(inv)].sku,
+                    "qty": "0.25",
+                }
+                for i in range(n)
+            ],
+            "sales": [
+                {
+                    "sale_ref": f"IMP-{tag}-{i // 3}",
+                    "payment_method": "CARD",
+                    "status": "PAID",
+                    "sold_at": str(timezone.localdate()),
+                    "menu_item_id": menu[i % len(menu)].id,
+                    "qty": 1,
+                }
+                for i in range(n)
+            ],
+        }
+
+        from forecasting.services import predict_menu_demand
+        from forecasting.services_history import predict_past_days
+        from forecasting.services_ingredients import build_ingredient_plan
+
+        forecasts = [
+            ("forecast_menu_demand", lambda: predict_menu_demand(horizon_days=7, top_n=50, restaurant_id=rid)),
+            ("forecast_history", lambda: predict_past_days(days=14, top_n=50, restaurant_id=rid)),
+            ("forecast_ingredient_plan", lambda: build_ingredient_plan(horizon_days=7, top_n_items=50, restaurant_id=rid)),
+        ]
+
+        return [
+            ("sale_create_draft", lambda: ok(client.post("/api/sales/sales/", sale_payload("DRAF"), format="json")), None),
+            ("sale_create_paid", lambda: ok(client.post("/api/sales/sales/", sale_payload("PAID"), format="json")), None),
+            ("inventory_deduction", deduct_inventory_for_sale, paid_sale_not_deducted),
+            ("purchase_post", lambda: ok(client.post("/api/purchases/invoices/", purchase_payload(), format="json")), None),
+            (
+                "purchase_void",
+                lambda pk: ok(client.post(f"/api/purchases/invoices/{pk}/void/", {"reason": "bench"}, format="json")),
+                posted_invoice,
+            ),
+            *[(f"import_{kind}", csv_upload(kind, rows), None) for kind, rows in imports.items()],
+            ("sales_list", lambda: ok(client.get("/api/sales/sales/")), None),
+            ("sales_summary_30d", lambda: ok(client.get("/api/sales/sales/summary/?days=30")), None),
+            ("sales_daily_totals_90d", lambda: ok(client.get("/api/sales/sales/daily_totals/?days=90")), None),
+            ("sales_daily_summary", lambda: ok(client.get(f"/api/sales/sales/daily_summary/?date={timezone.localdate()}")), None),
+            # after the warmup these are cache hits; the _cold rows clear the cache (untimed) before every run
+            *[(name, fn, None) for name, fn in forecasts],
+            *[(f"{name}_cold", lambda _, fn=fn: fn(), cache.clear) for name, fn in forecasts],
+        ]
+
+    def _compare(self, report, path, threshold):
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        old = {
+            (s["label"], name): r
+            for s in baseline.get("scales", [])
+            for name, r in s.get("results", {}).items()
+            if "p50_ms" in r
+        }
+        regressions = []
+        for s in report["scales"]:
+            for name, r in s["results"].items():
+                prev = old.get((s["label"], name))
+                if not prev or "p50_ms" not in r or not prev["p50_ms"]:
+                    continue
+                ratio = r["p50_ms"] / prev["p50_ms"]
+                if ratio >= threshold:
+                    regressions.append(f"{s['label']} {name}: {prev['p50_ms']} -> {r['p50_ms']} ms (x{ratio:.2f})")
+
+        for line in regressions:
+            self.stderr.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) over x{threshold} vs {path}")
+        self.stderr.write(self.style.SUCCESS(f"No regressions over x{threshold} vs {path}"))
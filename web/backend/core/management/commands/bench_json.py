@@ -0,0 +1,100 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.bench import speedup, timeit
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from sales.models import Sale
+from sales.serializers import SaleListSerializer, attach_sale_items, sale_list_rows
+
+
+class Command(BaseCommand):
+    help = "Compare stdlib vs orjson JSON render/parse on real sale-list and forecast payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant", type=int, help="Restaurant id (default: the one with most sales)")
+        parser.add_argument("--sales", type=int, default=1000, help="Sales in the list payload")
+        parser.add_argument("--horizon", type=int, default=30)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **opts):
+        if orjson is None:
+            raise CommandError("orjson is not installed; FastJSONRenderer would just use stdlib json.")
+
+        restaurant_id = opts["restaurant"] or self._busiest_restaurant()
+        if restaurant_id is None:
+            raise CommandError("No sales found. Seed data first.")
+
+        payloads = {"sales_list": self._sales_payload(restaurant_id, opts["sales"])}
+        payloads.update(self._forecast_payloads(restaurant_id, opts["horizon"]))
+
+        report = {"restaurant_id": restaurant_id, "results": {}}
+        for name, data in payloads.items():
+            report["results"][name] = self._compare(data, opts["repeat"])
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"restaurant_id={restaurant_id}")
+        for name, r in report["results"].items():
+            self.stdout.write(
+                f"{name:<16} {r['bytes']:>10} bytes  identical={r['identical']}\n"
+                f"  render  stdlib {r['render']['stdlib']['mean_ms']:>9.3f} ms  "
+                f"orjson {r['render']['orjson']['mean_ms']:>9.3f} ms  x{r['render']['speedup']}\n"
+                f"  parse   stdlib {r['parse']['stdlib']['mean_ms']:>9.3f} ms  "
+                f"orjson {r['parse']['orjson']['mean_ms']:>9.3f} ms  x{r['parse']['speedup']}"
+            )
+
+    def _busiest_restaurant(self):
+        from django.db.models import Count
+
+        row = (
+            Sale.objects.exclude(restaurant_id=None)
+            .values("restaurant_id")
+            .annotate(n=Count("id"))
+            .order_by("-n")
+            .first()
+        )
+        return row["restaurant_id"] if row else None
+
+    def _sales_payload(self, restaurant_id, n):
+        qs = Sale.objects.filter(restaurant_id=restaurant_id).order_by("-created_at")[:n]
+        return SaleListSerializer(attach_sale_items(sale_list_rows(qs)), many=True).data
+
+    def _forecast_payloads(self, restaurant_id, horizon):
+        from forecasting.services import predict_menu_demand
+        from forecasting.services_ingredients import build_ingredient_plan
+
+        try:
+            return {
+                "forecast": predict_menu_demand(horizon_days=horizon, top_n=500, restaurant_id=restaurant_id),
+                "ingredient_plan": build_ingredient_plan(
+                    horizon_days=horizon, top_n_items=500, restaurant_id=restaurant_id
+                ),
+            }
+        except FileNotFoundError as e:
+            self.stderr.write(f"Skipping forecast payloads: {e}")
+            return {}
+
+    def _compare(self, data, repeat):
+        slow, fast = JSONRenderer(), FastJSONRenderer()
+        slow_bytes, fast_bytes = slow.render(data), fast.render(data)
+
+        render_slow = timeit(lambda: slow.render(data), repeat=repeat)
+        render_fast = timeit(lambda: fast.render(data), repeat=repeat)
+
+        parse_slow = timeit(lambda: JSONParser().parse(io.BytesIO(slow_bytes)), repeat=repeat)
+        parse_fast = timeit(lambda: FastJSONParser().parse(io.BytesIO(slow_bytes)), repeat=repeat)
+
+        return {
+            "bytes": len(slow_bytes),
+            "identical": slow_bytes == fast_bytes,
+            "render": {"stdlib": render_slow, "orjson": render_fast, "speedup": speedup(render_slow, render_fast)},
+            "parse": {"stdlib": parse_slow, "orjson": parse_fast, "speedup": speedup(parse_slow, parse_fast)},
+        }
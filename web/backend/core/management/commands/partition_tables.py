@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Optional monthly range partitioning (PostgreSQL) for Sale (sold_at) and StockMovement (created_at). "
+        "'convert' rebuilds the tables once; run 'maintain' from cron to pre-create partitions and "
+        "detach/archive/drop old ones; 'status' lists partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["status", "convert", "maintain"])
+        parser.add_argument(
+            "--model",
+            action="append",
+            choices=sorted(partitioning.PARTITIONED),
+            help="Limit to these models (repeatable; default: all)",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--ahead", type=int, default=3, help="Months of future partitions to keep ready")
+        parser.add_argument("--retain-months", type=int, help="maintain: detach partitions older than this many months")
+        parser.add_argument("--archive-schema", help="maintain: move detached partitions (and their sale items) here")
+        parser.add_argument("--drop", action="store_true", help="maintain: drop detached partitions and their sale items")
+
+    def handle(self, *args, **opts):
+        if connections[opts["database"]].vendor != "postgresql":
+            raise CommandError("Table partitioning needs PostgreSQL.")
+        if opts["archive_schema"] and opts["drop"]:
+            raise CommandError("Use either --archive-schema or --drop.")
+
+        out = []
+        for label in opts["model"] or partitioning.PARTITIONED:
+            if opts["action"] == "status":
+                out.append(partitioning.status(label, using=opts["database"]))
+            elif opts["action"] == "convert":
+                out.append(partitioning.convert(label, months_ahead=opts["ahead"], using=opts["database"]))
+            else:
+                out.append(
+                    partitioning.maintain(
+                        label,
+                        months_ahead=opts["ahead"],
+                        retain_months=opts["retain_months"],
+                        archive_schema=opts["archive_schema"],
+                        drop=opts["drop"],
+                        using=opts["database"],
+                    )
+                )
+        self.stdout.write(json.dumps(out, indent=2))
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.synthetic import clear_tenants, generate_tenants
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic restaurants (menu, recipes, stock, months of sales) for benchmarks and demos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurants", type=int, default=1)
+        parser.add_argument("--menu-items", type=int, default=40)
+        parser.add_argument("--ingredients", type=int, default=40)
+        parser.add_argument("--days", type=int, default=120)
+        parser.add_argument("--sales-per-day", type=int, default=60)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="bench", help="Restaurant slug prefix used to find/clear synthetic tenants")
+        parser.add_argument("--clear", action="store_true", help="Delete existing synthetic tenants with this prefix first")
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            if opts["clear"]:
+                deleted = clear_tenants(opts["prefix"])
+                self.stdout.write(f"Deleted {deleted} rows from previous '{opts['prefix']}' tenants.")
+
+            tenants = generate_tenants(
+                restaurants=opts["restaurants"],
+                prefix=opts["prefix"],
+                seed=opts["seed"],
+                menu_items=opts["menu_items"],
+                ingredients=opts["ingredients"],
+                days=opts["days"],
+                sales_per_day=opts["sales_per_day"],
+            )
+
+        for t in tenants:
+            self.stdout.write(json.dumps(t))
+        self.stdout.write(self.style.SUCCESS(f"Created {len(tenants)} synthetic restaurant(s)."))
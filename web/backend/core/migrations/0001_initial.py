@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0002_restaurant_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=20)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='accounts.restaurant')),
+            ],
+            options={
+                'unique_together': {('restaurant', 'scope')},
+            },
+        ),
+    ]
@@ -1,13 +1,20 @@
-from django.core.exceptions import FieldError
+from . import scoping
 
 
 class RestaurantScopedQuerysetMixin:
     """
     Scopes queryset to authenticated user's restaurant.
-    Set restaurant_lookup for nested lookups (e.g. "menu_item__restaurant", "item__restaurant").
+    Set restaurant_lookup for nested lookups (e.g. "menu_item__restaurant").
+
+    The lookup is validated once per viewset class (ImproperlyConfigured on a
+    bad path), so requests only do a dict lookup.
     """
     restaurant_lookup = "restaurant"
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        scoping.register_later(cls)
+
     def get_queryset(self):
         qs = super().get_queryset()
         user = getattr(self.request, "user", None)
@@ -23,17 +30,13 @@ class RestaurantScopedQuerysetMixin:
         if not restaurant_id:
             return qs.none()
 
-        try:
-            return qs.filter(**{f"{self.restaurant_lookup}_id": restaurant_id})
-        except FieldError:
-            # safety fallback if a model doesn't have the expected relation yet
-            return qs.none()
+        return qs.filter(**{scoping.scope_filter(type(self), qs.model): restaurant_id})
 
     def perform_create(self, serializer):
         user = getattr(self.request, "user", None)
         model = getattr(getattr(serializer, "Meta", None), "model", None)
 
-        if model and any(f.name == "restaurant" for f in model._meta.fields):
+        if model and scoping.has_restaurant_field(model):
             if user and user.is_authenticated and getattr(user, "restaurant_id", None):
                 serializer.save(restaurant_id=user.restaurant_id)
                 return
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class TenantVersion(models.Model):
+    """
+    Per-restaurant change counter for one data scope (menu, inventory, sales).
+    Bumped on writes; read by conditional GETs to build ETags.
+    """
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="versions",
+    )
+    scope = models.CharField(max_length=20)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("restaurant", "scope")
+
+    def __str__(self):
+        return f"{self.restaurant_id}:{self.scope}={self.version}"
@@ -0,0 +1,34 @@
+import io
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json is used instead
+    orjson = None
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson for UTF-8 bodies.
+
+    Anything orjson refuses (other charsets, ints > 64 bit, invalid JSON) is
+    re-parsed by the stdlib parser, so results and error messages are unchanged.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or not self.strict or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
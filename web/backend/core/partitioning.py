@@ -0,0 +1,279 @@
+"""
+Optional PostgreSQL range partitioning by month for the append-mostly tables.
+
+Nothing here runs on its own: `manage.py partition_tables convert` turns the
+tables into partitioned ones once, `manage.py partition_tables maintain`
+(cron, daily or weekly) keeps future partitions ahead and detaches old ones.
+The ORM keeps using the parent table names, so queries do not change.
+
+What PostgreSQL requires, and what convert does about it:
+- the primary key and unique constraints must contain the partition key:
+  the PK becomes (id, <date>) and Sale.import_ref is unique per sold_at;
+- a partitioned table cannot be the target of a foreign key to `id` alone:
+  the DB-level FK from SaleItem.sale is dropped (Django's CASCADE is done by
+  the ORM, the index on sale_id stays).
+SaleItem has no date column, so it is not partitioned itself; its rows follow
+their sale when old partitions are archived or dropped.
+
+Indexes and outgoing foreign keys are recreated from the table's own
+definitions in the catalog (pg_get_indexdef / pg_get_constraintdef), so they
+keep the names and options migrations gave them; no Django schema editor
+internals are involved.
+"""
+import re
+from datetime import datetime, time
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.utils import timezone
+
+# model label -> (partition column field, [(child model label, FK field)])
+PARTITIONED = {
+    "sales.Sale": ("sold_at", [("sales.SaleItem", "sale")]),
+    "inventory.StockMovement": ("created_at", []),
+}
+
+MONTH_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def add_months(d, n):
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return d.replace(year=y, month=m + 1, day=1)
+
+
+def _bound(d):
+    # local midnight: a month partition matches the business month
+    return timezone.make_aware(datetime.combine(d, time.min), timezone.get_current_timezone()).isoformat()
+
+
+def _q(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def _table(label):
+    model = apps.get_model(label)
+    field_name, children = PARTITIONED[label]
+    return model, model._meta.db_table, model._meta.get_field(field_name).column, children
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table):
+    """[(name, first day of month or None for DEFAULT)] attached to `table`."""
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname
+        """,
+        [table],
+    )
+    out = []
+    for (name,) in cursor.fetchall():
+        m = MONTH_SUFFIX.search(name)
+        out.append((name, datetime(int(m.group(1)), int(m.group(2)), 1).date() if m else None))
+    return out
+
+
+def _create_partition(cursor, table, column, month):
+    """Month partition; rows already in the DEFAULT partition for that month are moved into it."""
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0]:
+        return False
+
+    lo, hi = _bound(month), _bound(add_months(month, 1))
+    default = f"{table}_default"
+    cursor.execute("SELECT to_regclass(%s)", [default])
+    has_default = cursor.fetchone()[0] is not None
+    if has_default:
+        # PostgreSQL refuses to add a partition whose range still has rows in DEFAULT
+        cursor.execute(f"CREATE TEMP TABLE _moved (LIKE {_q(table)}) ON COMMIT DROP")
+        cursor.execute(
+            f"WITH d AS (DELETE FROM {_q(default)} WHERE {_q(column)} >= %s AND {_q(column)} < %s RETURNING *) "
+            "INSERT INTO _moved SELECT * FROM d",
+            [lo, hi],
+        )
+    cursor.execute(f"CREATE TABLE {_q(name)} PARTITION OF {_q(table)} FOR VALUES FROM ('{lo}') TO ('{hi}')")
+    if has_default:
+        cursor.execute(f"INSERT INTO {_q(table)} SELECT * FROM _moved")
+        cursor.execute("DROP TABLE _moved")
+    return True
+
+
+def _definitions(cursor, table):
+    """
+    (CREATE INDEX statements, [(name, FOREIGN KEY definition)], [unique index names])
+    of `table` as it is now. Indexes behind the primary key and constraints are
+    left out: convert builds those with the partition column.
+    """
+    cursor.execute(
+        """
+        SELECT c.relname, i.indisunique, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        ORDER BY c.relname
+        """,
+        [table],
+    )
+    indexes, unique = [], []
+    for name, is_unique, sql in cursor.fetchall():
+        # a unique index must contain the partition column; it cannot be carried over
+        (unique if is_unique else indexes).append(name if is_unique else sql)
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f' ORDER BY conname",
+        [table],
+    )
+    return indexes, cursor.fetchall(), unique
+
+
+def convert(label, months_ahead=3, using="default"):
+    """
+    Rebuild `label`'s table as a monthly range-partitioned table (one transaction,
+    ACCESS EXCLUSIVE lock for the copy). No-op if it already is partitioned.
+    """
+    model, table, column, _children = _table(label)
+    connection = connections[using]
+    pk = model._meta.pk.column
+    legacy = f"{table}_legacy"
+    seq = f"{table}_{pk}_seq"
+    report = {"table": table, "converted": False, "dropped_fks": [], "dropped_unique_indexes": [], "partitions": 0}
+
+    with transaction.atomic(using), connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return report
+
+        # Django's FKs are DEFERRABLE: check pending rows now, ALTER TABLE refuses to run with them queued
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"LOCK TABLE {_q(table)} IN ACCESS EXCLUSIVE MODE")
+        indexes, fks, unique = _definitions(cursor, table)
+        report["dropped_unique_indexes"] = unique
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [table],
+        )
+        for child, conname in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {child} DROP CONSTRAINT {_q(conname)}")
+            report["dropped_fks"].append(f"{child}.{conname}")
+
+        cursor.execute(f"SELECT min({_q(column)}), max({_q(column)}) FROM {_q(table)}")
+        lo, hi = cursor.fetchone()
+
+        # free the id sequence's name: an IDENTITY or serial sequence is not renamed with its table
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [_q(table), pk])
+        old_seq = cursor.fetchone()[0]
+        cursor.execute(f"ALTER TABLE {_q(table)} ALTER COLUMN {_q(pk)} DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {_q(table)} ALTER COLUMN {_q(pk)} DROP DEFAULT")
+        if old_seq:
+            cursor.execute(f"DROP SEQUENCE IF EXISTS {old_seq}")
+
+        cursor.execute(f"ALTER TABLE {_q(table)} RENAME TO {_q(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {_q(table)} (LIKE {_q(legacy)} INCLUDING DEFAULTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({_q(column)})"
+        )
+        # plain sequence instead of an IDENTITY, which partitioned tables do not support on all versions
+        cursor.execute(f"CREATE SEQUENCE {_q(seq)} OWNED BY {_q(table)}.{_q(pk)}")
+        cursor.execute(f"ALTER TABLE {_q(table)} ALTER COLUMN {_q(pk)} SET DEFAULT nextval('{seq}')")
+        cursor.execute(f"ALTER TABLE {_q(table)} ADD PRIMARY KEY ({_q(pk)}, {_q(column)})")
+        for f in model._meta.local_concrete_fields:
+            if f.unique and not f.primary_key:
+                cursor.execute(
+                    f"ALTER TABLE {_q(table)} ADD CONSTRAINT {_q(f'{table}_{f.column}_{column}_uniq')} "
+                    f"UNIQUE ({_q(f.column)}, {_q(column)})"
+                )
+
+        today = month_start(timezone.localdate())
+        month = month_start(timezone.localtime(lo).date()) if lo else today
+        last = max(add_months(today, months_ahead), month_start(timezone.localtime(hi).date()) if hi else today)
+        while month <= last:
+            report["partitions"] += _create_partition(cursor, table, column, month)
+            month = add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {_q(table + '_default')} PARTITION OF {_q(table)} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {_q(table)} SELECT * FROM {_q(legacy)}")
+        cursor.execute(f"SELECT setval('{seq}', COALESCE(max({_q(pk)}), 0) + 1, false) FROM {_q(table)}")
+        cursor.execute(f"DROP TABLE {_q(legacy)}")
+
+        # the legacy table's indexes and FKs, under their names, now on the parent (indexes cascade to partitions)
+        for sql in indexes:
+            cursor.execute(sql)
+        for name, definition in fks:
+            cursor.execute(f"ALTER TABLE {_q(table)} ADD CONSTRAINT {_q(name)} {definition}")
+
+    report["converted"] = True
+    return report
+
+
+def maintain(label, months_ahead=3, retain_months=None, archive_schema=None, drop=False, using="default"):
+    """
+    Create partitions up to `months_ahead`; detach the ones older than
+    `retain_months` and either leave them as plain tables, move them (and their
+    child rows) to `archive_schema`, or drop them.
+    """
+    model, table, column, children = _table(label)
+    report = {"table": table, "created": [], "detached": []}
+
+    with transaction.atomic(using), connections[using].cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            report["skipped"] = "not partitioned (run convert first)"
+            return report
+
+        today = month_start(timezone.localdate())
+        for n in range(months_ahead + 1):
+            month = add_months(today, n)
+            if _create_partition(cursor, table, column, month):
+                report["created"].append(partition_name(table, month))
+
+        if retain_months is None:
+            return report
+
+        cutoff = add_months(today, -retain_months)
+        if archive_schema:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {_q(archive_schema)}")
+        for name, month in partitions(cursor, table):
+            if month is None or month >= cutoff:
+                continue
+            cursor.execute(f"ALTER TABLE {_q(table)} DETACH PARTITION {_q(name)}")
+            for child_label, fk in children:
+                child = apps.get_model(child_label)
+                child_table = child._meta.db_table
+                fk_col = child._meta.get_field(fk).column
+                moved = f"DELETE FROM {_q(child_table)} WHERE {_q(fk_col)} IN (SELECT id FROM {_q(name)})"
+                if archive_schema:
+                    archived = f"{_q(archive_schema)}.{_q(partition_name(child_table, month))}"
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {archived} (LIKE {_q(child_table)})")
+                    cursor.execute(f"WITH d AS ({moved} RETURNING *) INSERT INTO {archived} SELECT * FROM d")
+                elif drop:
+                    cursor.execute(moved)
+            if drop:
+                cursor.execute(f"DROP TABLE {_q(name)}")
+            elif archive_schema:
+                cursor.execute(f"ALTER TABLE {_q(name)} SET SCHEMA {_q(archive_schema)}")
+            report["detached"].append(name)
+
+    return report
+
+
+def status(label, using="default"):
+    _model, table, _column, _children = _table(label)
+    with connections[using].cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return {"table": table, "partitioned": False}
+        return {
+            "table": table,
+            "partitioned": True,
+            "partitions": [name for name, _month in partitions(cursor, table)],
+        }
@@ -0,0 +1,71 @@
+import math
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json is used instead
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_ENCODER = JSONEncoder()
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _has_non_finite(data):
+    """True if a NaN / +-Infinity float is anywhere in the dicts and lists of `data`."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+    Output matches JSONRenderer: anything orjson does not encode natively
+    (Decimal, datetime, lazy strings, numpy, ...) goes through DRF's own
+    JSONEncoder.default. The only difference is exponent spelling for very
+    large/small floats (1e16 vs 1e+16), which parse to the same value.
+
+    Indented output (browsable API, `; indent=`), non-default
+    UNICODE/COMPACT/STRICT settings, or payloads orjson rejects
+    (e.g. ints > 64 bit) fall back to the stdlib renderer.
+
+    orjson writes NaN and +/-Infinity as null where JSONRenderer (strict)
+    raises ValueError. Output containing null is checked for non-finite
+    floats and handed to the stdlib renderer, so they still raise instead
+    of reaching clients as null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_ENCODER.default, option=_OPTIONS)
+        except (TypeError, ValueError):
+            # orjson.JSONEncodeError is a TypeError
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b"null" in ret and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # same strict-javascript escaping as JSONRenderer
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
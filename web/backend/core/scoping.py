@@ -0,0 +1,82 @@
+from functools import lru_cache
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+
+# viewset class -> resolved filter kwarg ("menu_item__restaurant_id"), filled once per class
+_SCOPES = {}
+# viewsets defined before the model registry was ready; resolved from CoreConfig.ready()
+_PENDING = []
+
+RESTAURANT_MODEL = "accounts.Restaurant"
+
+# preferred business timestamp first
+DATE_FIELDS = ("sold_at", "invoice_date", "created_at")
+
+
+def resolve_restaurant_lookup(model, lookup):
+    """
+    Validate a restaurant_lookup path ("restaurant", "menu_item__restaurant")
+    against `model` and return the filter key ending in the FK column.
+    """
+    opts = model._meta
+    parts = lookup.split("__")
+    for i, name in enumerate(parts):
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f"{model.__name__}: restaurant_lookup '{lookup}' has no field '{name}'")
+        if not field.is_relation or field.many_to_many or field.one_to_many:
+            raise ImproperlyConfigured(f"{model.__name__}: restaurant_lookup '{lookup}' must follow FKs, '{name}' is not one")
+        if i < len(parts) - 1:
+            opts = field.related_model._meta
+
+    if field.related_model._meta.label != RESTAURANT_MODEL:
+        raise ImproperlyConfigured(f"{model.__name__}: restaurant_lookup '{lookup}' does not end at Restaurant")
+    return f"{lookup}_id"
+
+
+@lru_cache(maxsize=None)
+def has_restaurant_field(model):
+    try:
+        return model._meta.get_field("restaurant").many_to_one
+    except FieldDoesNotExist:
+        return False
+
+
+@lru_cache(maxsize=None)
+def date_field(model):
+    """Best timestamp to bucket `model` rows by day (sold_at, invoice_date, created_at)."""
+    names = {f.name for f in model._meta.concrete_fields}
+    for name in DATE_FIELDS:
+        if name in names:
+            return name
+    raise ImproperlyConfigured(f"{model.__name__} has none of {', '.join(DATE_FIELDS)}")
+
+
+def register(viewset):
+    queryset = getattr(viewset, "queryset", None)
+    if queryset is None:
+        # abstract base or get_queryset-only viewset: nothing to validate up front
+        return
+    _SCOPES[viewset] = resolve_restaurant_lookup(queryset.model, viewset.restaurant_lookup)
+
+
+def register_later(viewset):
+    if apps.models_ready:
+        register(viewset)
+    else:
+        _PENDING.append(viewset)
+
+
+def resolve_pending():
+    while _PENDING:
+        register(_PENDING.pop())
+
+
+def scope_filter(viewset, model):
+    """Filter kwarg for `viewset`; resolved on first use for viewsets registered without a queryset."""
+    key = _SCOPES.get(viewset)
+    if key is None:
+        key = _SCOPES[viewset] = resolve_restaurant_lookup(model, viewset.restaurant_lookup)
+    return key
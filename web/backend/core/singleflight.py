@@ -0,0 +1,239 @@
+"""
+Request coalescing: concurrent calls with the same key share one computation.
+
+The first caller (the leader) runs the function; callers arriving while it
+is in flight wait for its result instead of starting their own. Sync and
+async callers share the same registry, so the sync from-forecast endpoint
+and an async forecast view asking for the same plan compute it once.
+Nothing is cached afterwards: a call that starts after the leader finished
+computes again.
+
+With SINGLEFLIGHT_ADVISORY on PostgreSQL, leaders in different worker
+processes also serialize on a session advisory lock keyed by the same key.
+The winner leaves its result in the cache (needs a shared CACHE_URL) for
+the ones that waited on the lock, so they do not recompute. The lock is
+polled with pg_try_advisory_lock, never waited on in the database: after
+SINGLEFLIGHT_WAIT_SECONDS a caller gives up and computes on its own, as a
+follower in the same process does.
+
+Results are shared between callers; treat them as read-only.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from concurrent.futures import Future
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# key -> Future of the in-flight computation in this process
+_inflight = {}
+_lock = threading.Lock()
+
+
+def _claim(key):
+    with _lock:
+        fut = _inflight.get(key)
+        if fut is not None:
+            return fut, False
+        fut = _inflight[key] = Future()
+        return fut, True
+
+
+def _release(key, fut):
+    with _lock:
+        if _inflight.get(key) is fut:
+            del _inflight[key]
+
+
+def _wait_seconds():
+    return getattr(settings, "SINGLEFLIGHT_WAIT_SECONDS", 60)
+
+
+def do(key, fn, *args, **kwargs):
+    """fn(*args, **kwargs), or the result of an identical call already running."""
+    fut, leader = _claim(key)
+    if not leader:
+        try:
+            return fut.result(timeout=_wait_seconds())
+        except TimeoutError:
+            # a stuck leader must not block everyone: compute on our own
+            return fn(*args, **kwargs)
+
+    try:
+        result = _shared(key, fn, *args, **kwargs)
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    else:
+        fut.set_result(result)
+        return result
+    finally:
+        _release(key, fut)
+
+
+async def ado(key, fn, *args, **kwargs):
+    """do() for coroutine functions; the computation survives the leader being cancelled."""
+    fut, leader = _claim(key)
+    if not leader:
+        try:
+            # shield: a cancelled follower must not cancel the shared future
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), _wait_seconds())
+        except asyncio.TimeoutError:
+            return await fn(*args, **kwargs)
+
+    async def lead():
+        try:
+            result = await _ashared(key, fn, *args, **kwargs)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            _release(key, fut)
+
+    return await asyncio.shield(asyncio.ensure_future(lead()))
+
+
+def coalesce(prefix):
+    """
+    Decorator: coalesce concurrent calls of a function (sync or async) whose
+    arguments are equal. Calls are keyed on (prefix, bound arguments), so a
+    sync and an async variant with the same prefix and signature share flights.
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        def key(args, kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (prefix,) + tuple(sorted(bound.arguments.items()))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await ado(key(args, kwargs), fn, *args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return do(key(args, kwargs), fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ---- cross-process variant (PostgreSQL advisory locks) ----
+
+def _advisory_enabled(using=DEFAULT_DB_ALIAS):
+    return getattr(settings, "SINGLEFLIGHT_ADVISORY", False) and connections[using].vendor == "postgresql"
+
+
+def lock_id(key):
+    """Signed 64-bit advisory lock id for `key`."""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# waiting leaders re-try the advisory lock this often (seconds)
+LOCK_POLL_SECONDS = 0.05
+
+
+def _cache_key(key):
+    return f"singleflight:{lock_id(key)}"
+
+
+def _try_lock(key):
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id(key)])
+        return cursor.fetchone()[0]
+
+
+def _hit(key, started):
+    hit = cache.get(_cache_key(key))
+    # only a result finished after we started waiting: nothing older than a coalesced call would see
+    if hit is not None and hit[0] >= started:
+        return hit
+    return None
+
+
+def _acquire(key):
+    """
+    Poll the advisory lock for up to SINGLEFLIGHT_WAIT_SECONDS. Returns
+    (locked, result left by the previous holder or None); not locked means
+    the holder is stuck and the caller computes on its own.
+    """
+    started = time.time()
+    deadline = started + _wait_seconds()
+    while not _try_lock(key):
+        if time.time() >= deadline:
+            return False, None
+        time.sleep(LOCK_POLL_SECONDS)
+    return True, _hit(key, started)
+
+
+async def _aacquire(key):
+    """_acquire() that sleeps on the event loop between attempts, not in a thread."""
+    started = time.time()
+    deadline = started + _wait_seconds()
+    # thread-sensitive: the lock belongs to this request's connection
+    while not await sync_to_async(_try_lock)(key):
+        if time.time() >= deadline:
+            return False, None
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+    return True, await sync_to_async(_hit)(key, started)
+
+
+def _store_and_unlock(key, result, computed):
+    try:
+        if computed:
+            cache.set(_cache_key(key), (time.time(), result), getattr(settings, "SINGLEFLIGHT_RESULT_SECONDS", 30))
+    finally:
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id(key)])
+
+
+def _shared(key, fn, *args, **kwargs):
+    if not _advisory_enabled():
+        return fn(*args, **kwargs)
+
+    locked, hit = _acquire(key)
+    if not locked:
+        # the holder is stuck: compute on our own, like a follower that timed out
+        return fn(*args, **kwargs)
+    result, computed = (hit[1], False) if hit else (None, True)
+    try:
+        if computed:
+            result = fn(*args, **kwargs)
+    except BaseException:
+        _store_and_unlock(key, None, False)
+        raise
+    _store_and_unlock(key, result, computed)
+    return result
+
+
+async def _ashared(key, fn, *args, **kwargs):
+    if not _advisory_enabled():
+        return await fn(*args, **kwargs)
+
+    locked, hit = await _aacquire(key)
+    if not locked:
+        return await fn(*args, **kwargs)
+    result, computed = (hit[1], False) if hit else (None, True)
+    try:
+        if computed:
+            result = await fn(*args, **kwargs)
+    except BaseException:
+        await sync_to_async(_store_and_unlock)(key, None, False)
+        raise
+    await sync_to_async(_store_and_unlock)(key, result, computed)
+    return result
@@ -0,0 +1,233 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import Restaurant, User
+from inventory.models import InventoryItem
+from menu.models import Category, MenuItem, RecipeLine
+from purchases.models import Supplier
+from sales.models import Sale, SaleItem
+
+# Mon..Sun demand multipliers: quiet start of week, busy Friday/Saturday
+WEEKDAY_WEIGHTS = [0.80, 0.85, 0.90, 1.00, 1.30, 1.45, 1.15]
+# (hour, weight): lunch and dinner peaks
+HOUR_WEIGHTS = [(11, 3), (12, 8), (13, 7), (14, 3), (15, 1), (17, 2), (18, 5), (19, 9), (20, 8), (21, 4)]
+
+CATEGORIES = ["Starters", "Rice & Curry", "Kottu", "Noodles", "Mains", "Desserts", "Beverages"]
+DISH_WORDS = ["Chicken", "Beef", "Fish", "Prawn", "Egg", "Vegetable", "Cheese", "Mutton", "Cuttlefish", "Mushroom"]
+DISH_STYLES = ["Fried", "Devilled", "Spicy", "Garlic", "Butter", "Curry", "Grilled", "Special", "Mixed", "Classic"]
+INGREDIENTS = [
+    ("Chicken", "KG"), ("Beef", "KG"), ("Fish", "KG"), ("Prawns", "KG"), ("Eggs", "PCS"), ("Rice", "KG"),
+    ("Flour", "KG"), ("Onion", "KG"), ("Garlic", "KG"), ("Chili", "KG"), ("Cheese", "KG"), ("Butter", "KG"),
+    ("Coconut Milk", "L"), ("Oil", "L"), ("Milk", "L"), ("Sugar", "KG"), ("Tea", "G"), ("Coffee", "G"),
+    ("Noodles", "KG"), ("Leeks", "KG"), ("Carrot", "KG"), ("Mushroom", "KG"), ("Tomato", "KG"), ("Potato", "KG"),
+]
+
+BATCH = 2000
+
+
+def _weighted_hour(rng):
+    hours, weights = zip(*HOUR_WEIGHTS)
+    return rng.choices(hours, weights=weights)[0]
+
+
+def generate_restaurant(
+    index,
+    prefix="bench",
+    menu_items=40,
+    ingredients=40,
+    days=120,
+    sales_per_day=60,
+    seed=0,
+):
+    """
+    One synthetic tenant: owner user, supplier, categories, menu items with
+    2-5 line recipes, ingredients stocked for the whole period, and `days` of
+    PAID sales (a few VOID/DRAF) with weekday seasonality, a slight upward
+    trend and long-tail item popularity.
+
+    created_at is backdated to sold_at so created_at-based reports see history.
+    Returns a dict of ids and row counts.
+    """
+    rng = random.Random(f"{seed}-{index}")
+    tag = f"{prefix}-{index}"
+
+    restaurant = Restaurant.objects.create(name=f"{prefix.title()} Restaurant {index}", slug=tag)
+    owner = User(
+        username=f"{tag}-owner",
+        email=f"{tag}-owner@example.com",
+        role=User.Role.OWNER,
+        restaurant=restaurant,
+    )
+    owner.set_unusable_password()
+    owner.save()
+    supplier = Supplier.objects.create(name=f"{tag} Wholesale", restaurant=restaurant)
+
+    # category slug/name and sku are globally unique, so everything carries the tenant tag
+    categories = Category.objects.bulk_create(
+        [
+            Category(name=f"{name} ({tag})", slug=f"{tag}-{i}", sort_order=i, restaurant=restaurant)
+            for i, name in enumerate(CATEGORIES)
+        ]
+    )
+
+    inv = InventoryItem.objects.bulk_create(
+        [
+            InventoryItem(
+                name=INGREDIENTS[i % len(INGREDIENTS)][0] + ("" if i < len(INGREDIENTS) else f" {i}"),
+                sku=f"{tag}-ING{i:03d}".upper(),
+                unit=INGREDIENTS[i % len(INGREDIENTS)][1],
+                restaurant=restaurant,
+                current_stock=Decimal(rng.randint(50_000, 90_000)),
+                reorder_level=Decimal(rng.randint(10, 200)),
+                cost_per_unit=cost,
+                avg_cost=cost,
+            )
+            for i, cost in ((i, Decimal(rng.randint(50, 4000)) / 100) for i in range(ingredients))
+        ]
+    )
+
+    menu = MenuItem.objects.bulk_create(
+        [
+            MenuItem(
+                category=categories[i % len(categories)],
+                name=f"{rng.choice(DISH_STYLES)} {rng.choice(DISH_WORDS)} {i}",
+                slug=f"item-{i}",
+                price=Decimal(rng.randint(300, 3500)),
+                sort_order=i,
+                restaurant=restaurant,
+            )
+            for i in range(menu_items)
+        ]
+    )
+
+    recipe = []
+    for mi in menu:
+        for ing in rng.sample(inv, k=min(len(inv), rng.randint(2, 5))):
+            recipe.append(RecipeLine(menu_item=mi, ingredient=ing, qty=Decimal(rng.randint(5, 40)) / 100))
+    RecipeLine.objects.bulk_create(recipe, batch_size=BATCH)
+
+    # long tail: a handful of dishes sell most of the volume
+    popularity = [1.0 / (rank + 1) ** 0.8 for rank in range(len(menu))]
+    rng.shuffle(popularity)
+
+    today = timezone.localdate()
+    tz = timezone.get_current_timezone()
+    statuses = [Sale.Status.PAID] * 95 + [Sale.Status.VOID] * 3 + [Sale.Status.DRAF] * 2
+    payments = [Sale.PaymentMethod.CASH] * 5 + [Sale.PaymentMethod.CARD] * 4 + [Sale.PaymentMethod.ONLINE]
+
+    n_sales = 0
+    n_items = 0
+    pending = []
+
+    def flush():
+        nonlocal n_items
+        sales = Sale.objects.bulk_create([s for s, _ in pending], batch_size=BATCH)
+        lines = []
+        for sale, (_, items) in zip(sales, pending):
+            for it in items:
+                it.sale_id = sale.id
+                lines.append(it)
+        SaleItem.objects.bulk_create(lines, batch_size=BATCH)
+        n_items += len(lines)
+        pending.clear()
+
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        trend = 0.85 + 0.3 * (1 - offset / days)
+        expected = sales_per_day * WEEKDAY_WEIGHTS[day.weekday()] * trend
+        for _ in range(max(0, int(rng.gauss(expected, expected * 0.1)))):
+            sold_at = timezone.make_aware(
+                timezone.datetime(day.year, day.month, day.day, _weighted_hour(rng), rng.randint(0, 59)), tz
+            )
+            picks = rng.choices(menu, weights=popularity, k=rng.randint(1, 4))
+            items = []
+            subtotal = Decimal("0.00")
+            for order, mi in enumerate(dict.fromkeys(picks)):
+                qty = rng.randint(1, 3)
+                line_total = mi.price * qty
+                subtotal += line_total
+                items.append(
+                    SaleItem(
+                        restaurant=restaurant,
+                        menu_item=mi,
+                        name=mi.name,
+                        qty=qty,
+                        unit_price=mi.price,
+                        line_total=line_total,
+                        sort_order=order,
+                    )
+                )
+            sale = Sale(
+                restaurant=restaurant,
+                created_by=owner,
+                status=rng.choice(statuses),
+                payment_method=rng.choice(payments),
+                subtotal=subtotal,
+                total=subtotal,
+                inventory_deducted=True,
+                sold_at=sold_at,
+            )
+            pending.append((sale, items))
+            n_sales += 1
+            if len(pending) >= BATCH:
+                flush()
+    if pending:
+        flush()
+
+    # auto_now_add ignores the value passed to bulk_create
+    Sale.objects.filter(restaurant=restaurant).update(created_at=F("sold_at"))
+
+    return {
+        "restaurant_id": restaurant.id,
+        "owner_id": owner.id,
+        "supplier_id": supplier.id,
+        "menu_items": len(menu),
+        "ingredients": len(inv),
+        "recipe_lines": len(recipe),
+        "sales": n_sales,
+        "sale_items": n_items,
+    }
+
+
+def generate_tenants(restaurants=1, prefix="bench", seed=0, **kwargs):
+    """Creates `restaurants` synthetic tenants; kwargs go to generate_restaurant()."""
+    taken = set(Restaurant.objects.filter(slug__startswith=f"{prefix}-").values_list("slug", flat=True))
+    out = []
+    index = 0
+    while len(out) < restaurants:
+        if f"{prefix}-{index}" not in taken:
+            out.append(generate_restaurant(index, prefix=prefix, seed=seed, **kwargs))
+        index += 1
+    return out
+
+
+def clear_tenants(prefix="bench"):
+    """
+    Deletes every synthetic tenant with its users, menu, stock and sales.
+    Several FKs are PROTECT, so children go first.
+    """
+    from inventory.models import StockMovement
+    from purchases.models import PurchaseInvoice
+
+    ids = list(Restaurant.objects.filter(slug__startswith=f"{prefix}-").values_list("id", flat=True))
+    if not ids:
+        return 0
+
+    deleted = 0
+    for qs in (
+        Sale.objects.filter(restaurant_id__in=ids),
+        PurchaseInvoice.objects.filter(restaurant_id__in=ids),
+        StockMovement.objects.filter(item__restaurant_id__in=ids),
+        RecipeLine.objects.filter(menu_item__restaurant_id__in=ids),
+        MenuItem.objects.filter(restaurant_id__in=ids),
+        Category.objects.filter(restaurant_id__in=ids),
+        InventoryItem.objects.filter(restaurant_id__in=ids),
+        Supplier.objects.filter(restaurant_id__in=ids),
+        Restaurant.objects.filter(id__in=ids),
+    ):
+        deleted += qs.delete()[0]
+    return deleted
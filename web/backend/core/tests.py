@@ -0,0 +1,579 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Restaurant, User
+from core.synthetic import generate_restaurant
+from menu.models import MenuItem
+from inventory.models import InventoryItem, StockMovement
+from sales.models import Sale, SaleItem
+from . import db_routing, events, partitioning, singleflight, views
+from .async_api import AsyncAPIView, json_response
+from .conditional import aconditional_get
+from .db_routing import REPLICA_ALIAS, ais_pinned, is_pinned, pin_primary, read_your_writes, use_replica
+from .models import TenantVersion
+from .renderers import FastJSONRenderer
+from .versioning import INVENTORY, MENU, bump, get_versions
+
+
+class VersionBumpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name="Versions", slug="versions")
+
+    def test_bumps_are_deferred_and_deduplicated(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            bump(self.restaurant.pk, MENU)
+            bump(self.restaurant.pk, MENU, INVENTORY)
+            self.assertEqual(get_versions(self.restaurant.pk, [MENU])[MENU][0], 0)
+        self.assertTrue(callbacks)
+        versions = get_versions(self.restaurant.pk, [MENU, INVENTORY])
+        self.assertEqual((versions[MENU][0], versions[INVENTORY][0]), (1, 1))
+
+    def test_restaurant_deleted_before_commit(self):
+        # the bump was queued for a restaurant the same transaction then deleted
+        with self.captureOnCommitCallbacks(execute=True):
+            bump(self.restaurant.pk, MENU)
+            Restaurant.objects.filter(pk=self.restaurant.pk).delete()
+        self.assertFalse(TenantVersion.objects.filter(restaurant_id=self.restaurant.pk).exists())
+        connection.check_constraints()
+
+
+class ConditionalGetTests(TestCase):
+    url = "/api/menu/items/"
+
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="etag", menu_items=3, ingredients=3, days=0, sales_per_day=0)
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.item = MenuItem.objects.filter(restaurant_id=ids["restaurant_id"]).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def test_repeated_get_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        again = self.get(first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+        self.assertFalse(again.content)
+
+    def test_write_changes_etag(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.price = Decimal("1.00")
+            self.item.save()
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_rolled_back_write_keeps_etag(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.item.price = Decimal("1.00")
+                self.item.save()
+                transaction.set_rollback(True)
+
+        self.assertEqual(self.get(etag).status_code, 304)
+
+
+class MenuVersionView(AsyncAPIView):
+    # same validators as the sync menu item list
+    @aconditional_get(MENU)
+    async def get(self, request):
+        return json_response({"user": request.user.pk})
+
+
+class AsyncAPIViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="async", menu_items=2, ingredients=2, days=0, sales_per_day=0)
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.item = MenuItem.objects.filter(restaurant_id=ids["restaurant_id"]).first()
+        cls.viewer = User.objects.create_user(
+            username="async-viewer", email="viewer@async.test", password="x",
+            role=User.Role.VIEWER, restaurant_id=ids["restaurant_id"],
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def get(self, user=None, token=None, **headers):
+        if user is not None:
+            token = str(AccessToken.for_user(user))
+        if token is not None:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        return await MenuVersionView.as_view()(RequestFactory().get("/", **headers))
+
+    async def test_authentication_and_permission(self):
+        self.assertEqual((await self.get()).status_code, 401)
+        self.assertEqual((await self.get(token="not-a-jwt")).status_code, 401)
+        self.assertEqual((await self.get(self.viewer)).status_code, 403)
+        response = await self.get(self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, {"user": self.owner.pk})
+
+    async def test_etag_matches_sync_view_and_answers_304(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        sync_etag = (await sync_to_async(client.get)("/api/menu/items/"))["ETag"]
+
+        response = await self.get(self.owner)
+        self.assertEqual(response["ETag"], sync_etag)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        again = await self.get(self.owner, HTTP_IF_NONE_MATCH=sync_etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertFalse(again.content)
+
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.item.price = Decimal("1.00")
+                self.item.save()
+
+        await sync_to_async(write)()
+        self.assertEqual((await self.get(self.owner, HTTP_IF_NONE_MATCH=sync_etag)).status_code, 200)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_renderer(self):
+        data = {"price": Decimal("12.50"), "name": "Kottu \u2028", "tags": [1, 2.5, None], "nested": {"ok": True}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_floats_raise_like_drf(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            data = {"items": [{"mae": value, "note": None}]}
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(data)
+
+
+@mock.patch.object(db_routing, "replica_configured", lambda: True)
+class ReadYourWritesTests(SimpleTestCase):
+    user = User(pk=9001)
+
+    def setUp(self):
+        cache.clear()
+
+    @use_replica()
+    def service_read(self):
+        # a service's replica read that is not told who asked
+        return db_routing._read_alias.get()
+
+    def test_replica_unless_pinned(self):
+        with read_your_writes(is_pinned(self.user)):
+            self.assertEqual(self.service_read(), REPLICA_ALIAS)
+
+        pin_primary(self.user)
+        with read_your_writes(is_pinned(self.user)):
+            self.assertEqual(self.service_read(), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.service_read(), REPLICA_ALIAS)
+
+    async def test_pin_reaches_async_services(self):
+        await sync_to_async(pin_primary)(self.user)
+        with read_your_writes(await ais_pinned(self.user)):
+            self.assertEqual(await sync_to_async(self.service_read)(), DEFAULT_DB_ALIAS)
+            with use_replica():
+                self.assertEqual(db_routing._read_alias.get(), DEFAULT_DB_ALIAS)
+
+
+@skipUnless(connection.vendor == "postgresql", "table partitioning needs PostgreSQL")
+class PartitioningTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # 70 days reach back past the start of the previous month
+        ids = generate_restaurant(0, prefix="part", menu_items=3, ingredients=3, days=70, sales_per_day=3)
+        cls.rid, cls.owner_id = ids["restaurant_id"], ids["owner_id"]
+
+    def partition(self, months):
+        this_month = partitioning.month_start(timezone.localdate())
+        return partitioning.partition_name("sales_sale", partitioning.add_months(this_month, months))
+
+    def definitions(self, table):
+        with connection.cursor() as cursor:
+            indexes, fks, _unique = partitioning._definitions(cursor, table)
+        # a partitioned parent's indexes read "ON ONLY <table>"
+        return sorted(sql.replace(" ON ONLY ", " ON ") for sql in indexes), sorted(fks)
+
+    def test_convert_maintain_status(self):
+        counts = (Sale.objects.count(), SaleItem.objects.count())
+        self.assertFalse(partitioning.status("sales.Sale")["partitioned"])
+        before = self.definitions("sales_sale")
+
+        report = partitioning.convert("sales.Sale", months_ahead=1)
+        self.assertTrue(report["converted"])
+        self.assertTrue(any(fk.startswith("sales_saleitem.") for fk in report["dropped_fks"]))
+        self.assertFalse(partitioning.convert("sales.Sale")["converted"])
+
+        names = partitioning.status("sales.Sale")["partitions"]
+        self.assertIn("sales_sale_default", names)
+        self.assertIn(self.partition(-2), names)
+        self.assertIn(self.partition(1), names)
+        self.assertEqual((Sale.objects.count(), SaleItem.objects.count()), counts)
+
+        # the same indexes (Meta.indexes included) and outgoing FKs, under the same names
+        self.assertEqual(self.definitions("sales_sale"), before)
+        self.assertTrue(any("sale_paid_rest_sold_idx" in sql for sql in before[0]))
+
+        # ids continue after the copied rows
+        last = Sale.objects.order_by("-pk").values_list("pk", flat=True).first()
+        sale = Sale.objects.create(restaurant_id=self.rid, created_by_id=self.owner_id, status="PAID")
+        self.assertGreater(sale.pk, last)
+        self.assertEqual(Sale.objects.get(pk=sale.pk).restaurant_id, self.rid)
+
+        report = partitioning.maintain("sales.Sale", months_ahead=3)
+        self.assertEqual(report["created"], [self.partition(2), self.partition(3)])
+
+        report = partitioning.maintain("sales.Sale", months_ahead=3, retain_months=1, drop=True)
+        self.assertIn(self.partition(-2), report["detached"])
+        self.assertNotIn(self.partition(-1), report["detached"])
+        names = partitioning.status("sales.Sale")["partitions"]
+        self.assertNotIn(self.partition(-2), names)
+        # the dropped partitions' sale items went with them
+        self.assertFalse(SaleItem.objects.exclude(sale_id__in=Sale.objects.values("id")).exists())
+
+    def test_convert_stock_movements(self):
+        item = InventoryItem.objects.filter(restaurant_id=self.rid).first()
+        StockMovement.objects.create(
+            item=item, restaurant_id=self.rid, movement_type="IN", quantity=Decimal("2"), created_by_id=self.owner_id
+        )
+        count = StockMovement.objects.count()
+
+        self.assertTrue(partitioning.convert("inventory.StockMovement", months_ahead=0)["converted"])
+        self.assertTrue(partitioning.status("inventory.StockMovement")["partitioned"])
+        self.assertEqual(StockMovement.objects.count(), count)
+        StockMovement.objects.create(
+            item=item, restaurant_id=self.rid, movement_type="OUT", quantity=Decimal("1"), created_by_id=self.owner_id
+        )
+        self.assertEqual(StockMovement.objects.count(), count + 1)
+
+
+class EventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name="Events", slug="events")
+        cls.owner = User.objects.create_user(
+            username="ev-owner", email="owner@events.test", password="x", role=User.Role.OWNER, restaurant=cls.restaurant
+        )
+        cls.viewer = User.objects.create_user(
+            username="ev-viewer", email="viewer@events.test", password="x", role=User.Role.VIEWER, restaurant=cls.restaurant
+        )
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(events, "_backend", events.LocalBackend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def message(self, restaurant_id, n=0):
+        return {"restaurant": restaurant_id, "type": events.SALE_POSTED, "data": {"id": n}}
+
+    async def drain(self, sub):
+        # deliver() hands messages over with call_soon_threadsafe
+        await asyncio.sleep(0)
+        got = []
+        while True:
+            try:
+                got.append(await sub.get(0.01))
+            except asyncio.TimeoutError:
+                return got
+
+    def test_published_on_commit_only(self):
+        with mock.patch.object(events.LocalBackend, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                events.publish(self.restaurant.pk, events.SALE_POSTED, {"id": 1})
+                publish.assert_not_called()
+            publish.assert_called_once_with(self.message(self.restaurant.pk, 1))
+
+            publish.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        events.publish(self.restaurant.pk, events.SALE_POSTED, {"id": 2})
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+            publish.assert_not_called()
+
+    async def test_streams_only_see_their_restaurant(self):
+        mine, other, superuser = events.subscribe(1), events.subscribe(2), events.subscribe(None)
+        try:
+            events.deliver(self.message(1, 1))
+            events.deliver(self.message(2, 2))
+            self.assertEqual([m["data"]["id"] for m in await self.drain(mine)], [1])
+            self.assertEqual([m["data"]["id"] for m in await self.drain(other)], [2])
+            self.assertEqual([m["data"]["id"] for m in await self.drain(superuser)], [1, 2])
+        finally:
+            for sub in (mine, other, superuser):
+                events.unsubscribe(sub)
+        self.assertEqual(events.subscriber_count(), 0)
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    async def test_overflow_drops_oldest_and_resyncs(self):
+        sub = events.subscribe(1)
+        try:
+            for n in range(1, 5):
+                events.deliver(self.message(1, n))
+            got = await self.drain(sub)
+        finally:
+            events.unsubscribe(sub)
+        self.assertEqual(got[0], {"type": events.RESYNC, "data": {}})
+        self.assertEqual([m["data"]["id"] for m in got[1:]], [3, 4])
+
+    def test_format_sse(self):
+        self.assertEqual(
+            events.format_sse({"restaurant": 1, "type": events.STOCK_LOW, "data": {"stock": Decimal("1.50")}}),
+            'event: stock.low\ndata: {"stock": "1.50"}\n\n',
+        )
+
+    async def test_event_lines(self):
+        lines = views._event_lines(1)
+        try:
+            self.assertEqual(await anext(lines), f"retry: {views.RETRY_MS}\n\n")
+            events.deliver(self.message(1, 7))
+            self.assertEqual(await anext(lines), 'event: sale.posted\ndata: {"id": 7}\n\n')
+            with mock.patch.object(views, "KEEPALIVE_SECONDS", 0.01):
+                self.assertEqual(await anext(lines), ": keepalive\n\n")
+        finally:
+            await lines.aclose()
+        self.assertEqual(events.subscriber_count(), 0)
+
+    def test_token_auth(self):
+        url = "/api/events/"
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.get(url, {"token": "not-a-jwt"}).status_code, 401)
+        self.assertEqual(self.client.get(url, {"token": str(AccessToken.for_user(self.viewer))}).status_code, 403)
+
+        r = self.client.get(url, {"token": str(AccessToken.for_user(self.owner))})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Type"], "text/event-stream")
+        self.assertEqual(r["Cache-Control"], "no-cache")
+
+
+class SingleflightTests(SimpleTestCase):
+    N = 6
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def blocked(self, result="r"):
+        # runs until the test releases it, so every caller arrives while it is in flight
+        self.calls += 1
+        self.release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def run_concurrently(self, fn):
+        outcomes = [None] * self.N
+
+        def call(i):
+            try:
+                outcomes[i] = singleflight.do("k", fn)
+            except Exception as e:
+                outcomes[i] = e
+
+        with mock.patch.object(singleflight, "_claim", wraps=singleflight._claim) as claim:
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(self.N)]
+            for t in threads:
+                t.start()
+            while claim.call_count < self.N:
+                time.sleep(0.001)
+            self.release.set()
+            for t in threads:
+                t.join(5)
+        return outcomes
+
+    def test_concurrent_calls_compute_once(self):
+        self.assertEqual(self.run_concurrently(self.blocked), ["r"] * self.N)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(singleflight._inflight, {})
+        # nothing is cached: a later call computes again
+        self.assertEqual(singleflight.do("k", self.blocked), "r")
+        self.assertEqual(self.calls, 2)
+
+    def test_exception_reaches_every_waiter(self):
+        error = ValueError("boom")
+        outcomes = self.run_concurrently(lambda: self.blocked(error))
+        self.assertEqual(outcomes, [error] * self.N)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(singleflight._inflight, {})
+
+    @override_settings(SINGLEFLIGHT_WAIT_SECONDS=0.05)
+    def test_follower_stops_waiting_for_a_stuck_leader(self):
+        leader = threading.Thread(target=singleflight.do, args=("k", self.blocked))
+        leader.start()
+        try:
+            while "k" not in singleflight._inflight:
+                time.sleep(0.001)
+            self.assertEqual(singleflight.do("k", lambda: "own"), "own")
+        finally:
+            self.release.set()
+            leader.join(5)
+
+    async def test_async_calls_compute_once(self):
+        gate = asyncio.Event()
+
+        async def fn():
+            self.calls += 1
+            await gate.wait()
+            return "r"
+
+        tasks = [asyncio.create_task(singleflight.ado("k", fn)) for _ in range(self.N)]
+        await asyncio.sleep(0)
+        gate.set()
+        self.assertEqual(await asyncio.gather(*tasks), ["r"] * self.N)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(singleflight._inflight, {})
+
+    async def test_async_exception_reaches_every_waiter(self):
+        gate = asyncio.Event()
+
+        async def fn():
+            await gate.wait()
+            raise ValueError("boom")
+
+        tasks = [asyncio.create_task(singleflight.ado("k", fn)) for _ in range(self.N)]
+        await asyncio.sleep(0)
+        gate.set()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(e, ValueError) for e in outcomes))
+        self.assertEqual(singleflight._inflight, {})
+
+    async def test_cancelled_leader_leaves_followers_their_result(self):
+        gate = asyncio.Event()
+
+        async def fn():
+            self.calls += 1
+            await gate.wait()
+            return "r"
+
+        leader = asyncio.create_task(singleflight.ado("k", fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(singleflight.ado("k", fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        self.assertEqual(await asyncio.gather(*followers), ["r", "r"])
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+        self.assertEqual(self.calls, 1)
+        await asyncio.sleep(0)
+        self.assertEqual(singleflight._inflight, {})
+
+    def test_coalesce_keys_on_bound_arguments(self):
+        @singleflight.coalesce("t")
+        def f(a, b=2):
+            return a + b
+
+        @singleflight.coalesce("t")
+        async def af(a, b=2):
+            return a + b
+
+        with mock.patch.object(singleflight, "do", return_value=0) as do:
+            f(1)
+            f(1, b=2)
+            f(a=1, b=3)
+        keys = [c.args[0] for c in do.call_args_list]
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+
+        with mock.patch.object(singleflight, "ado", new=mock.AsyncMock(return_value=0)) as ado:
+            asyncio.run(af(b=2, a=1))
+        self.assertEqual(ado.call_args.args[0], keys[0])
+
+
+@override_settings(SINGLEFLIGHT_ADVISORY=True, SINGLEFLIGHT_WAIT_SECONDS=0.1)
+class SingleflightAdvisoryTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # the database side is mocked per test; this exercises the polling and the result hand-off
+        for patcher in (
+            mock.patch.object(singleflight, "_advisory_enabled", return_value=True),
+            mock.patch.object(singleflight, "LOCK_POLL_SECONDS", 0.01),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_gives_up_on_a_held_lock_after_the_deadline(self):
+        with mock.patch.object(singleflight, "_try_lock", return_value=False), \
+                mock.patch.object(singleflight, "_store_and_unlock") as unlock:
+            t0 = time.monotonic()
+            self.assertEqual(singleflight.do("k", lambda: "own"), "own")
+            self.assertEqual(asyncio.run(singleflight.ado("k", self.own)), "own")
+        self.assertGreaterEqual(time.monotonic() - t0, 0.2)
+        unlock.assert_not_called()
+
+    async def own(self):
+        return "own"
+
+    def test_uses_result_left_by_the_previous_holder(self):
+        attempts = iter([False, True])
+
+        def try_lock(key):
+            locked = next(attempts)
+            if not locked:
+                # the holder in another process finishes while we wait
+                cache.set(singleflight._cache_key(key), (time.time(), "theirs"))
+            return locked
+
+        fn = mock.Mock(return_value="own")
+        with mock.patch.object(singleflight, "_try_lock", side_effect=try_lock), \
+                mock.patch.object(singleflight, "_store_and_unlock") as unlock:
+            self.assertEqual(singleflight.do("k", fn), "theirs")
+        fn.assert_not_called()
+        unlock.assert_called_once_with("k", "theirs", False)
+
+    def test_ignores_results_older_than_the_wait(self):
+        cache.set(singleflight._cache_key("k"), (time.time() - 1, "stale"))
+        with mock.patch.object(singleflight, "_try_lock", return_value=True), \
+                mock.patch.object(singleflight, "_store_and_unlock") as unlock:
+            self.assertEqual(singleflight.do("k", lambda: "fresh"), "fresh")
+        unlock.assert_called_once_with("k", "fresh", True)
+
+
+@skipUnless(connection.vendor == "postgresql", "advisory locks are PostgreSQL-only")
+@override_settings(SINGLEFLIGHT_ADVISORY=True, SINGLEFLIGHT_WAIT_SECONDS=0.1)
+class SingleflightPostgresTests(TestCase):
+    def test_lock_held_by_another_session(self):
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [singleflight.lock_id("k")])
+        self.assertEqual(singleflight.do("k", lambda: "own"), "own")
+
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [singleflight.lock_id("k")])
+        self.assertEqual(singleflight.do("k", lambda: "leader"), "leader")
+        # released again, and the result left for waiters in other processes
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [singleflight.lock_id("k")])
+            self.assertTrue(cursor.fetchone()[0])
+        self.assertEqual(cache.get(singleflight._cache_key("k"))[1], "leader")
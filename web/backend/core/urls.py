@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import RecentRequestMetricsView
+
+urlpatterns = [
+    path("recent/", RecentRequestMetricsView.as_view()),
+]
@@ -0,0 +1,135 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from . import events
+
+MENU = "menu"
+INVENTORY = "inventory"
+SALES = "sales"
+
+# model label -> scopes bumped when a row is saved/deleted
+WATCHED_MODELS = {
+    "menu.Category": (MENU,),
+    "menu.MenuItem": (MENU,),
+    "menu.RecipeLine": (MENU,),
+    "inventory.InventoryItem": (INVENTORY,),
+    "sales.Sale": (SALES,),
+}
+
+
+def get_versions(restaurant_id, scopes):
+    """
+    Returns {scope: (version, updated_at)}; scopes never written are (0, None).
+    One indexed query.
+    """
+    from .models import TenantVersion
+
+    out = {s: (0, None) for s in scopes}
+    rows = TenantVersion.objects.filter(restaurant_id=restaurant_id, scope__in=scopes).values_list(
+        "scope", "version", "updated_at"
+    )
+    for scope, version, updated_at in rows:
+        out[scope] = (version, updated_at)
+    return out
+
+
+def get_versions_many(restaurant_ids, scopes):
+    """get_versions() for several restaurants in one query: {restaurant_id: {scope: (version, updated_at)}}."""
+    from .models import TenantVersion
+
+    out = {rid: {s: (0, None) for s in scopes} for rid in restaurant_ids}
+    rows = TenantVersion.objects.filter(restaurant_id__in=restaurant_ids, scope__in=scopes).values_list(
+        "restaurant_id", "scope", "version", "updated_at"
+    )
+    for restaurant_id, scope, version, updated_at in rows:
+        out[restaurant_id][scope] = (version, updated_at)
+    return out
+
+
+def bump(restaurant_id, *scopes):
+    """
+    Increments the restaurant's counters for `scopes`.
+    Inside a transaction the bump is deferred to on_commit and de-duplicated,
+    so a sale touching 10 ingredients costs one UPDATE per scope, after commit.
+    """
+    if not restaurant_id or not scopes:
+        return
+
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        _apply({(restaurant_id, s) for s in scopes})
+        return
+
+    pending = conn.__dict__.setdefault("_tenant_version_pending", set())
+    pending.update((restaurant_id, s) for s in scopes)
+    # one callback per call; the first one to run flushes everything pending
+    transaction.on_commit(lambda: _flush(conn))
+
+
+def _flush(conn):
+    pending = conn.__dict__.get("_tenant_version_pending")
+    if not pending:
+        return
+    keys = set(pending)
+    pending.clear()
+    _apply(keys)
+
+
+def _apply(keys):
+    from .models import TenantVersion
+
+    by_restaurant = {}
+    for restaurant_id, scope in keys:
+        by_restaurant.setdefault(restaurant_id, set()).add(scope)
+
+    now = timezone.now()
+    for restaurant_id, scopes in by_restaurant.items():
+        if INVENTORY in scopes:
+            events.publish(restaurant_id, events.STOCK_CHANGED)
+        qs = TenantVersion.objects.filter(restaurant_id=restaurant_id, scope__in=scopes)
+        if qs.update(version=F("version") + 1, updated_at=now) == len(scopes):
+            continue
+        _create_bumped(restaurant_id, scopes - set(qs.values_list("scope", flat=True)), now)
+
+
+def _create_bumped(restaurant_id, missing, now):
+    """First write for some scopes: create their rows, then bump those."""
+    from accounts.models import Restaurant
+    from .models import TenantVersion
+
+    # the transaction that queued the bump may have deleted the restaurant
+    if not Restaurant.objects.filter(pk=restaurant_id).exists():
+        return
+    TenantVersion.objects.bulk_create(
+        [TenantVersion(restaurant_id=restaurant_id, scope=s, version=0) for s in missing],
+        ignore_conflicts=True,
+    )
+    TenantVersion.objects.filter(restaurant_id=restaurant_id, scope__in=missing).update(
+        version=F("version") + 1, updated_at=now
+    )
+
+
+def _restaurant_id_of(instance):
+    restaurant_id = getattr(instance, "restaurant_id", None)
+    if restaurant_id is None and getattr(instance, "menu_item_id", None):
+        # RecipeLine has no restaurant column; go through its menu item
+        try:
+            restaurant_id = instance.menu_item.restaurant_id
+        except ObjectDoesNotExist:
+            return None
+    return restaurant_id
+
+
+def _on_change(sender, instance, **kwargs):
+    scopes = WATCHED_MODELS.get(sender._meta.label)
+    if scopes:
+        bump(_restaurant_id_of(instance), *scopes)
+
+
+def connect_signals():
+    for label in WATCHED_MODELS:
+        post_save.connect(_on_change, sender=label, dispatch_uid=f"tenant_version_save:{label}")
+        post_delete.connect(_on_change, sender=label, dispatch_uid=f"tenant_version_delete:{label}")
@@ -0,0 +1,97 @@
+import asyncio
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import authenticate_request
+from accounts.permissions import IsSuperuser
+from . import events, instrumentation
+
+# comment line every KEEPALIVE seconds so proxies keep an idle stream open
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+
+
+class RecentRequestMetricsView(APIView):
+    """
+    GET /api/perf/recent/?limit=100&label=SaleViewSet.summary
+    GET /api/perf/recent/?summary=1   -> per view/action aggregates
+    In-process ring buffer, so it shows this worker's requests only.
+    """
+    permission_classes = [IsSuperuser]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", "100"))
+        except ValueError:
+            limit = 100
+        limit = max(1, min(limit, 5000))
+
+        rows = instrumentation.recent(limit=limit, label=request.query_params.get("label"))
+        if request.query_params.get("summary") != "1":
+            return Response(rows)
+
+        by_label = defaultdict(list)
+        for r in rows:
+            by_label[r["label"]].append(r)
+
+        data = []
+        for label, items in by_label.items():
+            totals = sorted(r["total_ms"] for r in items)
+            data.append(
+                {
+                    "label": label,
+                    "count": len(items),
+                    "p50_ms": totals[len(totals) // 2],
+                    "p95_ms": totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+                    "avg_queries": round(sum(r["db_queries"] for r in items) / len(items), 1),
+                    "avg_db_ms": round(sum(r["db_ms"] for r in items) / len(items), 2),
+                    "n_plus_one_hits": sum(1 for r in items if r["n_plus_one"]),
+                }
+            )
+        data.sort(key=lambda x: x["p95_ms"], reverse=True)
+        return Response(data)
+
+
+async def _event_lines(restaurant_id):
+    sub = events.subscribe(restaurant_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await sub.get(KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield events.format_sse(message)
+    finally:
+        # also reached when the client disconnects (the ASGI handler cancels us)
+        events.unsubscribe(sub)
+
+
+async def event_stream(request):
+    """
+    GET /api/events/?token=<access token>   (text/event-stream)
+    Live sale.posted / stock.changed / stock.low / forecast.refreshed events
+    for the user's restaurant; `resync` means events were dropped and the
+    client should refetch. Needs an ASGI server: under WSGI every open
+    stream holds a worker thread.
+    """
+    user = await sync_to_async(authenticate_request)(request, query_token=True)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    if not user.is_staff:
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+    restaurant_id = None if user.is_superuser else getattr(user, "restaurant_id", None)
+    if not user.is_superuser and not restaurant_id:
+        return JsonResponse({"detail": "User has no restaurant assigned."}, status=400)
+
+    return StreamingHttpResponse(
+        _event_lines(restaurant_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
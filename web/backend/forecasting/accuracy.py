@@ -0,0 +1,179 @@
+"""
+Forecast accuracy from stored predictions.
+
+record() keeps the first FORECAST_TRACK_DAYS days of every computed
+forecast (one row per menu item, day and lead time). score() runs after the
+day is over: it fills in the actual PAID quantity of every unscored
+prediction and adds the errors to the per-item ForecastAccuracy totals, so
+each prediction is scored once and the accuracy endpoint only reads sums.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import ForecastAccuracy, ForecastPrediction
+
+
+def track_days():
+    return getattr(settings, "FORECAST_TRACK_DAYS", 7)
+
+
+def record(restaurant_id, result):
+    """Store the first track_days() days of `result` (a ForecastResult); a later forecast the same day replaces them."""
+    if not restaurant_id:
+        return 0
+
+    made_on = result.start_date - timedelta(days=1)
+    rows = [
+        ForecastPrediction(
+            restaurant_id=restaurant_id,
+            menu_item_id=mid,
+            date=day,
+            lead_days=(day - made_on).days,
+            predicted=yhat,
+        )
+        for mid in result.item_ids
+        for day, yhat in zip(result.dates(track_days()), result.daily[mid])
+    ]
+    ForecastPrediction.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["menu_item", "date", "lead_days"],
+        update_fields=["predicted", "updated_at"],
+    )
+    return len(rows)
+
+
+def _actuals(restaurant_ids, start, end):
+    """{(restaurant_id, menu_item_id, date): PAID qty} for [start, end], from the forecast's own sales query."""
+    from .services import _qty_rows
+
+    _start, today, qs = _qty_rows((timezone.localdate() - start).days + 1, None, restaurant_ids=restaurant_ids)
+    return {
+        (r["sale__restaurant_id"], r["menu_item_id"], r["day"]): int(r["qty"] or 0)
+        for r in qs.filter(day__lte=end)
+    }
+
+
+def score(until=None, restaurant_id=None):
+    """
+    Score every prediction for a day up to `until` (default: yesterday)
+    that has no actual yet. Returns the number of predictions scored.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    pending = ForecastPrediction.objects.filter(actual__isnull=True, date__lte=until)
+    if restaurant_id is not None:
+        pending = pending.filter(restaurant_id=restaurant_id)
+
+    with transaction.atomic():
+        rows = list(pending.select_for_update().order_by())
+        if not rows:
+            return 0
+
+        actuals = _actuals(sorted({p.restaurant_id for p in rows}), min(p.date for p in rows), until)
+        totals = {
+            (a.menu_item_id, a.lead_days): a
+            for a in ForecastAccuracy.objects.select_for_update().filter(
+                menu_item_id__in={p.menu_item_id for p in rows}
+            )
+        }
+        created = []
+
+        for p in rows:
+            p.actual = actuals.get((p.restaurant_id, p.menu_item_id, p.date), 0)
+            error = p.predicted - p.actual
+
+            acc = totals.get((p.menu_item_id, p.lead_days))
+            if acc is None:
+                acc = totals[(p.menu_item_id, p.lead_days)] = ForecastAccuracy(
+                    restaurant_id=p.restaurant_id, menu_item_id=p.menu_item_id, lead_days=p.lead_days
+                )
+                created.append(acc)
+            acc.days += 1
+            acc.abs_error_sum += abs(error)
+            acc.error_sum += error
+            acc.actual_sum += p.actual
+            if p.actual:
+                acc.ape_sum += abs(error) / p.actual
+                acc.ape_days += 1
+            acc.last_date = max(acc.last_date or p.date, p.date)
+
+        ForecastPrediction.objects.bulk_update(rows, ["actual"], batch_size=1000)
+
+        now = timezone.now()
+        changed = [a for a in totals.values() if a.pk]
+        for acc in changed:
+            acc.updated_at = now
+        ForecastAccuracy.objects.bulk_update(changed, _TOTAL_FIELDS + ["updated_at"], batch_size=1000)
+        ForecastAccuracy.objects.bulk_create(created, batch_size=1000)
+    return len(rows)
+
+
+_TOTAL_FIELDS = ["days", "abs_error_sum", "error_sum", "actual_sum", "ape_sum", "ape_days", "last_date"]
+_TOTALS = (Sum("days"), Sum("abs_error_sum"), Sum("error_sum"), Sum("ape_sum"), Sum("ape_days"))
+
+
+def _metrics(days, abs_error, error, ape, ape_days):
+    return {
+        "days": days,
+        "mae": round(abs_error / days, 3) if days else None,
+        "mape": round(100.0 * ape / ape_days, 2) if ape_days else None,
+        "bias": round(error / days, 3) if days else None,
+    }
+
+
+def accuracy_report(restaurant_id=None, lead_days=1, top_n=50):
+    """
+    Precomputed MAE / MAPE (%) / bias per menu item for forecasts made
+    `lead_days` ahead, worst MAE first, plus the restaurant-wide figures.
+    """
+    qs = ForecastAccuracy.objects.filter(lead_days=lead_days)
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    return _report(
+        list(qs.select_related("menu_item")),
+        qs.aggregate(*_TOTALS),
+        lead_days,
+        top_n,
+    )
+
+
+async def aaccuracy_report(restaurant_id=None, lead_days=1, top_n=50):
+    qs = ForecastAccuracy.objects.filter(lead_days=lead_days)
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    return _report(
+        [a async for a in qs.select_related("menu_item")],
+        await qs.aaggregate(*_TOTALS),
+        lead_days,
+        top_n,
+    )
+
+
+def _report(rows, sums, lead_days, top_n):
+    items = [
+        {
+            "menu_item_id": a.menu_item_id,
+            "menu_item_name": a.menu_item.name,
+            "last_date": str(a.last_date) if a.last_date else None,
+            **_metrics(a.days, a.abs_error_sum, a.error_sum, a.ape_sum, a.ape_days),
+        }
+        for a in rows
+    ]
+    items.sort(key=lambda x: x["mae"] or 0, reverse=True)
+
+    return {
+        "lead_days": lead_days,
+        "overall": _metrics(
+            sums["days__sum"] or 0,
+            sums["abs_error_sum__sum"] or 0,
+            sums["error_sum__sum"] or 0,
+            sums["ape_sum__sum"] or 0,
+            sums["ape_days__sum"] or 0,
+        ),
+        "items": items[:top_n],
+    }
@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import ForecastAccuracy, ForecastPrediction
 
-# Register your models here.
+
+@admin.register(ForecastPrediction)
+class ForecastPredictionAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "lead_days", "menu_item", "predicted", "actual", "restaurant")
+    list_filter = ("date", "lead_days")
+    search_fields = ("menu_item__name",)
+
+
+@admin.register(ForecastAccuracy)
+class ForecastAccuracyAdmin(admin.ModelAdmin):
+    list_display = ("id", "menu_item", "lead_days", "days", "mae", "mape", "bias", "last_date", "restaurant")
+    list_filter = ("lead_days",)
+    search_fields = ("menu_item__name",)
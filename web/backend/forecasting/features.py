@@ -0,0 +1,98 @@
+"""
+Model features computed on dense (series x day) arrays, so one NumPy pass
+builds the matrix for every menu item (and restaurant) at once instead of
+one dict lookup per feature per row.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ["day_of_week", "month", "is_weekend", "lag_1", "lag_7", "rolling_mean_7"]
+
+# days of history a feature row looks back
+WINDOW = 7
+
+
+def dense_history(qty_map, keys, start, days):
+    """(len(keys), days) float array of qty_map[key][date] for start .. start + days - 1, 0 where missing."""
+    out = np.zeros((len(keys), days))
+    for row, key in enumerate(keys):
+        for day, qty in qty_map.get(key, {}).items():
+            col = (day - start).days
+            if 0 <= col < days:
+                out[row, col] = qty
+    return out
+
+
+def day_features(day, history, t):
+    """
+    Feature frame for predicting column `t` (= `day`) of `history` from the
+    WINDOW columns before it, which must exist (t >= WINDOW).
+    """
+    window = history[:, t - WINDOW:t]
+    dow = day.weekday()
+    X = np.empty((history.shape[0], len(FEATURES)))
+    X[:, 0] = dow
+    X[:, 1] = day.month
+    X[:, 2] = 1 if dow >= 5 else 0
+    X[:, 3] = window[:, -1]
+    X[:, 4] = window[:, 0]
+    X[:, 5] = window.sum(axis=1) / 7.0
+    return pd.DataFrame(X, columns=FEATURES)
+
+
+def forecast_recursive(model, history, first_day, horizon_days):
+    """
+    Rolls `history` (the WINDOW days before `first_day`) forward
+    `horizon_days`, feeding each day's rounded prediction into the next
+    day's lags. One predict() call per day for every row together.
+    Returns a (rows, horizon_days) int array.
+    """
+    rows = history.shape[0]
+    H = np.zeros((rows, WINDOW + horizon_days))
+    H[:, :WINDOW] = history[:, -WINDOW:]
+    if rows:
+        for i in range(horizon_days):
+            t = WINDOW + i
+            yhat = model.predict(day_features(first_day + timedelta(days=i), H, t))
+            H[:, t] = np.maximum(0, np.rint(np.asarray(yhat, dtype=float)))
+    return H[:, WINDOW:].astype(int)
+
+
+def training_rows(history, start, first=None, covered=None):
+    """
+    (X, y, dates) for every day of a dense history that has WINDOW days
+    before it, built with whole-array operations: the same features
+    day_features() gives the model at inference time. `first[row]` skips a
+    series' days before it started selling; with a boolean `covered` (same
+    shape as history) a day is kept only if it and its WINDOW days are covered.
+    """
+    rows, days = history.shape
+    t = np.arange(WINDOW, days)
+    if not rows or not len(t):
+        return np.empty((0, len(FEATURES))), np.empty(0), np.empty(0, dtype="datetime64[D]")
+
+    dates = np.datetime64(start, "D") + t
+    epoch_days = dates.astype("int64")
+    dow = (epoch_days + 3) % 7  # 1970-01-01 was a Thursday
+    month = dates.astype("datetime64[M]").astype("int64") % 12 + 1
+
+    cum = np.zeros((rows, days + 1))
+    np.cumsum(history, axis=1, out=cum[:, 1:])
+
+    X = np.empty((rows, len(t), len(FEATURES)))
+    X[:, :, 0] = dow
+    X[:, :, 1] = month
+    X[:, :, 2] = dow >= 5
+    X[:, :, 3] = history[:, t - 1]
+    X[:, :, 4] = history[:, t - WINDOW]
+    X[:, :, 5] = (cum[:, t] - cum[:, t - WINDOW]) / 7.0
+    y = history[:, t]
+
+    keep = np.ones((rows, len(t)), dtype=bool) if first is None else t[None, :] >= np.asarray(first)[:, None]
+    if covered is not None:
+        ccum = np.zeros((rows, days + 1), dtype=np.int64)
+        np.cumsum(covered, axis=1, out=ccum[:, 1:])
+        keep &= ccum[:, t + 1] - ccum[:, t - WINDOW] == WINDOW + 1
+    return X[keep], y[keep], np.broadcast_to(dates, (rows, len(t)))[keep]
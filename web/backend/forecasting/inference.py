@@ -0,0 +1,63 @@
+"""
+Bounded pool for forecast inference, shared by the async forecasting views.
+
+At most FORECAST_WORKERS computations run at once per process; a request
+that cannot get a slot within FORECAST_QUEUE_TIMEOUT seconds fails with
+ForecastBusy (503) instead of piling up behind the others. Threads are
+enough here: XGBoost releases the GIL while predicting and the batched
+feature frames are small.
+
+The slots are one process-wide semaphore, not an asyncio one: under WSGI
+(runserver, gunicorn) every request runs the async view in its own event
+loop, so a per-loop limit would never be reached.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class ForecastBusy(Exception):
+    pass
+
+
+# waiting requests re-try a slot this often (seconds)
+POLL_SECONDS = 0.02
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def workers():
+    return getattr(settings, "FORECAST_WORKERS", 2)
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers(), thread_name_prefix="forecast")
+            _slots = threading.BoundedSemaphore(workers())
+    return _executor, _slots
+
+
+async def run(fn, *args):
+    """Run the CPU-only `fn(*args)` on the pool; raises ForecastBusy when no slot frees up in time."""
+    pool, slots = _pool()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, "FORECAST_QUEUE_TIMEOUT", 5.0)
+    while not slots.acquire(blocking=False):
+        if loop.time() >= deadline:
+            raise ForecastBusy("Forecasting is busy, retry shortly.")
+        await asyncio.sleep(POLL_SECONDS)
+
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # freed when the computation ends, even if the waiting request was cancelled first
+    future.add_done_callback(lambda _f: slots.release())
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from forecasting.accuracy import score
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in actual sales for stored forecast predictions and add their errors to the "
+        "per-item accuracy totals behind /api/forecasting/accuracy/. Run nightly; every "
+        "prediction is scored once, so re-running is cheap."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Last day to score, YYYY-MM-DD (default: yesterday)")
+        parser.add_argument("--restaurant", type=int, help="Only this restaurant id")
+
+    def handle(self, *args, **opts):
+        until = None
+        if opts["date"]:
+            until = parse_date(opts["date"])
+            if until is None:
+                raise CommandError(f"Invalid --date '{opts['date']}'")
+
+        scored = score(until=until, restaurant_id=opts["restaurant"])
+        self.stdout.write(f"{scored} predictions scored")
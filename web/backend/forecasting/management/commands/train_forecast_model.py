@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Train the demand model from the daily sales rollup (reports rollup, see rollup_cogs), "
+        "early-stop on the --stopping-days before the last --holdout-days, validate on the holdout and "
+        "write a versioned artifact next to the current model. It is activated (running servers switch "
+        "to it on their next forecast) only if it beats the lag_7 baseline and the served model, or with --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restaurant", type=int, help="Only this restaurant's history")
+        parser.add_argument("--holdout-days", type=int, default=28)
+        parser.add_argument("--stopping-days", type=int, default=14, help="Days before the holdout used for early stopping")
+        parser.add_argument("--nthread", type=int, default=0, help="XGBoost threads (default: all cores)")
+        parser.add_argument("--rounds", type=int, default=500, help="Maximum boosting rounds")
+        parser.add_argument("--early-stopping", type=int, default=30)
+        parser.add_argument("--max-depth", type=int, default=6)
+        parser.add_argument("--learning-rate", type=float, default=0.05)
+        parser.add_argument("--chunk-items", type=int, default=500, help="Menu items read and featurized per chunk")
+        parser.add_argument("--no-activate", action="store_true", help="Write the artifact but keep serving the current model")
+        parser.add_argument("--force", action="store_true", help="Activate even if it does not beat the baseline or served model")
+
+    def handle(self, *args, **opts):
+        # xgboost is only needed here, not to import the command list
+        from forecasting.training import train
+
+        try:
+            meta = train(
+                restaurant_id=opts["restaurant"],
+                holdout_days=max(1, opts["holdout_days"]),
+                stopping_days=max(1, opts["stopping_days"]),
+                nthread=opts["nthread"] or None,
+                rounds=opts["rounds"],
+                early_stopping=opts["early_stopping"],
+                max_depth=opts["max_depth"],
+                learning_rate=opts["learning_rate"],
+                chunk_items=max(1, opts["chunk_items"]),
+                activate=not opts["no_activate"],
+                force=opts["force"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(meta, indent=2))
+        if meta["activated"]:
+            self.stdout.write(self.style.SUCCESS(f"Model {meta['version']} active."))
+        elif opts["no_activate"]:
+            self.stdout.write(self.style.SUCCESS(f"Model {meta['version']} written."))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Model {meta['version']} written but not activated: holdout MAE {meta['holdout_mae']} "
+                    f"does not beat lag_7 ({meta['naive_lag7_mae']}) and the served model ({meta['served_mae']}); "
+                    "use --force to activate it anyway."
+                )
+            )
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0003_user_email_lower_uniq'),
+        ('menu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastAccuracy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_days', models.PositiveSmallIntegerField()),
+                ('days', models.PositiveIntegerField(default=0)),
+                ('abs_error_sum', models.BigIntegerField(default=0)),
+                ('error_sum', models.BigIntegerField(default=0)),
+                ('actual_sum', models.BigIntegerField(default=0)),
+                ('ape_sum', models.FloatField(default=0)),
+                ('ape_days', models.PositiveIntegerField(default=0)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_accuracy', to='menu.menuitem')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_accuracy', to='accounts.restaurant')),
+            ],
+            options={
+                'ordering': ['menu_item_id', 'lead_days'],
+                'indexes': [models.Index(fields=['restaurant', 'lead_days'], name='fcacc_rest_lead_idx')],
+                'constraints': [models.UniqueConstraint(fields=('menu_item', 'lead_days'), name='forecast_accuracy_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ForecastPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('lead_days', models.PositiveSmallIntegerField()),
+                ('predicted', models.PositiveIntegerField()),
+                ('actual', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_predictions', to='menu.menuitem')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_prediction', to='accounts.restaurant')),
+            ],
+            options={
+                'ordering': ['date', 'menu_item_id', 'lead_days'],
+                'indexes': [models.Index(fields=['restaurant', 'date'], name='fcpred_rest_date_idx'), models.Index(condition=models.Q(('actual__isnull', True)), fields=['date'], name='fcpred_unscored_idx')],
+                'constraints': [models.UniqueConstraint(fields=('menu_item', 'date', 'lead_days'), name='forecast_prediction_uniq')],
+            },
+        ),
+    ]
@@ -1,18 +1,104 @@
 # forecasting/ml.py
+"""
+The demand model. `manage.py train_forecast_model` writes versioned
+artifacts into FORECAST_MODEL_DIR and points current.json at the active
+one; get_model() notices the pointer changed and loads the new model
+without a restart. Without a pointer the pickled regressor at
+FORECAST_MODEL_PATH is used.
+"""
+import json
 import os
+import threading
+
 import joblib
 from django.conf import settings
 
+POINTER = "current.json"
+
 _MODEL = None
+_LOADED = None  # path _MODEL was loaded from
+# (pointer stamp, (path, version)) of the last lookup
+_ACTIVE = (None, None)
+_lock = threading.Lock()
+
+
+class BoosterModel:
+    """A trained xgboost Booster behind the predict(DataFrame) of the pickled regressor."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, X):
+        return self.booster.inplace_predict(X)
+
+
+def model_dir():
+    return getattr(settings, "FORECAST_MODEL_DIR", "") or os.path.dirname(getattr(settings, "FORECAST_MODEL_PATH", ""))
+
+
+def _stamp():
+    """(path, mtime, inode): activate() replaces the pointer, so a new inode shows even within one mtime tick."""
+    pointer = os.path.join(model_dir(), POINTER)
+    try:
+        st = os.stat(pointer)
+        return pointer, st.st_mtime_ns, st.st_ino
+    except FileNotFoundError:
+        path = getattr(settings, "FORECAST_MODEL_PATH", "")
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Forecast model not found: {path}")
+        st = os.stat(path)
+        return path, st.st_mtime_ns, st.st_ino
+
+
+def _active():
+    """(artifact path, version) of the active model; one stat() unless it changed."""
+    global _ACTIVE
+    stamp = _stamp()
+    if _ACTIVE[0] == stamp:
+        return _ACTIVE[1]
+
+    path = stamp[0]
+    if path.endswith(POINTER):
+        with open(path) as f:
+            current = json.load(f)
+        active = (os.path.join(model_dir(), current["model"]), current["version"])
+    else:
+        active = (path, f"legacy-{stamp[1] // 10**9}")
+    _ACTIVE = (stamp, active)
+    return active
+
+
+def _load(path):
+    if path.endswith(".pkl"):
+        return joblib.load(path)  # requires xgboost installed
+
+    import xgboost as xgb
+
+    return BoosterModel(xgb.Booster(model_file=path))
+
+
+def model_version():
+    """Version of the active model; part of forecast cache keys and ETags."""
+    return _active()[1]
+
 
 def get_model():
-    global _MODEL
-    if _MODEL is not None:
+    global _MODEL, _LOADED
+    path, _version = _active()
+    if _MODEL is not None and _LOADED == path:
         return _MODEL
 
-    path = getattr(settings, "FORECAST_MODEL_PATH", "")
-    if not path or not os.path.exists(path):
-        raise FileNotFoundError(f"Forecast model not found: {path}")
-
-    _MODEL = joblib.load(path)  # requires xgboost installed
+    with _lock:
+        if _MODEL is None or _LOADED != path:
+            _MODEL = _load(path)
+            _LOADED = path
     return _MODEL
+
+
+def activate(version, model_file):
+    """Point current.json at `model_file` (in model_dir()); running processes pick it up on their next forecast."""
+    pointer = os.path.join(model_dir(), POINTER)
+    tmp = f"{pointer}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": version, "model": model_file}, f)
+    os.replace(tmp, pointer)
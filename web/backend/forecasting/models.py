@@ -1,3 +1,87 @@
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+
+class ForecastPrediction(models.Model):
+    """
+    What the demand forecast made on `date - lead_days` said `menu_item`
+    would sell on `date`. Written by forecasting.accuracy.record whenever a
+    forecast is computed (the day's latest forecast wins); `actual` is filled
+    by accuracy.score once the day is over.
+    """
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="forecast_prediction",
+    )
+    menu_item = models.ForeignKey("menu.MenuItem", on_delete=models.CASCADE, related_name="forecast_predictions")
+    date = models.DateField()
+    lead_days = models.PositiveSmallIntegerField()
+
+    predicted = models.PositiveIntegerField()
+    actual = models.PositiveIntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date", "menu_item_id", "lead_days"]
+        constraints = [
+            models.UniqueConstraint(fields=["menu_item", "date", "lead_days"], name="forecast_prediction_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["restaurant", "date"], name="fcpred_rest_date_idx"),
+            # what score() still has to do
+            models.Index(fields=["date"], condition=Q(actual__isnull=True), name="fcpred_unscored_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item_id} @ {self.date} (+{self.lead_days}d): {self.predicted} / {self.actual}"
+
+
+class ForecastAccuracy(models.Model):
+    """
+    Running error totals per menu item and lead time, advanced by
+    accuracy.score as predictions are scored; MAE, MAPE and bias are read
+    from these sums instead of re-running the model over past days.
+    error = predicted - actual, so a positive bias means over-forecasting.
+    """
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="forecast_accuracy",
+    )
+    menu_item = models.ForeignKey("menu.MenuItem", on_delete=models.CASCADE, related_name="forecast_accuracy")
+    lead_days = models.PositiveSmallIntegerField()
+
+    days = models.PositiveIntegerField(default=0)
+    abs_error_sum = models.BigIntegerField(default=0)
+    error_sum = models.BigIntegerField(default=0)
+    actual_sum = models.BigIntegerField(default=0)
+    # MAPE only counts days that sold something
+    ape_sum = models.FloatField(default=0)
+    ape_days = models.PositiveIntegerField(default=0)
+    last_date = models.DateField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["menu_item_id", "lead_days"]
+        constraints = [
+            models.UniqueConstraint(fields=["menu_item", "lead_days"], name="forecast_accuracy_uniq"),
+        ]
+        indexes = [models.Index(fields=["restaurant", "lead_days"], name="fcacc_rest_lead_idx")]
+
+    @property
+    def mae(self):
+        return self.abs_error_sum / self.days if self.days else None
+
+    @property
+    def mape(self):
+        return 100.0 * self.ape_sum / self.ape_days if self.ape_days else None
+
+    @property
+    def bias(self):
+        return self.error_sum / self.days if self.days else None
+
+    def __str__(self):
+        return f"{self.menu_item_id} (+{self.lead_days}d): MAE {self.mae} over {self.days} days"
@@ -1,114 +1,362 @@
 from datetime import timedelta
 
-import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Sum
 from django.db.models.functions import TruncDate
 from django.utils import timezone
 
+from core import events, scoping, singleflight
+from core.dates import day_bounds
+from core.db_routing import use_replica
+from core.versioning import MENU, SALES, get_versions, get_versions_many
 from menu.models import MenuItem
 from sales.models import Sale, SaleItem
-from .ml import get_model
+from . import accuracy, inference
+from .features import WINDOW, dense_history, forecast_recursive
+from .ml import get_model, model_version
 
-FEATURES = ["day_of_week", "month", "is_weekend", "lag_1", "lag_7", "rolling_mean_7"]
+# every forecast is computed this far ahead once and sliced per request
+MAX_HORIZON = 30
 
 
-def _daily_qty_map(days_back: int = 120, restaurant_id=None):
+def _qty_rows(days_back, restaurant_id, restaurant_ids=None):
     """
-    Returns dict: {menu_item_id: {date: qty}}
-    Uses PAID only.
+    (start, today, values() queryset of PAID qty per menu item and day);
+    with `restaurant_ids`, per restaurant, menu item and day for those restaurants.
     """
     today = timezone.localdate()
     start = today - timedelta(days=days_back - 1)
 
-    sale_fields = {f.name for f in Sale._meta.fields}
-    date_field = "sale__sold_at" if "sold_at" in sale_fields else "sale__created_at"
+    date_field = f"sale__{scoping.date_field(Sale)}"
+    lo, hi = day_bounds(start, today)
 
+    # range on the raw column (not the TruncDate) so the partial PAID index applies
     qs = (
-        SaleItem.objects.filter(sale__status="PAID", menu_item__isnull=False)
+        SaleItem.objects.filter(
+            sale__status="PAID",
+            menu_item__isnull=False,
+            **{f"{date_field}__gte": lo, f"{date_field}__lt": hi},
+        )
         .annotate(day=TruncDate(date_field))
-        .filter(day__gte=start, day__lte=today)
     )
 
     if restaurant_id is not None:
-        qs = qs.filter(
-            sale__restaurant_id=restaurant_id,
-            menu_item__restaurant_id=restaurant_id,
-        )
+        # scope on the sale side: it is joined for status/sold_at anyway and that
+        # drives sale_paid_rest_sold_idx; sale items are written with the sale's restaurant
+        qs = qs.filter(sale__restaurant_id=restaurant_id)
+
+    group = ("menu_item_id", "day")
+    if restaurant_ids is not None:
+        qs = qs.filter(sale__restaurant_id__in=restaurant_ids)
+        group = ("sale__restaurant_id",) + group
+
+    qs = qs.values(*group).annotate(qty=Sum("qty")).order_by(*group)
+    return start, today, qs
 
-    qs = (
-        qs.values("menu_item_id", "day")
-        .annotate(qty=Sum("qty"))
-        .order_by("menu_item_id", "day")
-    )
 
+def _qty_map(rows):
     out = {}
-    for r in qs:
+    for r in rows:
         out.setdefault(r["menu_item_id"], {})[r["day"]] = float(r["qty"] or 0)
-    return start, today, out
+    return out
+
+
+@use_replica()
+def _daily_qty_map(days_back: int = 120, restaurant_id=None):
+    """
+    Returns dict: {menu_item_id: {date: qty}}
+    Uses PAID only.
+    """
+    start, today, qs = _qty_rows(days_back, restaurant_id)
+    return start, today, _qty_map(qs)
 
 
-def _rolling_mean_7(series: dict, day):
-    vals = [float(series.get(day - timedelta(days=i), 0)) for i in range(1, 8)]
-    return sum(vals) / 7.0
+async def _adaily_qty_map(days_back: int = 120, restaurant_id=None):
+    start, today, qs = _qty_rows(days_back, restaurant_id)
+    with use_replica():
+        rows = [r async for r in qs]
+    return start, today, _qty_map(rows)
 
 
-def _feature_row(day, series):
-    dow = day.weekday()
-    return {
-        "day_of_week": dow,
-        "month": day.month,
-        "is_weekend": 1 if dow >= 5 else 0,
-        "lag_1": float(series.get(day - timedelta(days=1), 0)),
-        "lag_7": float(series.get(day - timedelta(days=7), 0)),
-        "rolling_mean_7": _rolling_mean_7(series, day),
-    }
+def _menu_items(item_ids, restaurant_id):
+    """Queryset of the menu items to forecast: the ones that sold, else every item of the restaurant."""
+    if item_ids:
+        qs = MenuItem.objects.filter(id__in=item_ids)
+    else:
+        qs = MenuItem.objects.all()
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    return qs.values_list("id", "name")
 
 
-def predict_menu_demand(horizon_days=7, days_back=120, top_n=50, restaurant_id=None):
+def load_demand_inputs(days_back=120, restaurant_id=None):
+    """Everything forecast_demand needs from the database."""
+    _start, today, qty_map = _daily_qty_map(days_back=days_back, restaurant_id=restaurant_id)
+    names = dict(_menu_items(list(qty_map), restaurant_id))
+    return {"today": today, "qty_map": qty_map, "item_ids": list(qty_map) or list(names), "names": names}
+
+
+async def aload_demand_inputs(days_back=120, restaurant_id=None):
+    """load_demand_inputs on the async ORM."""
+    _start, today, qty_map = await _adaily_qty_map(days_back=days_back, restaurant_id=restaurant_id)
+    names = {mid: name async for mid, name in _menu_items(list(qty_map), restaurant_id)}
+    return {"today": today, "qty_map": qty_map, "item_ids": list(qty_map) or list(names), "names": names}
+
+
+def _batch_qty_map(rows):
+    out = {}
+    for r in rows:
+        out.setdefault(r["sale__restaurant_id"], {}).setdefault(r["menu_item_id"], {})[r["day"]] = float(r["qty"] or 0)
+    return out
+
+
+def _batch_menus(restaurant_ids):
+    return MenuItem.objects.filter(restaurant_id__in=restaurant_ids).values_list("restaurant_id", "id", "name")
+
+
+def _batch_inputs(restaurant_ids, today, qty_maps, menus):
+    names = {rid: {} for rid in restaurant_ids}
+    for rid, mid, name in menus:
+        names[rid][mid] = name
+    out = {}
+    for rid in restaurant_ids:
+        qty_map = qty_maps.get(rid, {})
+        out[rid] = {"today": today, "qty_map": qty_map, "item_ids": list(qty_map) or list(names[rid]), "names": names[rid]}
+    return out
+
+
+@use_replica()
+def load_batch_inputs(restaurant_ids, days_back=120):
+    """
+    {restaurant_id: load_demand_inputs()} for several restaurants with one
+    grouped sales query and one menu query, whatever their number.
+    """
+    _start, today, qs = _qty_rows(days_back, None, restaurant_ids=restaurant_ids)
+    return _batch_inputs(restaurant_ids, today, _batch_qty_map(qs), list(_batch_menus(restaurant_ids)))
+
+
+async def aload_batch_inputs(restaurant_ids, days_back=120):
+    _start, today, qs = _qty_rows(days_back, None, restaurant_ids=restaurant_ids)
+    with use_replica():
+        rows = [r async for r in qs]
+        menus = [m async for m in _batch_menus(restaurant_ids)]
+    return _batch_inputs(restaurant_ids, today, _batch_qty_map(rows), menus)
+
+
+class ForecastResult:
+    """
+    Recursive forecast for every menu item over `horizon_days` from
+    `start_date` (tomorrow). Day d only depends on the days before it, so
+    the first n days equal an n-day forecast: one MAX_HORIZON result serves
+    every horizon and scope by slicing.
+    """
+
+    def __init__(self, start_date, horizon_days, item_ids, names, daily):
+        self.start_date = start_date
+        self.horizon_days = horizon_days
+        self.item_ids = item_ids  # menu_item_id order, for stable ties
+        self.names = names
+        self.daily = daily  # {menu_item_id: [yhat per day]}
+
+    def dates(self, horizon_days):
+        return [self.start_date + timedelta(days=i) for i in range(min(horizon_days, self.horizon_days))]
+
+    def units(self, start, end):
+        """{menu_item_id: predicted units in [start, end]} (dates within the horizon)."""
+        lo = max((start - self.start_date).days, 0)
+        hi = min((end - self.start_date).days + 1, self.horizon_days)
+        return {mid: int(sum(self.daily[mid][lo:hi])) for mid in self.item_ids}
+
+    def payload(self, horizon_days=7, top_n=50):
+        """The /api/forecasting/demand/ response for `horizon_days`, top `top_n` items."""
+        days = [str(d) for d in self.dates(horizon_days)]
+        results = []
+        for mid in self.item_ids:
+            daily = [{"date": d, "yhat": y} for d, y in zip(days, self.daily[mid])]
+            results.append(
+                {
+                    "menu_item_id": int(mid),
+                    "menu_item_name": self.names.get(mid, f"Item {mid}"),
+                    "tomorrow": daily[0]["yhat"] if daily else 0,
+                    "next_7_days_total": int(sum(p["yhat"] for p in daily)),
+                    "daily": daily,
+                }
+            )
+
+        results.sort(key=lambda x: x["next_7_days_total"], reverse=True)
+        return {
+            "start_date": str(self.start_date),
+            "horizon_days": horizon_days,
+            "items": results[:top_n],
+        }
+
+
+def forecast_demand(inputs, horizon_days=MAX_HORIZON):
+    """
+    ForecastResult from load_demand_inputs() (CPU only, no queries, so it
+    can run on the inference pool). One predict() call per day for all
+    items together.
+    """
+    return forecast_batch({None: inputs}, horizon_days)[None]
+
+
+def forecast_batch(inputs_by_restaurant, horizon_days=MAX_HORIZON):
+    """
+    {restaurant_id: ForecastResult} from {restaurant_id: inputs}: every
+    restaurant's items are stacked into one matrix, so a chain of 40
+    branches still costs one predict() call per day.
+    """
+    if not inputs_by_restaurant:
+        return {}
     model = get_model()
 
-    start, today, qty_map = _daily_qty_map(days_back=days_back, restaurant_id=restaurant_id)
-    tomorrow = today + timedelta(days=1)
-    future_days = [tomorrow + timedelta(days=i) for i in range(horizon_days)]
+    # restaurants loaded together share "today"
+    today = next(iter(inputs_by_restaurant.values()))["today"]
+    qty_map = {
+        (rid, mid): inputs["qty_map"].get(mid, {})
+        for rid, inputs in inputs_by_restaurant.items()
+        for mid in inputs["item_ids"]
+    }
+    keys = list(qty_map)
+    start = today - timedelta(days=WINDOW - 1)
 
-    item_ids = list(qty_map.keys())
-    if not item_ids:
-        mi_qs = MenuItem.objects.all()
-        if restaurant_id is not None:
-            mi_qs = mi_qs.filter(restaurant_id=restaurant_id)
-        item_ids = list(mi_qs.values_list("id", flat=True))
+    tomorrow = today + timedelta(days=1)
+    yhat = forecast_recursive(model, dense_history(qty_map, keys, start, WINDOW), tomorrow, horizon_days)
 
-    name_qs = MenuItem.objects.filter(id__in=item_ids)
-    if restaurant_id is not None:
-        name_qs = name_qs.filter(restaurant_id=restaurant_id)
-    name_map = {m.id: m.name for m in name_qs}
-
-    results = []
-    for mid in item_ids:
-        series = dict(qty_map.get(mid, {}))
-        preds = []
-
-        for d in future_days:
-            row = _feature_row(d, series)
-            X = pd.DataFrame([[row[f] for f in FEATURES]], columns=FEATURES)
-            yhat = float(model.predict(X)[0])
-            yhat_int = max(0, int(round(yhat)))
-            series[d] = yhat_int
-            preds.append({"date": str(d), "yhat": yhat_int})
-
-        results.append(
-            {
-                "menu_item_id": int(mid),
-                "menu_item_name": name_map.get(mid, f"Item {mid}"),
-                "tomorrow": preds[0]["yhat"] if preds else 0,
-                "next_7_days_total": int(sum(p["yhat"] for p in preds)),
-                "daily": preds,
-            }
-        )
+    daily = {rid: {} for rid in inputs_by_restaurant}
+    for (rid, mid), row in zip(keys, yhat.tolist()):
+        daily[rid][mid] = row
 
-    results.sort(key=lambda x: x["next_7_days_total"], reverse=True)
     return {
-        "start_date": str(tomorrow),
-        "horizon_days": horizon_days,
-        "items": results[:top_n],
+        rid: ForecastResult(tomorrow, horizon_days, inputs["item_ids"], inputs["names"], daily[rid])
+        for rid, inputs in inputs_by_restaurant.items()
     }
+
+
+def _cache_key(restaurant_id, days_back, versions=None):
+    # any sale/menu write, a new day or a new model invalidates it
+    if versions is None:
+        versions = get_versions(restaurant_id, (SALES, MENU))
+    return (
+        f"forecast:r{restaurant_id}:s{versions[SALES][0]}:m{versions[MENU][0]}:"
+        f"{timezone.localdate().isoformat()}:b{days_back}:h{MAX_HORIZON}:v{model_version()}"
+    )
+
+
+def _cache_seconds():
+    return getattr(settings, "FORECAST_CACHE_SECONDS", 6 * 3600)
+
+
+def _refreshed(restaurant_id, result):
+    accuracy.record(restaurant_id, result)
+    events.publish(
+        restaurant_id,
+        events.FORECAST_REFRESHED,
+        {"start_date": result.start_date, "horizon_days": result.horizon_days},
+    )
+
+
+@singleflight.coalesce("forecast.result")
+def _compute(restaurant_id, days_back, key=None):
+    """
+    Compute a forecast; with a cache `key` also store it and announce the
+    refresh. Callers coalesced onto this computation only share the result,
+    so forecast.refreshed goes out once per computed forecast.
+    """
+    result = forecast_demand(load_demand_inputs(days_back=days_back, restaurant_id=restaurant_id))
+    if key is not None:
+        cache.set(key, result, _cache_seconds())
+        _refreshed(restaurant_id, result)
+    return result
+
+
+@singleflight.coalesce("forecast.result")
+async def _acompute(restaurant_id, days_back, key=None):
+    inputs = await aload_demand_inputs(days_back=days_back, restaurant_id=restaurant_id)
+    result = await inference.run(forecast_demand, inputs)
+    if key is not None:
+        await cache.aset(key, result, _cache_seconds())
+        await sync_to_async(_refreshed)(restaurant_id, result)
+    return result
+
+
+def get_forecast(restaurant_id=None, days_back=120):
+    """
+    The restaurant's MAX_HORIZON ForecastResult, from the cache while its
+    sales/menu versions and the date are unchanged (superusers' all-restaurant
+    forecast is not cached).
+    """
+    if restaurant_id is None:
+        return _compute(None, days_back)
+
+    key = _cache_key(restaurant_id, days_back)
+    result = cache.get(key)
+    if result is None:
+        result = _compute(restaurant_id, days_back, key)
+    return result
+
+
+async def aget_forecast(restaurant_id=None, days_back=120):
+    """get_forecast for async views: queries on the async ORM, inference on the pool."""
+    if restaurant_id is None:
+        return await _acompute(None, days_back)
+
+    key = await sync_to_async(_cache_key)(restaurant_id, days_back)
+    result = await cache.aget(key)
+    if result is None:
+        result = await _acompute(restaurant_id, days_back, key)
+    return result
+
+
+def _cache_keys(restaurant_ids, days_back):
+    versions = get_versions_many(restaurant_ids, (SALES, MENU))
+    return {rid: _cache_key(rid, days_back, versions[rid]) for rid in restaurant_ids}
+
+
+def get_forecasts(restaurant_ids, days_back=120):
+    """
+    {restaurant_id: ForecastResult} for several restaurants (a chain, the
+    nightly warm-up): cached results come from one get_many, the rest are
+    loaded and scored together by forecast_batch().
+    """
+    restaurant_ids = list(dict.fromkeys(restaurant_ids))
+    keys = _cache_keys(restaurant_ids, days_back)
+    hits = cache.get_many(list(keys.values()))
+    out = {rid: hits[keys[rid]] for rid in restaurant_ids if keys[rid] in hits}
+
+    missing = [rid for rid in restaurant_ids if rid not in out]
+    if missing:
+        fresh = forecast_batch(load_batch_inputs(missing, days_back=days_back))
+        cache.set_many({keys[rid]: result for rid, result in fresh.items()}, _cache_seconds())
+        for rid, result in fresh.items():
+            _refreshed(rid, result)
+        out.update(fresh)
+    return {rid: out[rid] for rid in restaurant_ids}
+
+
+async def aget_forecasts(restaurant_ids, days_back=120):
+    """get_forecasts for async views; the batch is scored on the inference pool."""
+    restaurant_ids = list(dict.fromkeys(restaurant_ids))
+    keys = await sync_to_async(_cache_keys)(restaurant_ids, days_back)
+    hits = await cache.aget_many(list(keys.values()))
+    out = {rid: hits[keys[rid]] for rid in restaurant_ids if keys[rid] in hits}
+
+    missing = [rid for rid in restaurant_ids if rid not in out]
+    if missing:
+        inputs = await aload_batch_inputs(missing, days_back=days_back)
+        fresh = await inference.run(forecast_batch, inputs)
+        await cache.aset_many({keys[rid]: result for rid, result in fresh.items()}, _cache_seconds())
+        for rid, result in fresh.items():
+            await sync_to_async(_refreshed)(rid, result)
+        out.update(fresh)
+    return {rid: out[rid] for rid in restaurant_ids}
+
+
+def predict_menu_demand(horizon_days=7, days_back=120, top_n=50, restaurant_id=None):
+    return get_forecast(restaurant_id, days_back).payload(horizon_days, top_n)
+
+
+async def apredict_menu_demand(horizon_days=7, days_back=120, top_n=50, restaurant_id=None):
+    return (await aget_forecast(restaurant_id, days_back)).payload(horizon_days, top_n)
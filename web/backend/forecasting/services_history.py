@@ -1,48 +1,16 @@
 from datetime import timedelta
 
 import pandas as pd
-from django.db.models import Sum
-from django.db.models.functions import TruncDate
-from django.utils import timezone
 
+from core import singleflight
 from menu.models import MenuItem
-from sales.models import Sale, SaleItem
+from . import inference
 from .ml import get_model
+from .services import _adaily_qty_map, _daily_qty_map
 
 FEATURES = ["day_of_week", "month", "is_weekend", "lag_1", "lag_7", "rolling_mean_7"]
 
 
-def _daily_qty_map(days_back: int = 180, restaurant_id=None):
-    today = timezone.localdate()
-    start = today - timedelta(days=days_back - 1)
-
-    sale_fields = {f.name for f in Sale._meta.fields}
-    date_field = "sale__sold_at" if "sold_at" in sale_fields else "sale__created_at"
-
-    qs = (
-        SaleItem.objects.filter(sale__status="PAID", menu_item__isnull=False)
-        .annotate(day=TruncDate(date_field))
-        .filter(day__gte=start, day__lte=today)
-    )
-
-    if restaurant_id is not None:
-        qs = qs.filter(
-            sale__restaurant_id=restaurant_id,
-            menu_item__restaurant_id=restaurant_id,
-        )
-
-    qs = (
-        qs.values("menu_item_id", "day")
-        .annotate(qty=Sum("qty"))
-        .order_by("menu_item_id", "day")
-    )
-
-    out = {}
-    for r in qs:
-        out.setdefault(r["menu_item_id"], {})[r["day"]] = float(r["qty"] or 0)
-    return start, today, out
-
-
 def _rolling_mean_7(series: dict, day):
     vals = [float(series.get(day - timedelta(days=i), 0)) for i in range(1, 8)]
     return sum(vals) / 7.0
@@ -60,32 +28,54 @@ def _row(day, series):
     }
 
 
-def predict_past_days(days: int = 14, days_back: int = 180, top_n: int = 50, restaurant_id=None):
+def _menu_names(item_ids, restaurant_id):
+    qs = MenuItem.objects.filter(id__in=item_ids)
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    return qs.values_list("id", "name")
+
+
+def load_history_inputs(days_back=180, restaurant_id=None):
+    _start, today, qty_map = _daily_qty_map(days_back=days_back, restaurant_id=restaurant_id)
+    return {"today": today, "qty_map": qty_map, "names": dict(_menu_names(list(qty_map), restaurant_id))}
+
+
+async def aload_history_inputs(days_back=180, restaurant_id=None):
+    _start, today, qty_map = await _adaily_qty_map(days_back=days_back, restaurant_id=restaurant_id)
+    names = {mid: name async for mid, name in _menu_names(list(qty_map), restaurant_id)}
+    return {"today": today, "qty_map": qty_map, "names": names}
+
+
+def backtest(inputs, days=14, top_n=50):
+    """
+    Predicted vs actual for the last `days` finished days (CPU only). Features
+    come from actual sales, so every item/day row goes into one predict() call.
+    """
     days = max(1, min(days, 90))
     model = get_model()
 
-    start, today, qty_map = _daily_qty_map(days_back=days_back, restaurant_id=restaurant_id)
-    end_day = today - timedelta(days=1)
+    end_day = inputs["today"] - timedelta(days=1)
     start_day = end_day - timedelta(days=days - 1)
 
     target_days = [start_day + timedelta(days=i) for i in range(days)]
+    qty_map = inputs["qty_map"]
     item_ids = list(qty_map.keys())
+    name_map = inputs["names"]
 
-    name_qs = MenuItem.objects.filter(id__in=item_ids)
-    if restaurant_id is not None:
-        name_qs = name_qs.filter(restaurant_id=restaurant_id)
-    name_map = {m.id: m.name for m in name_qs}
+    rows = [(mid, d) for mid in item_ids for d in target_days]
+    yhats = []
+    if rows:
+        X = pd.DataFrame([[_row(d, qty_map[mid])[f] for f in FEATURES] for mid, d in rows], columns=FEATURES)
+        yhats = model.predict(X)
+
+    daily_by_item = {mid: [] for mid in item_ids}
+    for (mid, d), yhat in zip(rows, yhats):
+        yhat_int = max(0, int(round(float(yhat))))
+        daily_by_item[mid].append({"date": str(d), "yhat": yhat_int, "actual": int(qty_map[mid].get(d, 0))})
 
     results = []
     for mid in item_ids:
-        series = dict(qty_map.get(mid, {}))
-        daily = []
-
-        for d in target_days:
-            X = pd.DataFrame([[_row(d, series)[f] for f in FEATURES]], columns=FEATURES)
-            yhat = float(model.predict(X)[0])
-            yhat_int = max(0, int(round(yhat)))
-            daily.append({"date": str(d), "yhat": yhat_int, "actual": int(series.get(d, 0))})
+        daily = daily_by_item[mid]
 
         y_key = str(end_day)
         y_row = next((x for x in daily if x["date"] == y_key), None)
@@ -108,3 +98,14 @@ def predict_past_days(days: int = 14, days_back: int = 180, top_n: int = 50, res
         "days": days,
         "items": results[:top_n],
     }
+
+
+@singleflight.coalesce("forecast.history")
+def predict_past_days(days: int = 14, days_back: int = 180, top_n: int = 50, restaurant_id=None):
+    return backtest(load_history_inputs(days_back=days_back, restaurant_id=restaurant_id), days=days, top_n=top_n)
+
+
+@singleflight.coalesce("forecast.history")
+async def apredict_past_days(days: int = 14, days_back: int = 180, top_n: int = 50, restaurant_id=None):
+    inputs = await aload_history_inputs(days_back=days_back, restaurant_id=restaurant_id)
+    return await inference.run(backtest, inputs, days, top_n)
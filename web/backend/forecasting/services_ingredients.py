@@ -1,9 +1,10 @@
 from collections import defaultdict
+from datetime import timedelta
 from decimal import Decimal
 
 from inventory.models import InventoryItem
-from menu.models import MenuItem, RecipeLine
-from .services import predict_menu_demand
+from menu.models import RecipeLine
+from .services import aget_forecast, get_forecast
 
 
 def D(v) -> Decimal:
@@ -13,87 +14,136 @@ def D(v) -> Decimal:
         return Decimal("0")
 
 
+def _recipes(item_ids, restaurant_id):
+    """(menu_item_id, ingredient_id, qty) recipe rows of the items with demand."""
+    recipe_qs = RecipeLine.objects.filter(menu_item_id__in=item_ids)
+    if restaurant_id is not None:
+        recipe_qs = recipe_qs.filter(
+            menu_item__restaurant_id=restaurant_id,
+            ingredient__restaurant_id=restaurant_id,
+        )
+    return recipe_qs.values_list("menu_item_id", "ingredient_id", "qty")
+
+
+def _inventory(ing_ids, restaurant_id):
+    inv_qs = InventoryItem.objects.filter(id__in=ing_ids)
+    if restaurant_id is not None:
+        inv_qs = inv_qs.filter(restaurant_id=restaurant_id)
+    return inv_qs
+
+
+def scope_range(forecast, scope, horizon_days):
+    """[start, end] dates of a plan scope within `forecast`."""
+    start = forecast.start_date
+    if scope == "tomorrow":
+        return start, start
+    return start, start + timedelta(days=horizon_days - 1)
+
+
+def _demand(forecast, scope, horizon_days):
+    """Predicted units in the scope for every forecast item (not only the top_n shown)."""
+    units = forecast.units(*scope_range(forecast, scope, horizon_days))
+    return {int(mid): n for mid, n in units.items() if n > 0}
+
+
+def _empty_plan(payload, scope, horizon_days):
+    return {
+        "scope": scope,
+        "horizon_days": horizon_days,
+        "start_date": payload.get("start_date"),
+        "items_used": [],
+        "items_missing_recipes": [],
+        "ingredients": [],
+    }
+
+
 def build_ingredient_plan(
     horizon_days: int = 7,
     top_n_items: int = 50,
     scope: str = "next7",
     restaurant_id=None,
+    forecast=None,
 ):
     """
     scope:
-      - tomorrow: use each item's predicted 'tomorrow'
-      - next7: use each item's predicted 'next_7_days_total'
+      - tomorrow: use each item's predicted units for tomorrow
+      - next7: use each item's predicted units over horizon_days
+
+    Requirements cover every forecast menu item; top_n_items only limits
+    the items_used list shown with the plan.
+
+    forecast: a ForecastResult to plan from (defaults to the restaurant's
+    cached one); the scope only picks a date range of it.
     """
-    forecast = predict_menu_demand(
-        horizon_days=horizon_days,
-        top_n=top_n_items,
-        restaurant_id=restaurant_id,
-    )
-    items = forecast.get("items", [])
-
-    demand_by_item = {}
-    for it in items:
-        mid = int(it["menu_item_id"])
-        demand_by_item[mid] = int(it.get("tomorrow", 0)) if scope == "tomorrow" else int(it.get("next_7_days_total", 0))
-
-    item_ids = list(demand_by_item.keys())
-    if not item_ids:
-        return {
-            "scope": scope,
-            "horizon_days": horizon_days,
-            "start_date": forecast.get("start_date"),
-            "items_used": [],
-            "items_missing_recipes": [],
-            "ingredients": [],
-        }
-
-    recipe_qs = RecipeLine.objects.filter(menu_item_id__in=item_ids).select_related("menu_item", "ingredient")
-    if restaurant_id is not None:
-        recipe_qs = recipe_qs.filter(
-            menu_item__restaurant_id=restaurant_id,
-            ingredient__restaurant_id=restaurant_id,
-        )
+    if forecast is None:
+        forecast = get_forecast(restaurant_id)
+    payload = forecast.payload(horizon_days, top_n_items)
+    if not payload["items"]:
+        return _empty_plan(payload, scope, horizon_days)
+
+    demand_by_item = _demand(forecast, scope, horizon_days)
+    recipe_lines = list(_recipes(list(demand_by_item), restaurant_id))
+    inv = {i.id: i for i in _inventory({ing_id for _mid, ing_id, _qty in recipe_lines}, restaurant_id)}
+    return assemble_plan(payload, scope, horizon_days, demand_by_item, recipe_lines, forecast.names, inv)
+
+
+async def abuild_ingredient_plan(
+    horizon_days: int = 7,
+    top_n_items: int = 50,
+    scope: str = "next7",
+    restaurant_id=None,
+    forecast=None,
+):
+    """build_ingredient_plan for async views (forecast from aget_forecast, async ORM queries)."""
+    if forecast is None:
+        forecast = await aget_forecast(restaurant_id)
+    payload = forecast.payload(horizon_days, top_n_items)
+    if not payload["items"]:
+        return _empty_plan(payload, scope, horizon_days)
+
+    demand_by_item = _demand(forecast, scope, horizon_days)
+    recipe_lines = [r async for r in _recipes(list(demand_by_item), restaurant_id)]
+    inv = {i.id: i async for i in _inventory({ing_id for _mid, ing_id, _qty in recipe_lines}, restaurant_id)}
+    return assemble_plan(payload, scope, horizon_days, demand_by_item, recipe_lines, forecast.names, inv)
+
+
+def assemble_plan(payload, scope, horizon_days, demand_by_item, recipe_lines, menu_name_map, inv):
+    """
+    Purchase plan from the prefetched recipes / inventory (no queries).
+    Requirements cover every item in demand_by_item; `payload` (the top_n
+    forecast) is only echoed back as items_used.
+    """
+    item_ids = list(demand_by_item)
 
     has_recipe = set()
     required_by_ing = defaultdict(Decimal)
     contributes = defaultdict(list)
 
-    for rl in recipe_qs:
-        has_recipe.add(rl.menu_item_id)
-        units = demand_by_item.get(rl.menu_item_id, 0)
+    for menu_item_id, ingredient_id, qty in recipe_lines:
+        has_recipe.add(menu_item_id)
+        units = demand_by_item.get(menu_item_id, 0)
         if units <= 0:
             continue
 
-        req = (D(units) * D(rl.qty)).quantize(Decimal("0.01"))
-        required_by_ing[rl.ingredient_id] += req
+        req = (D(units) * D(qty)).quantize(Decimal("0.01"))
+        required_by_ing[ingredient_id] += req
 
-        contributes[rl.ingredient_id].append(
+        contributes[ingredient_id].append(
             {
-                "menu_item_id": rl.menu_item_id,
-                "menu_item_name": rl.menu_item.name,
+                "menu_item_id": menu_item_id,
+                "menu_item_name": menu_name_map.get(menu_item_id, f"Item {menu_item_id}"),
                 "predicted_units": int(units),
-                "per_unit_qty": str(rl.qty),
+                "per_unit_qty": str(qty),
                 "required_qty": str(req),
             }
         )
 
-    menu_name_qs = MenuItem.objects.filter(id__in=item_ids).only("id", "name")
-    if restaurant_id is not None:
-        menu_name_qs = menu_name_qs.filter(restaurant_id=restaurant_id)
-    menu_name_map = {m.id: m.name for m in menu_name_qs}
-
     items_missing = [
         {"menu_item_id": mid, "menu_item_name": menu_name_map.get(mid, f"Item {mid}")}
         for mid in item_ids
         if mid not in has_recipe and demand_by_item.get(mid, 0) > 0
     ]
 
-    ing_ids = list(required_by_ing.keys())
-    inv_qs = InventoryItem.objects.filter(id__in=ing_ids)
-    if restaurant_id is not None:
-        inv_qs = inv_qs.filter(restaurant_id=restaurant_id)
-    inv = {i.id: i for i in inv_qs}
-
     ingredients_out = []
     for ing_id, required in required_by_ing.items():
         item = inv.get(ing_id)
@@ -137,8 +187,8 @@ def build_ingredient_plan(
     return {
         "scope": scope,
         "horizon_days": horizon_days,
-        "start_date": forecast.get("start_date"),
-        "items_used": items,
+        "start_date": payload.get("start_date"),
+        "items_used": payload.get("items", []),
         "items_missing_recipes": items_missing,
         "ingredients": ingredients_out,
     }
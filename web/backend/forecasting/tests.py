@@ -1,3 +1,462 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Restaurant, User
+from core import events
+from core.synthetic import generate_restaurant
+from core.versioning import SALES, bump
+from menu.models import MenuItem
+from reports.models import MenuItemDailyCost, RolledUpDay
+from reports.services import rollup_days
+from sales.models import Sale, SaleItem
+from . import accuracy, inference, ml, services, training, views
+from .features import FEATURES, WINDOW, day_features, training_rows
+from .ml import get_model
+from .models import ForecastAccuracy, ForecastPrediction
+
+
+def empty_forecast(inputs):
+    return services.ForecastResult(timezone.localdate() + timedelta(days=1), services.MAX_HORIZON, [], {}, {})
+
+
+@mock.patch.object(services, "model_version", lambda: "test")
+@mock.patch.object(services, "forecast_demand", empty_forecast)
+@mock.patch.object(services, "load_demand_inputs", lambda **kwargs: {})
+@mock.patch.object(services, "aload_demand_inputs", mock.AsyncMock(return_value={}))
+class ForecastRefreshedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rid = Restaurant.objects.create(name="Forecast", slug="forecast").pk
+
+    def setUp(self):
+        services.cache.clear()
+        patcher = mock.patch.object(events, "publish")
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def refreshed(self):
+        return [c for c in self.publish.call_args_list if c.args[1] == events.FORECAST_REFRESHED]
+
+    def test_published_only_when_computed(self):
+        services.get_forecast(self.rid)
+        services.get_forecast(self.rid)
+        self.assertEqual(len(self.refreshed()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump(self.rid, SALES)
+        services.get_forecast(self.rid)
+        self.assertEqual(len(self.refreshed()), 2)
+
+    async def test_async_published_only_when_computed(self):
+        await services.aget_forecast(self.rid)
+        await services.aget_forecast(self.rid)
+        self.assertEqual(len(self.refreshed()), 1)
+
+    def test_all_restaurants_forecast_publishes_nothing(self):
+        services.get_forecast(None)
+        self.assertEqual(self.refreshed(), [])
+
+
+@override_settings(FORECAST_WORKERS=1, FORECAST_QUEUE_TIMEOUT=0.05)
+class InferencePoolTests(SimpleTestCase):
+    def setUp(self):
+        # a fresh one-slot pool per test
+        for name in ("_executor", "_slots"):
+            patcher = mock.patch.object(inference, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def blocked(self):
+        self.release.wait(5)
+        return "done"
+
+    async def until_busy(self):
+        while inference._slots is None or inference._slots._value:
+            await asyncio.sleep(0.001)
+
+    async def test_busy_when_every_slot_is_taken(self):
+        first = asyncio.create_task(inference.run(self.blocked))
+        await self.until_busy()
+        with self.assertRaises(inference.ForecastBusy):
+            await inference.run(lambda: "second")
+        self.release.set()
+        self.assertEqual(await first, "done")
+        self.assertEqual(await inference.run(lambda: "third"), "third")
+
+    async def test_slot_released_after_exception(self):
+        def boom():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            await inference.run(boom)
+        self.assertEqual(await inference.run(lambda: "next"), "next")
+
+    async def test_slot_released_when_the_cancelled_computation_ends(self):
+        task = asyncio.create_task(inference.run(self.blocked))
+        await self.until_busy()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        # the thread is still computing, so its slot is still taken
+        with self.assertRaises(inference.ForecastBusy):
+            await inference.run(lambda: "early")
+        self.release.set()
+        self.assertEqual(await inference.run(lambda: "next"), "next")
+
+
+class ForecastBusyResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rid = Restaurant.objects.create(name="Busy", slug="busy").pk
+        cls.owner = User.objects.create_user(
+            username="busy-owner", email="owner@busy.test", password="x", role=User.Role.OWNER, restaurant_id=cls.rid
+        )
+
+    def test_503_with_retry_after(self):
+        busy = mock.AsyncMock(side_effect=inference.ForecastBusy("Forecasting is busy, retry shortly."))
+        with mock.patch.object(views, "apredict_menu_demand", busy):
+            r = self.client.get(
+                "/api/forecasting/demand/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.owner)}"
+            )
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r["Retry-After"], str(views.ForecastView.retry_after))
+        self.assertEqual(r.json(), {"detail": "Forecasting is busy, retry shortly."})
+
+
+class ForecastHorizonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rid = generate_restaurant(0, prefix="horizon", menu_items=6, ingredients=4, days=60, sales_per_day=20)["restaurant_id"]
+
+    def test_payload_equals_a_direct_forecast_of_that_horizon(self):
+        inputs = services.load_demand_inputs(restaurant_id=self.rid)
+        full = services.forecast_demand(inputs)
+        self.assertEqual(full.horizon_days, services.MAX_HORIZON)
+        for n in (1, 7, 14, services.MAX_HORIZON):
+            with self.subTest(horizon=n):
+                self.assertEqual(full.payload(n, 50), services.forecast_demand(inputs, n).payload(n, 50))
+
+    def test_payload_never_runs_past_the_computed_horizon(self):
+        full = services.forecast_demand(services.load_demand_inputs(restaurant_id=self.rid))
+        payload = full.payload(services.MAX_HORIZON + 10, 50)
+        self.assertTrue(payload["items"])
+        for item in payload["items"]:
+            self.assertEqual(len(item["daily"]), services.MAX_HORIZON)
+
+
+class ForecastAccuracyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="acc", menu_items=2, ingredients=1, days=0, sales_per_day=0)
+        cls.rid = ids["restaurant_id"]
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.m1, cls.m2 = MenuItem.objects.filter(restaurant_id=cls.rid).order_by("pk")
+        cls.other = generate_restaurant(1, prefix="acc", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.superuser = User.objects.create_superuser(username="acc-su", email="su@acc.test", password="x")
+
+        today = timezone.localdate()
+        cls.made_on = today - timedelta(days=3)
+        cls.d1, cls.d2 = today - timedelta(days=2), today - timedelta(days=1)
+        # m1 sells 4 on d1 and 3 on d2; m2 sells nothing on d1 and 2 on d2
+        for day, qtys in ((cls.d1, {cls.m1: 4}), (cls.d2, {cls.m1: 3, cls.m2: 2})):
+            at = timezone.make_aware(datetime.combine(day, time(12)))
+            sale = Sale.objects.create(restaurant_id=cls.rid, created_by=cls.owner, status=Sale.Status.PAID, sold_at=at)
+            for mi, qty in qtys.items():
+                SaleItem.objects.create(
+                    sale=sale, restaurant_id=cls.rid, menu_item=mi, name=mi.name, qty=qty, unit_price=mi.price, line_total=mi.price * qty
+                )
+
+    def result(self, m1, m2):
+        daily = {self.m1.pk: m1 + [0] * 5, self.m2.pk: m2 + [0] * 5}
+        return services.ForecastResult(self.made_on + timedelta(days=1), 7, [self.m1.pk, self.m2.pk], {}, daily)
+
+    def totals(self, lead_days):
+        return {
+            a.menu_item_id: (a.days, a.abs_error_sum, a.error_sum, a.ape_days)
+            for a in ForecastAccuracy.objects.filter(restaurant_id=self.rid, lead_days=lead_days)
+        }
+
+    def test_recording_again_replaces_the_predictions(self):
+        self.assertEqual(accuracy.record(self.rid, self.result([9, 9], [9, 9])), 14)
+        accuracy.record(self.rid, self.result([5, 3], [2, 4]))
+        rows = ForecastPrediction.objects.filter(restaurant_id=self.rid)
+        self.assertEqual(rows.count(), 14)
+        self.assertEqual(rows.get(menu_item=self.m1, date=self.d1, lead_days=1).predicted, 5)
+
+    def test_score_once_and_skip_zero_actuals_in_mape(self):
+        accuracy.record(self.rid, self.result([5, 3], [2, 4]))
+        # d1 and d2 are over, the later five days are not
+        self.assertEqual(accuracy.score(restaurant_id=self.rid), 4)
+        expected = {
+            1: {self.m1.pk: (1, 1, 1, 1), self.m2.pk: (1, 2, 2, 0)},
+            2: {self.m1.pk: (1, 0, 0, 1), self.m2.pk: (1, 2, 2, 1)},
+        }
+        self.assertEqual({lead: self.totals(lead) for lead in (1, 2)}, expected)
+
+        self.assertEqual(accuracy.score(restaurant_id=self.rid), 0)
+        self.assertEqual({lead: self.totals(lead) for lead in (1, 2)}, expected)
+
+        report = accuracy.accuracy_report(self.rid, lead_days=1)
+        by_item = {i["menu_item_id"]: i for i in report["items"]}
+        # m2 sold nothing on d1: it counts for MAE and bias, not MAPE
+        self.assertIsNone(by_item[self.m2.pk]["mape"])
+        self.assertEqual(by_item[self.m1.pk]["mape"], 25.0)
+        self.assertEqual(report["overall"], {"days": 2, "mae": 1.5, "mape": 25.0, "bias": 1.5})
+
+    def test_view_is_scoped_to_the_restaurant(self):
+        accuracy.record(self.rid, self.result([5, 3], [2, 4]))
+        other_item = MenuItem.objects.get(restaurant_id=self.other["restaurant_id"])
+        ForecastAccuracy.objects.create(
+            restaurant_id=self.other["restaurant_id"], menu_item=other_item, lead_days=1, days=1, abs_error_sum=7
+        )
+        accuracy.score(restaurant_id=self.rid)
+
+        def items(user):
+            r = self.client.get(
+                "/api/forecasting/accuracy/", {"lead_days": 1},
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+            )
+            self.assertEqual(r.status_code, 200)
+            return {i["menu_item_id"] for i in r.json()["items"]}
+
+        self.assertEqual(items(self.owner), {self.m1.pk, self.m2.pk})
+        self.assertEqual(items(self.superuser), {self.m1.pk, self.m2.pk, other_item.pk})
+
+
+def looped_forecast(inputs, horizon_days):
+    """The per-item dict lookup forecast that features.forecast_recursive replaced, kept as the reference."""
+    model = get_model()
+    tomorrow = inputs["today"] + timedelta(days=1)
+    series = {mid: dict(inputs["qty_map"].get(mid, {})) for mid in inputs["item_ids"]}
+    daily = {mid: [] for mid in inputs["item_ids"]}
+    for i in range(horizon_days):
+        d = tomorrow + timedelta(days=i)
+        for mid in inputs["item_ids"]:
+            s = series[mid]
+            lags = [float(s.get(d - timedelta(days=k), 0)) for k in range(1, 8)]
+            row = [d.weekday(), d.month, 1 if d.weekday() >= 5 else 0, lags[0], lags[6], sum(lags) / 7.0]
+            yhat = max(0, int(round(float(model.predict(pd.DataFrame([row], columns=FEATURES))[0]))))
+            s[d] = yhat
+            daily[mid].append(yhat)
+    return daily
+
+
+class BatchForecastTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rids = [
+            generate_restaurant(i, prefix="batch", menu_items=4, ingredients=2, days=40, sales_per_day=10)["restaurant_id"]
+            for i in range(3)
+        ]
+        cls.superuser = User.objects.create_superuser(username="batch-su", email="su@batch.test", password="x")
+        cls.owner = User.objects.filter(restaurant_id=cls.rids[0]).first()
+
+    def setUp(self):
+        services.cache.clear()
+
+    def test_vectorized_forecast_equals_the_per_item_loop(self):
+        inputs = services.load_demand_inputs(restaurant_id=self.rids[0])
+        expected = looped_forecast(inputs, 14)
+        self.assertTrue(any(any(days) for days in expected.values()))
+        self.assertEqual(services.forecast_demand(inputs, 14).daily, expected)
+
+    def test_batch_equals_per_restaurant_forecasts(self):
+        batch = services.forecast_batch(services.load_batch_inputs(self.rids))
+        self.assertEqual(list(batch), self.rids)
+        for rid in self.rids:
+            with self.subTest(restaurant=rid):
+                one = services.forecast_demand(services.load_demand_inputs(restaurant_id=rid))
+                self.assertEqual(
+                    (batch[rid].start_date, batch[rid].item_ids, batch[rid].names, batch[rid].daily),
+                    (one.start_date, one.item_ids, one.names, one.daily),
+                )
+
+    def get(self, user, **params):
+        return self.client.get(
+            "/api/forecasting/demand/batch/", params, HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def test_view_is_for_superusers(self):
+        self.assertEqual(self.get(self.owner).status_code, 403)
+
+        r = self.get(self.superuser, restaurant_ids=f"{self.rids[0]},{self.rids[2]}", horizon_days=3)
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertEqual([e["restaurant_id"] for e in body["restaurants"]], [self.rids[0], self.rids[2]])
+        single = services.predict_menu_demand(horizon_days=3, restaurant_id=self.rids[2])
+        self.assertEqual(body["restaurants"][1]["items"], single["items"])
+
+        self.assertEqual(self.get(self.superuser, restaurant_ids="1,x").status_code, 400)
+
+    def test_restaurant_cap(self):
+        with mock.patch.object(views.BatchForecastView, "max_restaurants", 2):
+            self.assertEqual(self.get(self.superuser).status_code, 400)
+            self.assertEqual(self.get(self.superuser, restaurant_ids=f"{self.rids[0]},{self.rids[1]}").status_code, 200)
+
+
+class TrainingRowsTests(SimpleTestCase):
+    def setUp(self):
+        self.start = date(2025, 12, 20)  # crosses a month and a year
+        self.history = np.random.default_rng(0).integers(0, 20, size=(3, 30)).astype(float)
+
+    def test_rows_match_day_features(self):
+        X, y, dates = training_rows(self.history, self.start)
+        n = 30 - WINDOW
+        X, y, dates = X.reshape(3, n, len(FEATURES)), y.reshape(3, n), dates.reshape(3, n)
+        for i, t in enumerate(range(WINDOW, 30)):
+            day = self.start + timedelta(days=t)
+            np.testing.assert_array_equal(X[:, i], day_features(day, self.history, t).to_numpy())
+            np.testing.assert_array_equal(y[:, i], self.history[:, t])
+            self.assertTrue((dates[:, i] == np.datetime64(day)).all())
+
+    def test_first_skips_days_before_a_series_started(self):
+        X, y, dates = training_rows(self.history, self.start, first=[0, 12, 30])
+        self.assertEqual(len(y), (30 - WINDOW) + (30 - 12))
+        self.assertEqual(dates[30 - WINDOW:].min(), np.datetime64(self.start + timedelta(days=12)))
+        np.testing.assert_array_equal(y[30 - WINDOW:], self.history[1, 12:])
+
+    def test_uncovered_day_drops_it_and_the_days_it_feeds(self):
+        covered = np.ones(self.history.shape, dtype=bool)
+        covered[:, 15] = False
+        _X, _y, dates = training_rows(self.history, self.start, covered=covered)
+        gap = np.datetime64(self.start + timedelta(days=15))
+        self.assertEqual(len(dates), 3 * (30 - WINDOW - (WINDOW + 1)))
+        self.assertFalse(((dates >= gap) & (dates <= gap + WINDOW)).any())
+        self.assertIn(gap + WINDOW + 1, dates)
+
+
+class SplitTests(SimpleTestCase):
+    def test_windows_are_disjoint_and_cover_every_day(self):
+        start, stop_from, cutoff = date(2026, 1, 1), date(2026, 1, 20), date(2026, 1, 27)
+        dates = np.datetime64(start, "D") + np.arange(40)
+        source = lambda: iter([(dates.astype("int64")[:, None], np.zeros(len(dates)), dates)])  # noqa: E731
+
+        def days(**window):
+            return {int(d) for X, _y in training._split(source(), **window) for d in X[:, 0]}
+
+        train = days(before=stop_from)
+        stop = days(after=stop_from, before=cutoff)
+        holdout = days(after=cutoff)
+        self.assertFalse(train & stop or stop & holdout or train & holdout)
+        self.assertEqual(train | stop | holdout, set(dates.astype("int64").tolist()))
+        self.assertEqual(max(train), np.datetime64(stop_from, "D").astype("int64") - 1)
+        self.assertEqual(min(holdout), np.datetime64(cutoff, "D").astype("int64"))
+
+
+class BeatsTests(SimpleTestCase):
+    def meta(self, mae, naive=2.0, served=None):
+        return {"holdout_mae": mae, "naive_lag7_mae": naive, "served_mae": served}
+
+    def test_beats(self):
+        self.assertTrue(training.beats(self.meta(1.0)))
+        self.assertTrue(training.beats(self.meta(1.0, served=1.5)))
+        self.assertFalse(training.beats(self.meta(2.0)))
+        self.assertFalse(training.beats(self.meta(1.0, served=1.0)))
+        self.assertFalse(training.beats(self.meta(None, naive=None)))
+
+
+def tiny_booster(label):
+    X = np.zeros((4, len(FEATURES)))
+    return xgb.train({"base_score": label}, xgb.DMatrix(X, label=np.full(4, label), feature_names=FEATURES), 1)
+
+
+class ModelReloadTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.enterContext(override_settings(FORECAST_MODEL_DIR=self.dir.name))
+        self.enterContext(mock.patch.multiple(ml, _MODEL=None, _LOADED=None, _ACTIVE=(None, None)))
+
+    def predict(self):
+        return float(ml.get_model().predict(pd.DataFrame(np.zeros((1, len(FEATURES))), columns=FEATURES))[0])
+
+    def test_get_model_follows_current_json(self):
+        for version, label in (("v1", 1.0), ("v2", 5.0)):
+            tiny_booster(label).save_model(os.path.join(self.dir.name, f"{version}.ubj"))
+
+        ml.activate("v1", "v1.ubj")
+        self.assertAlmostEqual(self.predict(), 1.0, places=3)
+        self.assertIs(ml.get_model(), ml.get_model())
+
+        ml.activate("v2", "v2.ubj")
+        self.assertEqual(ml.model_version(), "v2")
+        self.assertAlmostEqual(self.predict(), 5.0, places=3)
+
+
+class TrainTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rid = generate_restaurant(0, prefix="train", menu_items=4, ingredients=6, days=60, sales_per_day=20)[
+            "restaurant_id"
+        ]
+        cls.end = timezone.localdate()
+        rollup_days(cls.end - timedelta(days=59), cls.end, cls.rid)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.enterContext(override_settings(FORECAST_MODEL_DIR=self.dir.name))
+        self.enterContext(mock.patch.multiple(ml, _MODEL=None, _LOADED=None, _ACTIVE=(None, None)))
+        self.enterContext(mock.patch.object(training, "_served_model", lambda: None))
+
+    def train(self, **kwargs):
+        return training.train(self.rid, holdout_days=7, stopping_days=7, rounds=5, early_stopping=2, **kwargs)
+
+    def pointer(self):
+        path = os.path.join(self.dir.name, ml.POINTER)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def test_gap_in_the_rollup_is_not_trained_on(self):
+        gap = self.end - timedelta(days=30)
+        RolledUpDay.objects.filter(date=gap).delete()
+        MenuItemDailyCost.objects.filter(date=gap).delete()
+
+        p = training.plan(self.rid, holdout_days=7, stopping_days=7)
+        dates = np.concatenate([d for _X, _y, d in training.chunks(p)])
+        gap = np.datetime64(gap, "D")
+        self.assertFalse(((dates >= gap) & (dates <= gap + WINDOW)).any())
+        self.assertIn(gap - 1, dates)
+        self.assertIn(gap + WINDOW + 1, dates)
+
+    def test_nothing_rolled_up_raises(self):
+        RolledUpDay.objects.all().delete()
+        with self.assertRaisesMessage(ValueError, "rollup_cogs"):
+            training.plan(self.rid, holdout_days=7, stopping_days=7)
+
+    def test_activates_only_when_it_beats_or_is_forced(self):
+        with mock.patch.object(training, "beats", return_value=False):
+            meta = self.train()
+            self.assertFalse(meta["activated"])
+            self.assertIsNone(self.pointer())
+
+            self.assertFalse(self.train(activate=False, force=True)["activated"])
+            self.assertIsNone(self.pointer())
+
+            meta = self.train(force=True)
+        self.assertTrue(meta["activated"])
+        self.assertEqual(self.pointer(), {"version": meta["version"], "model": meta["model"]})
+        self.assertEqual(ml.model_version(), meta["version"])
+
+    def test_activates_when_it_beats(self):
+        with mock.patch.object(training, "beats", return_value=True):
+            meta = self.train()
+        self.assertTrue(meta["activated"])
+        self.assertEqual(self.pointer()["version"], meta["version"])
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, meta["model"])))
@@ -0,0 +1,286 @@
+"""
+Offline training of the demand model from the daily sales rollup
+(reports.MenuItemDailyCost, kept by `manage.py rollup_cogs`).
+
+The rollup is read a chunk of menu items at a time and turned into feature
+rows with NumPy (features.training_rows, the same features inference
+uses). Chunks are fed to XGBoost through a DataIter into QuantileDMatrix,
+which keeps only the quantized matrix, so years of multi-tenant history
+never sit in memory as rows.
+
+Only days the rollup has covered (reports.RolledUpDay) are trained or
+scored on: a day it never ran for has no MenuItemDailyCost rows, which is
+not the same as a day nothing sold, so a row is dropped when its day or any
+of its WINDOW lag days is uncovered.
+
+The timeline is split three ways: training days, then `stopping_days` used
+only for early stopping, then the last `holdout_days`, which nothing in
+training sees and which produce the reported error. A new model is
+activated only when it beats both the naive lag_7 forecast and the model
+currently served on that holdout (or when forced).
+"""
+import json
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from reports.models import MenuItemDailyCost, RolledUpDay
+from . import ml
+from .features import FEATURES, WINDOW, dense_history, training_rows
+
+
+def _rollup(restaurant_id):
+    qs = MenuItemDailyCost.objects.all()
+    if restaurant_id is not None:
+        qs = qs.filter(restaurant_id=restaurant_id)
+    return qs
+
+
+def _coverage(restaurant_id, start, end):
+    """{restaurant_id: [dates]} rollup_days() covered; None holds days rolled up for every restaurant."""
+    qs = RolledUpDay.objects.filter(date__gte=start, date__lte=end)
+    if restaurant_id is not None:
+        qs = qs.filter(Q(restaurant_id=restaurant_id) | Q(restaurant__isnull=True))
+    covered = {}
+    for rid, day in qs.values_list("restaurant_id", "date").order_by():
+        covered.setdefault(rid, []).append(day)
+    return covered
+
+
+def plan(restaurant_id=None, holdout_days=28, stopping_days=14):
+    """
+    Date span, early-stopping and holdout cutoffs, the days the rollup
+    covered and each menu item's restaurant and first rollup day.
+    """
+    qs = _rollup(restaurant_id)
+    span = qs.aggregate(start=Min("date"), end=Max("date"))
+    if span["start"] is None:
+        raise ValueError("The sales rollup is empty; run `manage.py rollup_cogs --days N` first.")
+
+    cutoff = span["end"] - timedelta(days=holdout_days - 1)
+    stop_from = cutoff - timedelta(days=stopping_days)
+    if (stop_from - span["start"]).days <= WINDOW:
+        raise ValueError(
+            f"Not enough history: {span['start']} .. {span['end']} leaves no training days "
+            f"before {stopping_days} early-stopping and {holdout_days} holdout days."
+        )
+
+    covered = _coverage(restaurant_id, span["start"], span["end"])
+    if not covered:
+        raise ValueError(
+            f"No day in {span['start']} .. {span['end']} is marked rolled up; run `manage.py rollup_cogs` for them."
+        )
+
+    first, restaurant_of = {}, {}
+    items = (
+        qs.values("menu_item_id", "restaurant_id")
+        .annotate(first=Min("date"))
+        .order_by("menu_item_id")
+        .values_list("menu_item_id", "restaurant_id", "first")
+    )
+    for mid, rid, day in items:
+        first[mid] = day
+        restaurant_of[mid] = rid
+    return {
+        "restaurant_id": restaurant_id,
+        "start": span["start"],
+        "end": span["end"],
+        "stop_from": stop_from,
+        "cutoff": cutoff,
+        "covered": covered,
+        "restaurant_of": restaurant_of,
+        "first": first,
+    }
+
+
+def _covered_days(p, start, days):
+    """Boolean vector over the `days` from `start` per restaurant (None: rolled up for every restaurant)."""
+    vectors = {}
+    for rid, dates in p["covered"].items():
+        v = np.zeros(days, dtype=bool)
+        v[[(d - start).days for d in dates if 0 <= (d - start).days < days]] = True
+        vectors[rid] = v
+    everyone = vectors.pop(None, np.zeros(days, dtype=bool))
+    return {rid: v | everyone for rid, v in vectors.items()}, everyone
+
+
+def chunks(p, since=None, chunk_items=500):
+    """(X, y, dates) per chunk of menu items, for days from `since` (default: the start of the rollup)."""
+    start = since or p["start"]
+    days = (p["end"] - start).days + 1
+    item_ids = list(p["first"])
+    by_restaurant, everyone = _covered_days(p, start, days)
+
+    for i in range(0, len(item_ids), chunk_items):
+        part = item_ids[i:i + chunk_items]
+        rows = (
+            _rollup(p["restaurant_id"])
+            .filter(menu_item_id__in=part, date__gte=start, date__lte=p["end"])
+            .values_list("menu_item_id", "date", "qty_sold")
+            .order_by()
+        )
+        qty_map = {}
+        for mid, day, qty in rows.iterator(chunk_size=10000):
+            qty_map.setdefault(mid, {})[day] = qty
+
+        history = dense_history(qty_map, part, start, days)
+        covered = np.stack([by_restaurant.get(p["restaurant_of"][mid], everyone) for mid in part])
+        yield training_rows(history, start, [(p["first"][mid] - start).days for mid in part], covered)
+
+
+def _split(source, before=None, after=None):
+    for X, y, dates in source:
+        keep = np.ones(len(y), dtype=bool)
+        if before is not None:
+            keep &= dates < np.datetime64(before, "D")
+        if after is not None:
+            keep &= dates >= np.datetime64(after, "D")
+        if keep.any():
+            yield X[keep], y[keep]
+
+
+class ChunkIter(xgb.DataIter):
+    """Hands (X, y) chunks to XGBoost; every pass (QuantileDMatrix makes several) re-reads the rollup."""
+
+    def __init__(self, source):
+        self._source = source
+        self._it = None
+        super().__init__(release_data=True)
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = self._source()
+        for X, y in self._it:
+            input_data(data=X, label=y, feature_names=FEATURES)
+            return True
+        return False
+
+    def reset(self):
+        self._it = None
+
+
+def _served_model():
+    try:
+        return ml.get_model()
+    except FileNotFoundError:
+        return None
+
+
+def evaluate(booster, p, chunk_items=500):
+    """
+    Holdout MAE (predictions rounded like inference) of the new model, the
+    naive lag_7 forecast and the model being served now.
+    """
+    since = p["cutoff"] - timedelta(days=WINDOW)
+    served = _served_model()
+    n, model_err, naive_err, served_err = 0, 0.0, 0.0, 0.0
+    for X, y in _split(chunks(p, since=since, chunk_items=chunk_items), after=p["cutoff"]):
+        n += len(y)
+        model_err += float(np.abs(np.maximum(0, np.rint(booster.inplace_predict(X))) - y).sum())
+        naive_err += float(np.abs(X[:, FEATURES.index("lag_7")] - y).sum())
+        if served is not None:
+            yhat = np.asarray(served.predict(pd.DataFrame(X, columns=FEATURES)), dtype=float)
+            served_err += float(np.abs(np.maximum(0, np.rint(yhat)) - y).sum())
+    return {
+        "holdout_rows": n,
+        "holdout_mae": round(model_err / n, 4) if n else None,
+        "naive_lag7_mae": round(naive_err / n, 4) if n else None,
+        "served_version": ml.model_version() if served is not None else None,
+        "served_mae": round(served_err / n, 4) if n and served is not None else None,
+    }
+
+
+def beats(meta):
+    """True when the new model's holdout MAE is below the naive baseline and the served model."""
+    mae = meta["holdout_mae"]
+    if mae is None or mae >= meta["naive_lag7_mae"]:
+        return False
+    return meta["served_mae"] is None or mae < meta["served_mae"]
+
+
+def train(
+    restaurant_id=None,
+    holdout_days=28,
+    stopping_days=14,
+    nthread=None,
+    rounds=500,
+    early_stopping=30,
+    max_depth=6,
+    learning_rate=0.05,
+    chunk_items=500,
+    activate=True,
+    force=False,
+):
+    """
+    Train, evaluate and save a versioned artifact; returns its metadata.
+    With `activate` it becomes the served model if beats() (or `force`).
+    """
+    p = plan(restaurant_id, holdout_days, stopping_days)
+    since = p["stop_from"] - timedelta(days=WINDOW)
+
+    dtrain = xgb.QuantileDMatrix(
+        ChunkIter(lambda: _split(chunks(p, chunk_items=chunk_items), before=p["stop_from"])),
+        nthread=nthread,
+    )
+    dstop = xgb.QuantileDMatrix(
+        ChunkIter(
+            lambda: _split(chunks(p, since=since, chunk_items=chunk_items), after=p["stop_from"], before=p["cutoff"])
+        ),
+        ref=dtrain,
+        nthread=nthread,
+    )
+
+    params = {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "max_depth": max_depth,
+        "eta": learning_rate,
+        "eval_metric": "mae",
+        "seed": 0,
+    }
+    if nthread:
+        params["nthread"] = nthread
+
+    booster = xgb.train(
+        params,
+        dtrain,
+        num_boost_round=rounds,
+        evals=[(dstop, "stopping")],
+        early_stopping_rounds=early_stopping,
+        verbose_eval=False,
+    )
+    booster = booster[: booster.best_iteration + 1]
+
+    version = timezone.now().strftime("%Y%m%d%H%M%S")
+    model_file = f"menu_item_demand_model-{version}.ubj"
+    meta = {
+        "version": version,
+        "model": model_file,
+        "features": FEATURES,
+        "trained_at": timezone.now().isoformat(),
+        "restaurant_id": restaurant_id,
+        "history": [str(p["start"]), str(p["end"])],
+        "stopping_from": str(p["stop_from"]),
+        "holdout_from": str(p["cutoff"]),
+        "train_rows": dtrain.num_row(),
+        "menu_items": len(p["first"]),
+        "rounds": booster.num_boosted_rounds(),
+        "params": params,
+        **evaluate(booster, p, chunk_items=chunk_items),
+    }
+    meta["activated"] = bool(activate and (force or beats(meta)))
+
+    out = ml.model_dir()
+    os.makedirs(out, exist_ok=True)
+    booster.save_model(os.path.join(out, model_file))
+    with open(os.path.join(out, f"menu_item_demand_model-{version}.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    if meta["activated"]:
+        ml.activate(version, model_file)
+    return meta
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import DemandForecastView, ForecastHistoryView, IngredientPlanView
+from .views import BatchForecastView, DemandForecastView, ForecastAccuracyView, ForecastHistoryView, IngredientPlanView
 
 urlpatterns = [
     path("demand/", DemandForecastView.as_view()),
+    path("demand/batch/", BatchForecastView.as_view()),
     path("history/", ForecastHistoryView.as_view()),
     path("ingredients_plan/", IngredientPlanView.as_view()),
+    path("accuracy/", ForecastAccuracyView.as_view()),
 
 ]
@@ -1,67 +1,156 @@
-from rest_framework.response import Response
-from rest_framework.views import APIView
+from accounts.models import Restaurant
+from core.async_api import AsyncAPIView, json_response
+from core.conditional import aconditional_get
+from core.versioning import INVENTORY, MENU, SALES
+from .accuracy import aaccuracy_report, track_days
+from .inference import ForecastBusy
+from .ml import model_version
+from .services import aget_forecasts, apredict_menu_demand
+from .services_history import apredict_past_days
+from .services_ingredients import abuild_ingredient_plan
+
+
+class ForecastView(AsyncAPIView):
+    """
+    Async base for the forecasting endpoints: queries run on the async ORM
+    and inference on forecasting.inference's bounded pool, so a burst of
+    forecasts waits there instead of occupying the workers serving checkout.
+    """
+
+    retry_after = 5
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except ForecastBusy as e:
+            response = json_response({"detail": str(e)}, status=503)
+            response["Retry-After"] = str(self.retry_after)
+            return response
+
+    def restaurant_id(self, request):
+        return None if request.user.is_superuser else getattr(request.user, "restaurant_id", None)
+
+
+class DemandForecastView(ForecastView):
+    @aconditional_get(SALES, MENU, daily=True, tag=model_version)
+    async def get(self, request):
+        horizon = int(request.GET.get("horizon_days", "7"))
+        horizon = max(1, min(horizon, 30))
 
-from inventory.permissions import IsStaff
-from .services import predict_menu_demand
-from .services_history import predict_past_days
-from .services_ingredients import build_ingredient_plan
+        top_n = int(request.GET.get("top_n", "50"))
+        top_n = max(1, min(top_n, 500))
 
+        restaurant_id = self.restaurant_id(request)
+        if not request.user.is_superuser and not restaurant_id:
+            return json_response({"detail": "User has no restaurant assigned."}, status=400)
 
-class DemandForecastView(APIView):
-    permission_classes = [IsStaff]
+        data = await apredict_menu_demand(horizon_days=horizon, top_n=top_n, restaurant_id=restaurant_id)
+        return json_response(data)
 
-    def get(self, request):
-        horizon = int(request.query_params.get("horizon_days", "7"))
-        horizon = max(1, min(horizon, 30))
 
-        top_n = int(request.query_params.get("top_n", "50"))
-        top_n = max(1, min(top_n, 500))
+class BatchForecastView(ForecastView):
+    """
+    Superusers: demand forecasts for several restaurants at once
+    (?restaurant_ids=1,2,3, default every active restaurant), one entry per
+    restaurant. All of them are loaded and scored as one batch.
+    """
 
-        restaurant_id = None if request.user.is_superuser else getattr(request.user, "restaurant_id", None)
-        if not request.user.is_superuser and not restaurant_id:
-            return Response({"detail": "User has no restaurant assigned."}, status=400)
+    max_restaurants = 100
 
-        data = predict_menu_demand(horizon_days=horizon, top_n=top_n, restaurant_id=restaurant_id)
-        return Response(data)
+    async def get(self, request):
+        if not request.user.is_superuser:
+            return json_response({"detail": "You do not have permission to perform this action."}, status=403)
 
+        horizon = int(request.GET.get("horizon_days", "7"))
+        horizon = max(1, min(horizon, 30))
 
-class ForecastHistoryView(APIView):
-    permission_classes = [IsStaff]
+        top_n = int(request.GET.get("top_n", "50"))
+        top_n = max(1, min(top_n, 500))
 
-    def get(self, request):
-        days = int(request.query_params.get("days", "14"))
-        top_n = int(request.query_params.get("top_n", "50"))
+        qs = Restaurant.objects.filter(is_active=True)
+        raw = request.GET.get("restaurant_ids", "")
+        if raw:
+            try:
+                ids = [int(x) for x in raw.split(",") if x.strip()]
+            except ValueError:
+                return json_response({"detail": "restaurant_ids must be a comma separated list of ids."}, status=400)
+            qs = qs.filter(id__in=ids)
+
+        restaurants = [r async for r in qs.values_list("id", "name")[: self.max_restaurants + 1]]
+        if len(restaurants) > self.max_restaurants:
+            return json_response(
+                {"detail": f"At most {self.max_restaurants} restaurants per request; pass restaurant_ids."},
+                status=400,
+            )
+
+        forecasts = await aget_forecasts([rid for rid, _name in restaurants])
+        return json_response(
+            {
+                "horizon_days": horizon,
+                "restaurants": [
+                    {"restaurant_id": rid, "restaurant_name": name, **forecasts[rid].payload(horizon, top_n)}
+                    for rid, name in restaurants
+                ],
+            }
+        )
 
-        restaurant_id = None if request.user.is_superuser else getattr(request.user, "restaurant_id", None)
-        if not request.user.is_superuser and not restaurant_id:
-            return Response({"detail": "User has no restaurant assigned."}, status=400)
 
-        data = predict_past_days(days=days, top_n=top_n, restaurant_id=restaurant_id)
-        return Response(data)
+class ForecastHistoryView(ForecastView):
+    @aconditional_get(SALES, MENU, daily=True, tag=model_version)
+    async def get(self, request):
+        days = int(request.GET.get("days", "14"))
+        top_n = int(request.GET.get("top_n", "50"))
 
+        restaurant_id = self.restaurant_id(request)
+        if not request.user.is_superuser and not restaurant_id:
+            return json_response({"detail": "User has no restaurant assigned."}, status=400)
+
+        data = await apredict_past_days(days=days, top_n=top_n, restaurant_id=restaurant_id)
+        return json_response(data)
 
-class IngredientPlanView(APIView):
-    permission_classes = [IsStaff]
 
-    def get(self, request):
-        horizon = int(request.query_params.get("horizon_days", "7"))
+class IngredientPlanView(ForecastView):
+    @aconditional_get(SALES, MENU, INVENTORY, daily=True, tag=model_version)
+    async def get(self, request):
+        horizon = int(request.GET.get("horizon_days", "7"))
         horizon = max(1, min(horizon, 30))
 
-        top_n = int(request.query_params.get("top_n", "50"))
+        top_n = int(request.GET.get("top_n", "50"))
         top_n = max(1, min(top_n, 500))
 
-        scope = (request.query_params.get("scope", "next7") or "next7").lower()
+        scope = (request.GET.get("scope", "next7") or "next7").lower()
         if scope not in ("tomorrow", "next7"):
             scope = "next7"
 
-        restaurant_id = None if request.user.is_superuser else getattr(request.user, "restaurant_id", None)
+        restaurant_id = self.restaurant_id(request)
         if not request.user.is_superuser and not restaurant_id:
-            return Response({"detail": "User has no restaurant assigned."}, status=400)
+            return json_response({"detail": "User has no restaurant assigned."}, status=400)
 
-        data = build_ingredient_plan(
+        data = await abuild_ingredient_plan(
             horizon_days=horizon,
             top_n_items=top_n,
             scope=scope,
             restaurant_id=restaurant_id,
         )
-        return Response(data)
+        return json_response(data)
+
+
+class ForecastAccuracyView(ForecastView):
+    """
+    MAE / MAPE / bias of past forecasts per menu item, from the totals kept by
+    `manage.py score_forecasts` (?lead_days=1 = forecasts made the day before).
+    """
+
+    async def get(self, request):
+        lead_days = int(request.GET.get("lead_days", "1"))
+        lead_days = max(1, min(lead_days, track_days()))
+
+        top_n = int(request.GET.get("top_n", "50"))
+        top_n = max(1, min(top_n, 500))
+
+        restaurant_id = self.restaurant_id(request)
+        if not request.user.is_superuser and not restaurant_id:
+            return json_response({"detail": "User has no restaurant assigned."}, status=400)
+
+        data = await aaccuracy_report(restaurant_id=restaurant_id, lead_days=lead_days, top_n=top_n)
+        return json_response(data)
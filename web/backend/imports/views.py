@@ -229,6 +229,8 @@ class ImportCSVView(APIView):
                 obj, was_created = InventoryItem.objects.update_or_create(
                     sku=sku,
                     defaults=defaults,
+                    # opening stock is valued at the given cost; afterwards purchases move avg_cost
+                    create_defaults={**defaults, "avg_cost": cost_per_unit},
                 )
                 created += 1 if was_created else 0
                 updated += 0 if was_created else 1
@@ -372,6 +374,7 @@ class ImportCSVView(APIView):
                         "discount": discount,
                         "tax": tax,
                         "created_by": request.user,
+                        "restaurant_id": request.user.restaurant_id,
                     },
                 )
 
@@ -414,6 +417,7 @@ class ImportCSVView(APIView):
 
                     SaleItem.objects.create(
                         sale=sale,
+                        restaurant_id=sale.restaurant_id,
                         menu_item=menu_item,
                         name=name,
                         qty=qty,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import InventoryItem, StockMovement
+from .models import InventoryItem, LowStockEvent, StockMovement, StockSnapshot
 
 class StockMovementInline(admin.TabularInline):
     model = StockMovement
@@ -18,3 +18,15 @@ class StockMovementAdmin(admin.ModelAdmin):
     list_display = ("id", "created_at", "item", "movement_type", "quantity", "created_by", "reason")
     list_filter = ("movement_type", "created_at")
     search_fields = ("item__name", "item__sku", "reason", "note")
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "item", "closing_stock", "restaurant")
+    list_filter = ("date",)
+    search_fields = ("item__name", "item__sku")
+
+@admin.register(LowStockEvent)
+class LowStockEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "item", "kind", "stock", "reorder_level", "restaurant")
+    list_filter = ("kind", "created_at")
+    search_fields = ("item__name", "item__sku")
@@ -0,0 +1,94 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from core import events as live
+from .models import LowStockEvent
+
+# woken after a commit that recorded events; waiters in other processes fall
+# back to re-checking the table every POLL_SECONDS
+_changed = threading.Condition()
+POLL_SECONDS = 2.0
+
+# each waiting long-poll holds a worker thread; past LOW_STOCK_MAX_WAITERS
+# requests answer immediately instead of waiting
+_waiters = None
+_waiters_lock = threading.Lock()
+
+
+def _waiter_slots():
+    global _waiters
+    with _waiters_lock:
+        if _waiters is None:
+            _waiters = threading.BoundedSemaphore(getattr(settings, "LOW_STOCK_MAX_WAITERS", 8))
+    return _waiters
+
+
+def crossing(item, old_stock):
+    """
+    Unsaved LowStockEvent if moving `item` from `old_stock` to its current
+    stock crossed the reorder level, else None. Inactive items never alert.
+    """
+    if not item.is_active or old_stock == item.current_stock:
+        return None
+    level = item.reorder_level
+    if old_stock > level >= item.current_stock:
+        kind = LowStockEvent.Kind.LOW
+    elif old_stock <= level < item.current_stock:
+        kind = LowStockEvent.Kind.RECOVERED
+    else:
+        return None
+    return LowStockEvent(
+        item=item,
+        restaurant_id=item.restaurant_id,
+        kind=kind,
+        stock=item.current_stock,
+        reorder_level=level,
+    )
+
+
+def record(events):
+    """Save the non-None events; waiters are woken once the transaction commits."""
+    events = [e for e in events if e is not None]
+    if not events:
+        return []
+    events = LowStockEvent.objects.bulk_create(events)
+    transaction.on_commit(_notify)
+    for e in events:
+        live.publish(
+            e.restaurant_id,
+            live.STOCK_LOW,
+            {"id": e.pk, "item": e.item_id, "kind": e.kind, "stock": e.stock, "reorder_level": e.reorder_level},
+        )
+    return events
+
+
+def _notify():
+    with _changed:
+        _changed.notify_all()
+
+
+def wait_for_events(queryset, after, timeout):
+    """
+    Events in `queryset` with id > after, waiting up to `timeout` seconds for
+    the first one to appear (long-poll). Returns a possibly empty list.
+    When LOW_STOCK_MAX_WAITERS requests are already waiting it does not wait.
+    """
+    qs = queryset.filter(pk__gt=after).order_by("pk")
+    slots = _waiter_slots()
+    if timeout <= 0 or not slots.acquire(blocking=False):
+        return list(qs[:200])
+
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            events = list(qs[:200])
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            with _changed:
+                _changed.wait(min(remaining, POLL_SECONDS))
+    finally:
+        slots.release()
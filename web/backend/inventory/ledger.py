@@ -0,0 +1,137 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from core.dates import day_bounds
+from .models import InventoryItem, StockMovement, StockSnapshot
+
+ZERO = Value(Decimal("0.00"), output_field=DecimalField(max_digits=12, decimal_places=2))
+COST_Q = Decimal("0.0001")
+
+
+def receive(item, qty, unit_cost):
+    """
+    Add purchased stock to `item` (not saved): avg_cost becomes the weighted
+    average of the stock on hand and the new lot. Negative stock counts as 0.
+    """
+    on_hand = max(item.current_stock, Decimal("0"))
+    if on_hand + qty > 0:
+        item.avg_cost = ((on_hand * item.avg_cost + qty * unit_cost) / (on_hand + qty)).quantize(COST_Q)
+    else:
+        item.avg_cost = Decimal(unit_cost).quantize(COST_Q)
+    item.current_stock = (item.current_stock + qty).quantize(Decimal("0.01"))
+    item.cost_per_unit = unit_cost
+
+
+def unreceive(item, qty, unit_cost):
+    """Take a voided purchase lot back out of `item` (not saved), undoing its effect on avg_cost."""
+    remaining = item.current_stock - qty
+    if remaining > 0:
+        avg = (item.current_stock * item.avg_cost - qty * unit_cost) / remaining
+        if avg >= 0:
+            item.avg_cost = avg.quantize(COST_Q)
+    item.current_stock = remaining.quantize(Decimal("0.01"))
+
+
+def signed_quantity():
+    """Movement quantity as a stock delta: OUT subtracts, IN and ADJUST (+/-) add."""
+    return Case(
+        When(movement_type=StockMovement.Type.OUT, then=-F("quantity")),
+        default=F("quantity"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def _moved(lo=None, hi=None):
+    # sum of one item's movements in [lo, hi), correlated on the outer InventoryItem
+    qs = StockMovement.objects.filter(item=OuterRef("pk"))
+    if lo is not None:
+        qs = qs.filter(created_at__gte=lo)
+    if hi is not None:
+        qs = qs.filter(created_at__lt=hi)
+    total = qs.order_by().values("item").annotate(s=Sum(signed_quantity())).values("s")[:1]
+    return Coalesce(Subquery(total), ZERO)
+
+
+def with_stock_at(items, day):
+    """
+    Annotate `items` with stock_at: closing stock at the end of `day`.
+
+    Anchored on the nearest snapshot on/before `day` (plus movements since),
+    else the nearest one after it (minus movements in between), else the live
+    current_stock (minus everything after `day`). Each branch reads one
+    snapshot row and a slice of the (item, created_at) index.
+    """
+    end = day_bounds(day)[1]
+    snaps = StockSnapshot.objects.filter(item=OuterRef("pk"))
+    prev = snaps.filter(date__lte=day).order_by("-date")
+    nxt = snaps.filter(date__gt=day).order_by("date")
+
+    items = items.annotate(
+        prev_as_of=Subquery(prev.values("as_of")[:1]),
+        prev_stock=Subquery(prev.values("closing_stock")[:1]),
+        next_as_of=Subquery(nxt.values("as_of")[:1]),
+        next_stock=Subquery(nxt.values("closing_stock")[:1]),
+    )
+    return items.annotate(
+        stock_at=Case(
+            When(prev_as_of__isnull=False, then=F("prev_stock") + _moved(OuterRef("prev_as_of"), end)),
+            When(next_as_of__isnull=False, then=F("next_stock") - _moved(end, OuterRef("next_as_of"))),
+            default=F("current_stock") - _moved(end),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+
+def stock_at(items, day):
+    """{item_id: Decimal} for the items in queryset `items` at the end of `day`."""
+    return {
+        r["id"]: r["stock_at"].quantize(Decimal("0.01"))
+        for r in with_stock_at(items, day).values("id", "stock_at")
+    }
+
+
+@transaction.atomic
+def snapshot_day(day, restaurant_id=None):
+    """
+    Upsert closing snapshots for `day` (must be over) from the previous
+    snapshot plus that day's movements. Returns the number of rows written.
+    """
+    items = InventoryItem.objects.all()
+    if restaurant_id is not None:
+        items = items.filter(restaurant_id=restaurant_id)
+
+    as_of = day_bounds(day)[1]
+    # avg_cost is the value when the snapshot is taken (nightly: the day's closing cost)
+    rows = [
+        StockSnapshot(
+            item_id=r["id"],
+            restaurant_id=r["restaurant_id"],
+            date=day,
+            as_of=as_of,
+            closing_stock=r["stock_at"].quantize(Decimal("0.01")),
+            avg_cost=r["avg_cost"],
+        )
+        for r in with_stock_at(items, day).values("id", "restaurant_id", "avg_cost", "stock_at").iterator(chunk_size=2000)
+    ]
+    StockSnapshot.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["item", "date"],
+        update_fields=["closing_stock", "avg_cost", "as_of", "restaurant"],
+    )
+    return len(rows)
+
+
+def snapshot_range(start, end, restaurant_id=None):
+    """Snapshots for each day in [start, end], oldest first so each day builds on the previous one."""
+    written = 0
+    day = start
+    while day <= end:
+        written += snapshot_day(day, restaurant_id=restaurant_id)
+        day += timedelta(days=1)
+    return written
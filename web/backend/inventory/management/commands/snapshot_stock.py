@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.ledger import snapshot_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Write daily closing stock snapshots (default: yesterday) used by the stock_at endpoints. "
+        "Run nightly; --days backfills older days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Last day to snapshot, YYYY-MM-DD (default: yesterday)")
+        parser.add_argument("--days", type=int, default=1, help="Snapshot this many days ending at --date")
+        parser.add_argument("--restaurant", type=int, help="Only this restaurant id")
+
+    def handle(self, *args, **opts):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        end = parse_date(opts["date"]) if opts["date"] else yesterday
+        if end is None:
+            raise CommandError(f"Invalid --date '{opts['date']}'")
+        if end > yesterday:
+            raise CommandError("Only finished days can be snapshotted.")
+
+        start = end - timedelta(days=max(1, opts["days"]) - 1)
+        written = snapshot_range(start, end, restaurant_id=opts["restaurant"])
+        self.stdout.write(f"{written} snapshot rows for {start} .. {end}")
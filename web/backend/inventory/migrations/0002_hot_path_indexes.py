@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('current_stock__lte', models.F('reorder_level')), ('is_active', True)), fields=['restaurant', 'name'], name='invitem_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['restaurant', 'created_at'], name='stockmove_rest_created_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_email_lower_uniq'),
+        ('inventory', '0003_backfill_stockmovement_restaurant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('as_of', models.DateTimeField()),
+                ('closing_stock', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['item', 'created_at'], name='stockmove_item_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshot', to='accounts.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['restaurant', 'date'], name='inventory_s_restaur_87bdc7_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('item', 'date'), name='stock_snapshot_item_date_uniq'),
+        ),
+    ]
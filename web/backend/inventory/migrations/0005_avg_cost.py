@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_avg_cost(apps, schema_editor):
+    # best available value for the stock already on hand
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    InventoryItem.objects.update(avg_cost=F("cost_per_unit"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stock_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='avg_cost',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='avg_cost',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14),
+        ),
+        migrations.RunPython(seed_avg_cost, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_email_lower_uniq'),
+        ('inventory', '0005_avg_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('LOW', 'Fell to/below reorder level'), ('RECOVERED', 'Back above reorder level')], max_length=10)),
+                ('stock', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reorder_level', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_events', to='inventory.inventoryitem')),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_event', to='accounts.restaurant')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['restaurant', 'id'], name='lowstock_rest_id_idx')],
+            },
+        ),
+    ]
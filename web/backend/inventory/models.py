@@ -23,7 +23,9 @@ class InventoryItem(models.Model):
     current_stock = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
     reorder_level = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
 
-    cost_per_unit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    cost_per_unit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))  # last purchase price
+    # weighted-average cost of the stock on hand, moved by purchases (inventory.ledger.receive)
+    avg_cost = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal("0.0000"))
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -31,7 +33,15 @@ class InventoryItem(models.Model):
 
     class Meta:
         ordering = ["name"]
-        indexes = [models.Index(fields=["restaurant", "sku"])]
+        indexes = [
+            models.Index(fields=["restaurant", "sku"]),
+            # low_stock: only active items at/below reorder level, listed by name
+            models.Index(
+                fields=["restaurant", "name"],
+                condition=models.Q(is_active=True, current_stock__lte=models.F("reorder_level")),
+                name="invitem_low_stock_idx",
+            ),
+        ]
     def __str__(self):
         return f"{self.name} ({self.sku})"
 
@@ -65,6 +75,69 @@ class StockMovement(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["restaurant", "item", "movement_type"])]
+        indexes = [
+            models.Index(fields=["restaurant", "item", "movement_type"]),
+            models.Index(fields=["restaurant", "created_at"], name="stockmove_rest_created_idx"),
+            # stock_at: one item's movements between a snapshot and the asked date
+            models.Index(fields=["item", "created_at"], name="stockmove_item_created_idx"),
+        ]
     def __str__(self):
         return f"{self.movement_type} {self.quantity} {self.item.sku}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Closing stock of an item at the end of a local day, written by
+    `manage.py snapshot_stock`. `as_of` is the end of that day; stock at any
+    date is the nearest snapshot plus the movements in between.
+    """
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="snapshots")
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="stock_snapshot",
+        null=True,
+        blank=True,
+    )
+    date = models.DateField()
+    as_of = models.DateTimeField()
+    closing_stock = models.DecimalField(max_digits=12, decimal_places=2)
+    avg_cost = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal("0.0000"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [models.UniqueConstraint(fields=["item", "date"], name="stock_snapshot_item_date_uniq")]
+        indexes = [models.Index(fields=["restaurant", "date"])]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.date}: {self.closing_stock}"
+
+
+class LowStockEvent(models.Model):
+    """An item crossing its reorder level, recorded by the stock write paths (inventory.alerts)."""
+
+    class Kind(models.TextChoices):
+        LOW = "LOW", "Fell to/below reorder level"
+        RECOVERED = "RECOVERED", "Back above reorder level"
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="low_stock_events")
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="low_stock_event",
+        null=True,
+        blank=True,
+    )
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    stock = models.DecimalField(max_digits=12, decimal_places=2)
+    reorder_level = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        # clients resume with ?after=<last id>
+        indexes = [models.Index(fields=["restaurant", "id"], name="lowstock_rest_id_idx")]
+
+    def __str__(self):
+        return f"{self.kind} {self.item_id} ({self.stock} <= {self.reorder_level})"
@@ -1,8 +1,11 @@
 from decimal import Decimal
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import InventoryItem, StockMovement
+from core.versioning import INVENTORY, bump
+from . import alerts
+from .models import InventoryItem, LowStockEvent, StockMovement
 
 
 class InventoryItemSerializer(serializers.ModelSerializer):
@@ -19,10 +22,17 @@ class InventoryItemSerializer(serializers.ModelSerializer):
             "current_stock",
             "reorder_level",
             "cost_per_unit",
+            "avg_cost",
             "is_active",
             "created_at",
             "updated_at",
         )
+        read_only_fields = ("avg_cost",)
+
+    def create(self, validated_data):
+        # opening stock is valued at the entered cost until the first purchase
+        validated_data["avg_cost"] = validated_data.get("cost_per_unit", Decimal("0.00"))
+        return super().create(validated_data)
 
 
 class StockMovementSerializer(serializers.ModelSerializer):
@@ -47,6 +57,15 @@ class StockMovementSerializer(serializers.ModelSerializer):
         )
 
 
+class LowStockEventSerializer(serializers.ModelSerializer):
+    item_name = serializers.CharField(source="item.name", read_only=True)
+    item_sku = serializers.CharField(source="item.sku", read_only=True)
+
+    class Meta:
+        model = LowStockEvent
+        fields = ("id", "created_at", "item", "item_name", "item_sku", "kind", "stock", "reorder_level")
+
+
 class StockMovementCreateSerializer(serializers.Serializer):
     item = serializers.IntegerField()
     movement_type = serializers.ChoiceField(choices=StockMovement.Type.choices)
@@ -87,11 +106,14 @@ class StockMovementCreateSerializer(serializers.Serializer):
         if new_stock < 0:
             raise serializers.ValidationError({"quantity": "Not enough stock to remove."})
 
+        old_stock = item.current_stock
         item.current_stock = new_stock
         item.save(update_fields=["current_stock", "updated_at"])
+        alerts.record([alerts.crossing(item, old_stock)])
 
         movement = StockMovement.objects.create(
             item=item,
+            restaurant_id=item.restaurant_id,
             movement_type=movement_type,
             quantity=qty,
             reason=validated_data.get("reason", ""),
@@ -99,3 +121,109 @@ class StockMovementCreateSerializer(serializers.Serializer):
             created_by=user,
         )
         return movement
+
+
+class StockMovementBulkLineSerializer(serializers.Serializer):
+    item = serializers.IntegerField()
+    movement_type = serializers.ChoiceField(choices=StockMovement.Type.choices, required=False)
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    counted = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, min_value=Decimal("0"))
+    reason = serializers.CharField(required=False, allow_blank=True)
+    note = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        if "counted" in attrs:
+            if "movement_type" in attrs or "quantity" in attrs:
+                raise serializers.ValidationError("Give either counted or movement_type + quantity, not both.")
+        elif "movement_type" not in attrs or "quantity" not in attrs:
+            raise serializers.ValidationError("movement_type and quantity are required (or counted).")
+        return attrs
+
+
+class StockMovementBulkSerializer(serializers.Serializer):
+    """
+    Stocktake / batch adjustments. Each line is a movement (IN/OUT/ADJUST) or
+    an absolute `counted` quantity, turned into an ADJUST for the difference.
+    mode=atomic: any bad line rejects the batch. mode=partial: bad lines are
+    reported and skipped, the rest is applied.
+    """
+    MAX_LINES = 2000
+
+    mode = serializers.ChoiceField(choices=["atomic", "partial"], default="atomic")
+    reason = serializers.CharField(required=False, allow_blank=True, default="Stocktake")
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+    lines = StockMovementBulkLineSerializer(many=True, allow_empty=False, max_length=MAX_LINES)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context["request"].user
+        restaurant_id = getattr(user, "restaurant_id", None)
+        if not restaurant_id and not user.is_superuser:
+            raise serializers.ValidationError({"detail": "User has no restaurant assigned."})
+
+        lines = validated_data["lines"]
+        # one ordered locking query for every item (pk order: no deadlocks between stocktakes)
+        item_qs = InventoryItem.objects.select_for_update().filter(pk__in={l["item"] for l in lines}).order_by("pk")
+        if not user.is_superuser:
+            item_qs = item_qs.filter(restaurant_id=restaurant_id)
+        items = {it.pk: it for it in item_qs}
+
+        stock = {pk: it.current_stock for pk, it in items.items()}
+        errors, planned = [], []
+        for idx, l in enumerate(lines):
+            item = items.get(l["item"])
+            if not item:
+                errors.append({"line": idx, "item": l["item"], "error": "Inventory item not found in your restaurant."})
+                continue
+
+            if "counted" in l:
+                movement_type = StockMovement.Type.ADJUST
+                qty = delta = (l["counted"] - stock[item.pk]).quantize(Decimal("0.01"))
+                if not delta:
+                    continue
+            else:
+                movement_type, qty = l["movement_type"], l["quantity"]
+                if movement_type in ["IN", "OUT"] and qty <= 0:
+                    errors.append({"line": idx, "item": item.pk, "error": "Quantity must be > 0 for IN/OUT."})
+                    continue
+                delta = -qty if movement_type == "OUT" else qty
+
+            new_stock = (stock[item.pk] + delta).quantize(Decimal("0.01"))
+            if new_stock < 0:
+                errors.append({"line": idx, "item": item.pk, "error": f"Not enough stock (have {stock[item.pk]})."})
+                continue
+
+            stock[item.pk] = new_stock
+            planned.append(
+                StockMovement(
+                    item=item,
+                    restaurant_id=item.restaurant_id,
+                    movement_type=movement_type,
+                    quantity=qty,
+                    reason=l.get("reason", validated_data["reason"]),
+                    note=l.get("note", validated_data["note"]),
+                    created_by=user,
+                )
+            )
+
+        if errors and validated_data["mode"] == "atomic":
+            # nothing written yet; the view answers 400 with the line errors
+            return {"applied": 0, "errors": errors, "movements": []}
+
+        changed = [it for pk, it in items.items() if stock[pk] != it.current_stock]
+        now = timezone.now()
+        events = []
+        for it in changed:
+            old_stock = it.current_stock
+            it.current_stock = stock[it.pk]
+            it.updated_at = now  # bulk_update skips auto_now
+            events.append(alerts.crossing(it, old_stock))
+        InventoryItem.objects.bulk_update(changed, ["current_stock", "updated_at"], batch_size=500)
+        movements = StockMovement.objects.bulk_create(planned, batch_size=500)
+        alerts.record(events)
+
+        # bulk_update sends no post_save, so the cache versions are bumped here
+        for rid in {it.restaurant_id for it in changed}:
+            bump(rid, INVENTORY)
+
+        return {"applied": len(movements), "errors": errors, "movements": movements}
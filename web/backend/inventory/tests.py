@@ -1,3 +1,443 @@
-from django.test import TestCase
+import time
+from datetime import datetime, timedelta
+from datetime import time as clock
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.synthetic import generate_restaurant
+from core.versioning import INVENTORY, get_versions
+from menu.models import MenuItem, RecipeLine
+from purchases.models import Supplier
+from . import alerts
+from .ledger import receive, snapshot_day, snapshot_range, stock_at, unreceive
+from .models import InventoryItem, LowStockEvent, StockMovement, StockSnapshot
+
+
+def explain(qs):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # fresh statistics: without them every tiny table looks like one row
+            cursor.execute(f"ANALYZE {qs.model._meta.db_table}")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return qs.explain()
+
+
+class HotPathIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rid = generate_restaurant(0, prefix="idx", menu_items=5, ingredients=5, days=2, sales_per_day=2)["restaurant_id"]
+
+    def test_low_stock_uses_partial_index(self):
+        # same filter as InventoryItemViewSet.low_stock
+        qs = InventoryItem.objects.filter(
+            restaurant_id=self.rid, is_active=True, current_stock__lte=F("reorder_level")
+        ).order_by("name")
+        self.assertIn("invitem_low_stock_idx", explain(qs))
+
+    def test_movements_by_restaurant_use_created_at_index(self):
+        qs = StockMovement.objects.filter(restaurant_id=self.rid).order_by("-created_at")
+        self.assertIn("stockmove_rest_created_idx", explain(qs))
+
+
+class BulkMovementTests(TestCase):
+    url = "/api/inventory/movements/bulk/"
+
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="bulk", menu_items=2, ingredients=3, days=0, sales_per_day=0)
+        cls.rid = ids["restaurant_id"]
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.a, cls.b, cls.c = InventoryItem.objects.filter(restaurant_id=cls.rid).order_by("pk")[:3]
+        other = generate_restaurant(1, prefix="bulk", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.foreign = InventoryItem.objects.filter(restaurant_id=other["restaurant_id"]).first()
+        InventoryItem.objects.filter(pk__in=[cls.a.pk, cls.b.pk, cls.c.pk]).update(current_stock=Decimal("10.00"))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def post(self, lines, **payload):
+        return self.client.post(self.url, {"lines": lines, **payload}, format="json")
+
+    def stock(self, item):
+        return InventoryItem.objects.get(pk=item.pk).current_stock
+
+    def test_line_validation(self):
+        bad = [
+            {"item": self.a.pk},
+            {"item": self.a.pk, "counted": "5", "movement_type": "IN", "quantity": "1"},
+            {"item": self.a.pk, "counted": "-1"},
+            {"item": self.a.pk, "movement_type": "MOVE", "quantity": "1"},
+        ]
+        for line in bad:
+            with self.subTest(line=line):
+                r = self.post([line])
+                self.assertEqual(r.status_code, 400)
+                self.assertIn("lines", r.data)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertFalse(StockMovement.objects.filter(restaurant_id=self.rid).exists())
+
+    def test_lines_for_one_item_are_applied_in_order(self):
+        r = self.post(
+            [
+                {"item": self.a.pk, "movement_type": "IN", "quantity": "5"},
+                {"item": self.a.pk, "movement_type": "OUT", "quantity": "12"},
+                {"item": self.a.pk, "counted": "7.50"},
+            ]
+        )
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data["applied"], 3)
+        # 10 + 5 - 12 = 3, then counted 7.50 is an ADJUST of +4.50
+        self.assertEqual(r.data["movements"][2]["movement_type"], "ADJUST")
+        self.assertEqual(Decimal(r.data["movements"][2]["quantity"]), Decimal("4.50"))
+        self.assertEqual(self.stock(self.a), Decimal("7.50"))
+
+    def test_inventory_version_bumped(self):
+        before = get_versions(self.rid, [INVENTORY])[INVENTORY][0]
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.post([{"item": self.a.pk, "counted": "4"}, {"item": self.b.pk, "counted": "6"}])
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(get_versions(self.rid, [INVENTORY])[INVENTORY][0], before + 1)
+
+    def test_nothing_to_apply_is_200(self):
+        r = self.post([{"item": self.a.pk, "counted": "10"}])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["applied"], 0)
+
+    def test_atomic_rejects_whole_batch_on_insufficient_stock(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.post(
+                [
+                    {"item": self.a.pk, "movement_type": "OUT", "quantity": "4"},
+                    {"item": self.b.pk, "movement_type": "OUT", "quantity": "11"},
+                ]
+            )
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual([e["line"] for e in r.data["errors"]], [1])
+        self.assertEqual(self.stock(self.a), Decimal("10.00"))
+        self.assertEqual(self.stock(self.b), Decimal("10.00"))
+        self.assertFalse(StockMovement.objects.filter(restaurant_id=self.rid).exists())
+        self.assertEqual(get_versions(self.rid, [INVENTORY])[INVENTORY][0], 0)
+
+    def test_partial_skips_bad_lines(self):
+        r = self.post(
+            [
+                {"item": self.a.pk, "movement_type": "OUT", "quantity": "4"},
+                {"item": self.b.pk, "movement_type": "OUT", "quantity": "11"},
+                {"item": self.foreign.pk, "counted": "1"},
+            ],
+            mode="partial",
+        )
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data["applied"], 1)
+        self.assertEqual([e["line"] for e in r.data["errors"]], [1, 2])
+        self.assertEqual(self.stock(self.a), Decimal("6.00"))
+        self.assertEqual(self.stock(self.b), Decimal("10.00"))
+        self.assertEqual(self.stock(self.foreign), self.foreign.current_stock)
+
+
+class WeightedAverageCostTests(SimpleTestCase):
+    def item(self, stock, avg_cost):
+        return InventoryItem(current_stock=Decimal(stock), avg_cost=Decimal(avg_cost), cost_per_unit=Decimal(avg_cost))
+
+    def test_receive_weights_by_quantity(self):
+        it = self.item("10", "2.0000")
+        receive(it, Decimal("30"), Decimal("4.00"))
+        # (10 * 2 + 30 * 4) / 40
+        self.assertEqual(it.avg_cost, Decimal("3.5000"))
+        self.assertEqual(it.current_stock, Decimal("40.00"))
+        self.assertEqual(it.cost_per_unit, Decimal("4.00"))
+
+    def test_receive_ignores_negative_stock(self):
+        it = self.item("-5", "9.0000")
+        receive(it, Decimal("10"), Decimal("3.00"))
+        self.assertEqual(it.avg_cost, Decimal("3.0000"))
+        self.assertEqual(it.current_stock, Decimal("5.00"))
+
+    def test_unreceive_undoes_receive(self):
+        it = self.item("10", "2.0000")
+        receive(it, Decimal("30"), Decimal("4.00"))
+        unreceive(it, Decimal("30"), Decimal("4.00"))
+        self.assertEqual(it.avg_cost, Decimal("2.0000"))
+        self.assertEqual(it.current_stock, Decimal("10.00"))
+
+    def test_unreceive_keeps_cost_when_lot_already_used(self):
+        it = self.item("5", "3.5000")
+        unreceive(it, Decimal("30"), Decimal("4.00"))
+        self.assertEqual(it.avg_cost, Decimal("3.5000"))
+        self.assertEqual(it.current_stock, Decimal("-25.00"))
+
+
+class StockAtTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="ledger", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.rid = ids["restaurant_id"]
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.item = InventoryItem.objects.get(restaurant_id=cls.rid)
+        other = generate_restaurant(1, prefix="ledger", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.foreign = InventoryItem.objects.get(restaurant_id=other["restaurant_id"])
+
+        today = timezone.localdate()
+        cls.d1, cls.d2, cls.d3 = (today - timedelta(days=n) for n in (5, 3, 1))
+        StockMovement.objects.filter(item__in=[cls.item, cls.foreign]).delete()
+        # 0 -> 10 (d1) -> 6 (d2) -> 20 (d3) = current stock; the other restaurant moves on d2 too
+        for item, day, kind, qty in (
+            (cls.item, cls.d1, "IN", "10"),
+            (cls.item, cls.d2, "OUT", "4"),
+            (cls.item, cls.d3, "IN", "14"),
+            (cls.foreign, cls.d2, "IN", "50"),
+        ):
+            m = StockMovement.objects.create(
+                item=item, restaurant_id=item.restaurant_id, movement_type=kind, quantity=Decimal(qty), created_by=cls.owner
+            )
+            at = timezone.make_aware(datetime.combine(day, clock(12)))
+            StockMovement.objects.filter(pk=m.pk).update(created_at=at)
+        InventoryItem.objects.filter(pk=cls.item.pk).update(current_stock=Decimal("20.00"))
+        InventoryItem.objects.filter(pk=cls.foreign.pk).update(current_stock=Decimal("50.00"))
+
+    def stock(self, day):
+        return stock_at(InventoryItem.objects.filter(restaurant_id=self.rid), day)
+
+    def test_without_snapshots(self):
+        expected = {
+            self.d1 - timedelta(days=1): "0",
+            self.d1: "10",
+            self.d2: "6",
+            self.d3: "20",
+            timezone.localdate(): "20",
+        }
+        for day, value in expected.items():
+            with self.subTest(day=day):
+                self.assertEqual(self.stock(day), {self.item.pk: Decimal(value)})
+
+    def test_anchored_on_the_nearest_snapshot(self):
+        snapshot_day(self.d2, self.rid)
+        # a count recorded in the snapshot wins over the movement history
+        StockSnapshot.objects.filter(item=self.item).update(closing_stock=Decimal("100.00"))
+        expected = {
+            self.d1 - timedelta(days=1): "94",  # before the first snapshot: minus d1 and d2
+            self.d1: "104",
+            self.d2: "100",  # on the snapshot day
+            self.d3: "114",  # movements after the snapshot
+        }
+        for day, value in expected.items():
+            with self.subTest(day=day):
+                self.assertEqual(self.stock(day)[self.item.pk], Decimal(value))
+
+    def test_snapshots_build_on_each_other_per_restaurant(self):
+        written = snapshot_range(self.d1, self.d3, restaurant_id=self.rid)
+        self.assertEqual(written, (self.d3 - self.d1).days + 1)  # one item, one row a day
+        closing = dict(StockSnapshot.objects.filter(item=self.item).values_list("date", "closing_stock"))
+        self.assertEqual(closing[self.d1], Decimal("10.00"))
+        self.assertEqual(closing[self.d2], Decimal("6.00"))
+        self.assertEqual(closing[self.d3], Decimal("20.00"))
+        self.assertFalse(StockSnapshot.objects.filter(item=self.foreign).exists())
+        self.assertEqual(stock_at(InventoryItem.objects.filter(pk=self.foreign.pk), self.d2), {self.foreign.pk: Decimal("50.00")})
+
+    def test_views(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = f"/api/inventory/items/{self.item.pk}/stock_at/"
+        r = client.get(url, {"date": str(self.d2)})
+        self.assertEqual(r.data, {"item": self.item.pk, "date": str(self.d2), "stock": "6.00"})
+        self.assertEqual(client.get(f"/api/inventory/items/{self.foreign.pk}/stock_at/", {"date": str(self.d2)}).status_code, 404)
+
+        r = client.get("/api/inventory/items/stock_at/", {"date": str(self.d1), "ids": f"{self.item.pk},{self.foreign.pk}"})
+        self.assertEqual(r.data, [{"item": self.item.pk, "date": str(self.d1), "stock": "10.00"}])
+
+        for params in ({}, {"date": "2026-02-30"}, {"date": "soon"}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get(url, params).status_code, 400)
+        self.assertEqual(client.get("/api/inventory/items/stock_at/", {"date": str(self.d1), "ids": "1,x"}).status_code, 400)
+
+
+class LowStockCrossingTests(SimpleTestCase):
+    def crossing(self, old, new, level="5", active=True):
+        it = InventoryItem(current_stock=Decimal(new), reorder_level=Decimal(level), is_active=active)
+        e = alerts.crossing(it, Decimal(old))
+        return e and e.kind
+
+    def test_kinds(self):
+        self.assertEqual(self.crossing("6", "5"), LowStockEvent.Kind.LOW)
+        self.assertEqual(self.crossing("5", "5.01"), LowStockEvent.Kind.RECOVERED)
+        self.assertEqual(self.crossing("10", "0"), LowStockEvent.Kind.LOW)
+
+    def test_no_crossing(self):
+        self.assertIsNone(self.crossing("10", "6"))
+        self.assertIsNone(self.crossing("4", "2"))
+        self.assertIsNone(self.crossing("5", "5"))
+        self.assertIsNone(self.crossing("6", "5", active=False))
+
+
+class LowStockWritePathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="alert", menu_items=1, ingredients=2, days=0, sales_per_day=0)
+        cls.rid = ids["restaurant_id"]
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.a, cls.b = InventoryItem.objects.filter(restaurant_id=cls.rid).order_by("pk")
+        InventoryItem.objects.filter(restaurant_id=cls.rid).update(
+            current_stock=Decimal("10.00"), reorder_level=Decimal("5.00"), is_active=True
+        )
+        cls.menu_item = MenuItem.objects.get(restaurant_id=cls.rid)
+        RecipeLine.objects.filter(menu_item=cls.menu_item).delete()
+        RecipeLine.objects.create(menu_item=cls.menu_item, ingredient=cls.a, qty=Decimal("3.00"))
+        cls.supplier = Supplier.objects.get(restaurant_id=cls.rid)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def set_stock(self, item, stock, **fields):
+        InventoryItem.objects.filter(pk=item.pk).update(current_stock=Decimal(stock), **fields)
+
+    def events(self):
+        return [(e.item_id, e.kind, e.stock) for e in LowStockEvent.objects.filter(restaurant_id=self.rid)]
+
+    def move(self, item, movement_type, quantity):
+        r = self.client.post(
+            "/api/inventory/movements/",
+            {"item": item.pk, "movement_type": movement_type, "quantity": quantity},
+            format="json",
+        )
+        self.assertEqual(r.status_code, 201, r.data)
+
+    def test_sale_deduction(self):
+        r = self.client.post(
+            "/api/sales/sales/",
+            {"payment_method": "CASH", "status": "PAID", "items": [{"menu_item": self.menu_item.pk, "qty": 2}]},
+            format="json",
+        )
+        self.assertEqual(r.status_code, 201, r.data)
+        self.assertEqual(self.events(), [(self.a.pk, "LOW", Decimal("4.00"))])
+
+    def test_purchase_post_and_void(self):
+        self.set_stock(self.a, "4")
+        r = self.client.post(
+            "/api/purchases/invoices/",
+            {
+                "supplier": self.supplier.pk,
+                "invoice_date": "2026-02-01",
+                "lines": [{"item": self.a.pk, "qty": "3", "unit_cost": "2.00"}],
+            },
+            format="json",
+        )
+        self.assertEqual(r.status_code, 201, r.data)
+        self.assertEqual(self.events(), [(self.a.pk, "RECOVERED", Decimal("7.00"))])
+
+        r = self.client.post(f"/api/purchases/invoices/{r.data['id']}/void/", {"reason": "dup"}, format="json")
+        self.assertEqual(r.status_code, 200, r.data)
+        self.assertEqual(self.events()[1:], [(self.a.pk, "LOW", Decimal("4.00"))])
+
+    def test_manual_movement(self):
+        self.move(self.a, "OUT", "5")
+        self.move(self.a, "ADJUST", "0.50")
+        self.assertEqual(
+            self.events(),
+            [(self.a.pk, "LOW", Decimal("5.00")), (self.a.pk, "RECOVERED", Decimal("5.50"))],
+        )
+
+    def test_bulk_movement(self):
+        r = self.client.post(
+            "/api/inventory/movements/bulk/",
+            {"lines": [{"item": self.a.pk, "counted": "2"}, {"item": self.b.pk, "movement_type": "OUT", "quantity": "4"}]},
+            format="json",
+        )
+        self.assertEqual(r.status_code, 201, r.data)
+        self.assertEqual(self.events(), [(self.a.pk, "LOW", Decimal("2.00"))])
+
+    def test_no_event_for_inactive_item_or_without_crossing(self):
+        self.set_stock(self.b, "10", is_active=False)
+        self.move(self.b, "OUT", "8")
+        self.move(self.a, "OUT", "4")
+        self.assertEqual(self.events(), [])
+
+
+class LowStockEventViewTests(TestCase):
+    url = "/api/inventory/low-stock-events/"
+
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="poll", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.rid = ids["restaurant_id"]
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.item = InventoryItem.objects.get(restaurant_id=cls.rid)
+        other = generate_restaurant(1, prefix="poll", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.foreign = InventoryItem.objects.get(restaurant_id=other["restaurant_id"])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def event(self, item=None, kind="LOW"):
+        item = item or self.item
+        return LowStockEvent.objects.create(
+            item=item, restaurant_id=item.restaurant_id, kind=kind, stock=Decimal("1"), reorder_level=Decimal("5")
+        )
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_latest_without_after(self):
+        first, second = self.event(), self.event(kind="RECOVERED")
+        self.event(self.foreign)
+        r = self.get()
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([e["id"] for e in r.data["events"]], [first.pk, second.pk])
+        self.assertEqual(r.data["cursor"], second.pk)
+
+    def test_after_cursor(self):
+        first, second = self.event(), self.event()
+        self.event(self.foreign)
+        r = self.get(after=first.pk, wait=0)
+        self.assertEqual([e["id"] for e in r.data["events"]], [second.pk])
+        self.assertEqual(r.data["cursor"], second.pk)
+
+        r = self.get(after=second.pk, wait=0)
+        self.assertEqual(r.data, {"cursor": second.pk, "events": []})
+
+    def test_timeout_returns_empty(self):
+        last = self.event()
+        t0 = time.monotonic()
+        r = self.get(after=last.pk, wait=0.2)
+        self.assertGreaterEqual(time.monotonic() - t0, 0.2)
+        self.assertEqual(r.data, {"cursor": last.pk, "events": []})
+
+    def test_wait_answers_once_an_event_appears(self):
+        last = self.event()
+
+        def another_request_commits(timeout):
+            self.created = self.event(kind="RECOVERED")
+
+        with mock.patch.object(alerts._changed, "wait", side_effect=another_request_commits) as wait:
+            r = self.get(after=last.pk, wait=25)
+        self.assertEqual(wait.call_count, 1)
+        self.assertEqual([e["id"] for e in r.data["events"]], [self.created.pk])
+        self.assertEqual(r.data["cursor"], self.created.pk)
+
+    def test_bad_params_are_400(self):
+        for params in ({"wait": "nan"}, {"wait": "inf"}, {"wait": "-Infinity"}, {"wait": "soon"}, {"after": "x"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+    @override_settings(LOW_STOCK_MAX_WAITERS=1)
+    def test_waiters_past_the_cap_answer_immediately(self):
+        last = self.event()
+        with mock.patch.object(alerts, "_waiters", None):
+            slots = alerts._waiter_slots()
+            self.assertTrue(slots.acquire(blocking=False))  # the one allowed waiter
+            try:
+                t0 = time.monotonic()
+                r = self.get(after=last.pk, wait=5)
+                self.assertLess(time.monotonic() - t0, 1)
+            finally:
+                slots.release()
+        self.assertEqual(r.data, {"cursor": last.pk, "events": []})
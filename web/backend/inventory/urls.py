@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import InventoryItemViewSet, StockMovementViewSet
+from .views import InventoryItemViewSet, LowStockEventViewSet, StockMovementViewSet
 
 router = DefaultRouter()
 router.register("items", InventoryItemViewSet, basename="inventory-items")
 router.register("movements", StockMovementViewSet, basename="stock-movements")
+router.register("low-stock-events", LowStockEventViewSet, basename="low-stock-events")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,13 +1,21 @@
+import math
+
 from django.db.models import F
+from django.utils.dateparse import parse_date
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from core.conditional import conditional_get
 from core.mixins import RestaurantScopedQuerysetMixin
-from .models import InventoryItem, StockMovement
+from core.versioning import INVENTORY
+from . import alerts, ledger
+from .models import InventoryItem, LowStockEvent, StockMovement
 from .permissions import IsStaff
 from .serializers import (
     InventoryItemSerializer,
+    LowStockEventSerializer,
+    StockMovementBulkSerializer,
     StockMovementCreateSerializer,
     StockMovementSerializer,
 )
@@ -21,7 +29,12 @@ class InventoryItemViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet)
     search_fields = ["name", "sku"]
     ordering_fields = ["name", "current_stock", "reorder_level", "updated_at"]
 
+    @conditional_get(INVENTORY)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=["get"])
+    @conditional_get(INVENTORY)
     def low_stock(self, request):
         qs = self.get_queryset().filter(
             is_active=True,
@@ -30,6 +43,51 @@ class InventoryItemViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet)
         data = InventoryItemSerializer(qs, many=True).data
         return Response(data)
 
+    def _stock_date(self, request):
+        # (date, error response); parse_date raises on impossible dates such as 2026-02-30
+        try:
+            d = parse_date(request.query_params.get("date", "") or "")
+        except ValueError:
+            d = None
+        if not d:
+            return None, Response({"date": "Required, YYYY-MM-DD."}, status=400)
+        return d, None
+
+    @action(detail=True, methods=["get"])
+    def stock_at(self, request, pk=None):
+        """
+        GET /api/inventory/items/<id>/stock_at/?date=2026-02-15
+        Closing stock at the end of that day.
+        """
+        d, error = self._stock_date(request)
+        if error:
+            return error
+        item = self.get_object()
+        stock = ledger.stock_at(InventoryItem.objects.filter(pk=item.pk), d)[item.pk]
+        return Response({"item": item.pk, "date": str(d), "stock": str(stock)})
+
+    @action(detail=False, methods=["get"], url_path="stock_at")
+    def stock_at_bulk(self, request):
+        """
+        GET /api/inventory/items/stock_at/?date=2026-02-15&ids=1,2,3
+        Same for many items (all of the restaurant's items without ids).
+        """
+        d, error = self._stock_date(request)
+        if error:
+            return error
+        qs = self.get_queryset()
+        ids = request.query_params.get("ids")
+        if ids:
+            try:
+                qs = qs.filter(pk__in=[int(x) for x in ids.split(",") if x.strip()])
+            except ValueError:
+                return Response({"ids": "Comma-separated item ids."}, status=400)
+
+        stocks = ledger.stock_at(qs, d)
+        return Response(
+            [{"item": item_id, "date": str(d), "stock": str(stock)} for item_id, stock in sorted(stocks.items())]
+        )
+
 
 class StockMovementViewSet(
     RestaurantScopedQuerysetMixin,
@@ -42,7 +100,6 @@ class StockMovementViewSet(
     filterset_fields = ["movement_type", "item"]
     search_fields = ["item__name", "item__sku", "reason", "note"]
     ordering_fields = ["created_at", "quantity"]
-    restaurant_lookup = "item__restaurant"
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -56,3 +113,66 @@ class StockMovementViewSet(
 
         out = StockMovementSerializer(movement, context={"request": request})
         return Response(out.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        POST /api/inventory/movements/bulk/
+        {"mode": "atomic"|"partial", "reason": "Stocktake",
+         "lines": [{"item": 1, "counted": "12.50"}, {"item": 2, "movement_type": "OUT", "quantity": "3"}]}
+        """
+        serializer = StockMovementBulkSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        if result["errors"] and serializer.validated_data["mode"] == "atomic":
+            return Response({"detail": "No movements applied.", "errors": result["errors"]}, status=400)
+
+        return Response(
+            {
+                "applied": result["applied"],
+                "errors": result["errors"],
+                "movements": StockMovementSerializer(result["movements"], many=True).data,
+            },
+            status=status.HTTP_201_CREATED if result["applied"] else status.HTTP_200_OK,
+        )
+
+
+class LowStockEventViewSet(RestaurantScopedQuerysetMixin, viewsets.GenericViewSet):
+    """
+    GET /api/inventory/low-stock-events/?after=<id>&wait=25
+    Long-poll for reorder-level crossings: answers as soon as there are events
+    with id > after, or with an empty list once `wait` seconds pass. Clients
+    pass the returned cursor back as `after`. Without `after` the latest
+    events are returned immediately.
+
+    A waiting request holds a worker thread, so at most LOW_STOCK_MAX_WAITERS
+    wait at once per process (the rest answer immediately). Dashboards should
+    prefer the `stock.low` events of the SSE stream (GET /api/events/); this
+    endpoint is the fallback for clients that cannot keep a stream open.
+    """
+    queryset = LowStockEvent.objects.select_related("item").all()
+    serializer_class = LowStockEventSerializer
+    permission_classes = [IsStaff]
+    MAX_WAIT = 30
+    LATEST = 50
+
+    def list(self, request):
+        try:
+            after = request.query_params.get("after")
+            after = None if after in (None, "") else int(after)
+            wait = float(request.query_params.get("wait", 25))
+            if not math.isfinite(wait):
+                raise ValueError(wait)
+        except ValueError:
+            return Response({"detail": "after must be an event id, wait a number of seconds."}, status=400)
+        wait = min(wait, self.MAX_WAIT)
+
+        qs = self.get_queryset()
+        if after is None:
+            events = list(reversed(qs.order_by("-pk")[: self.LATEST]))
+            cursor = events[-1].pk if events else 0
+        else:
+            events = alerts.wait_for_events(qs, after, max(wait, 0))
+            cursor = events[-1].pk if events else after
+
+        return Response({"cursor": cursor, "events": self.get_serializer(events, many=True).data})
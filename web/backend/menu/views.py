@@ -1,6 +1,8 @@
 from rest_framework import viewsets
 
+from core.conditional import conditional_get
 from core.mixins import RestaurantScopedQuerysetMixin
+from core.versioning import MENU
 from inventory.permissions import IsStaff
 from .models import Category, MenuItem, RecipeLine
 from .permissions import IsStaffOrReadOnly
@@ -15,6 +17,10 @@ class CategoryViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
     search_fields = ["name", "slug"]
     ordering_fields = ["sort_order", "name"]
 
+    @conditional_get(MENU)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class MenuItemViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
     queryset = MenuItem.objects.select_related("category").all()
@@ -24,6 +30,14 @@ class MenuItemViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
     search_fields = ["name", "description", "category__name"]
     ordering_fields = ["sort_order", "name", "price", "created_at"]
 
+    @conditional_get(MENU)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get(MENU)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class RecipeLineViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
     queryset = RecipeLine.objects.select_related("menu_item", "ingredient").all()
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+from django.db import migrations
+
+from core.backfill import backfill_restaurant
+
+
+def forwards(apps, schema_editor):
+    backfill_restaurant(apps.get_model("purchases", "PurchaseLine"), "invoice")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
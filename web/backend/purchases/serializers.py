@@ -1,8 +1,11 @@
 from decimal import Decimal
 
 from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 
+from inventory import alerts
+from inventory.ledger import receive
 from inventory.models import InventoryItem, StockMovement
 from .models import PurchaseInvoice, PurchaseLine, Supplier
 
@@ -53,6 +56,107 @@ class PurchaseInvoiceOutSerializer(serializers.ModelSerializer):
         )
 
 
+# Detail reads: lines + their inventory items in one query.
+PURCHASE_LINES_PREFETCH = Prefetch("lines", queryset=PurchaseLine.objects.select_related("item"))
+
+PURCHASE_INVOICE_LIST_FIELDS = (
+    "id",
+    "restaurant_id",
+    "supplier_id",
+    "supplier__name",
+    "invoice_no",
+    "invoice_date",
+    "status",
+    "subtotal",
+    "discount",
+    "tax",
+    "total",
+    "note",
+    "created_by_id",
+    "created_at",
+)
+
+PURCHASE_LINE_LIST_FIELDS = (
+    "id",
+    "invoice_id",
+    "item_id",
+    "item__name",
+    "item__sku",
+    "qty",
+    "unit_cost",
+    "line_total",
+)
+
+_money = serializers.DecimalField(max_digits=12, decimal_places=2)
+_timestamp = serializers.DateTimeField()
+_date = serializers.DateField()
+
+
+def purchase_invoice_rows(qs):
+    """
+    Flat values() rows for the list view (supplier name via JOIN).
+    """
+    return qs.prefetch_related(None).select_related(None).values(*PURCHASE_INVOICE_LIST_FIELDS)
+
+
+def attach_purchase_lines(rows):
+    """
+    Adds row["lines"] to every invoice row using ONE extra query.
+    """
+    rows = list(rows)
+    by_invoice = {r["id"]: r for r in rows}
+    for r in rows:
+        r["lines"] = []
+
+    if by_invoice:
+        line_qs = (
+            PurchaseLine.objects.filter(invoice_id__in=list(by_invoice))
+            .order_by("sort_order", "id")
+            .values(*PURCHASE_LINE_LIST_FIELDS)
+        )
+        for line in line_qs:
+            by_invoice[line["invoice_id"]]["lines"].append(line)
+
+    return rows
+
+
+class PurchaseInvoiceListSerializer(serializers.BaseSerializer):
+    """
+    Read-only list serializer over purchase_invoice_rows() + attach_purchase_lines().
+    Output is the same shape as PurchaseInvoiceOutSerializer.
+    """
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "restaurant": row["restaurant_id"],
+            "supplier": row["supplier_id"],
+            "supplier_name": row["supplier__name"],
+            "invoice_no": row["invoice_no"],
+            "invoice_date": _date.to_representation(row["invoice_date"]),
+            "status": row["status"],
+            "subtotal": _money.to_representation(row["subtotal"]),
+            "discount": _money.to_representation(row["discount"]),
+            "tax": _money.to_representation(row["tax"]),
+            "total": _money.to_representation(row["total"]),
+            "note": row["note"],
+            "created_by": row["created_by_id"],
+            "created_at": _timestamp.to_representation(row["created_at"]),
+            "lines": [
+                {
+                    "id": line["id"],
+                    "item": line["item_id"],
+                    "item_name": line["item__name"],
+                    "item_sku": line["item__sku"],
+                    "qty": _money.to_representation(line["qty"]),
+                    "unit_cost": _money.to_representation(line["unit_cost"]),
+                    "line_total": _money.to_representation(line["line_total"]),
+                }
+                for line in row["lines"]
+            ],
+        }
+
+
 class PurchaseLineInSerializer(serializers.Serializer):
     item = serializers.IntegerField()
     qty = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -81,8 +185,8 @@ class PurchaseInvoiceCreateSerializer(serializers.Serializer):
     @transaction.atomic
     def create(self, validated):
         user = self.context["request"].user
-        restaurant = getattr(user, "restaurant", None)
-        if not restaurant and not user.is_superuser:
+        restaurant_id = getattr(user, "restaurant_id", None)
+        if not restaurant_id and not user.is_superuser:
             raise serializers.ValidationError({"detail": "User has no restaurant assigned."})
 
         supplier_id = validated["supplier"]
@@ -97,7 +201,7 @@ class PurchaseInvoiceCreateSerializer(serializers.Serializer):
         tax = validated.get("tax", Decimal("0.00"))
 
         invoice = PurchaseInvoice.objects.create(
-            restaurant=restaurant,
+            restaurant_id=restaurant_id,
             supplier=supplier,
             invoice_no=validated.get("invoice_no", ""),
             invoice_date=validated["invoice_date"],
@@ -109,6 +213,7 @@ class PurchaseInvoiceCreateSerializer(serializers.Serializer):
         )
 
         subtotal = Decimal("0.00")
+        events = []
 
         for idx, l in enumerate(validated["lines"]):
             item_qs = InventoryItem.objects.select_for_update().filter(pk=l["item"])
@@ -125,6 +230,7 @@ class PurchaseInvoiceCreateSerializer(serializers.Serializer):
 
             PurchaseLine.objects.create(
                 invoice=invoice,
+                restaurant_id=invoice.restaurant_id,
                 item=item,
                 qty=qty,
                 unit_cost=unit_cost,
@@ -132,12 +238,14 @@ class PurchaseInvoiceCreateSerializer(serializers.Serializer):
                 sort_order=idx,
             )
 
-            item.current_stock = (item.current_stock + qty).quantize(Decimal("0.01"))
-            item.cost_per_unit = unit_cost
-            item.save(update_fields=["current_stock", "cost_per_unit", "updated_at"])
+            old_stock = item.current_stock
+            receive(item, qty, unit_cost)
+            item.save(update_fields=["current_stock", "cost_per_unit", "avg_cost", "updated_at"])
+            events.append(alerts.crossing(item, old_stock))
 
             StockMovement.objects.create(
                 item=item,
+                restaurant_id=item.restaurant_id,
                 movement_type=StockMovement.Type.IN_,
                 quantity=qty,
                 reason="Purchase",
@@ -145,6 +253,8 @@ class PurchaseInvoiceCreateSerializer(serializers.Serializer):
                 created_by=user,
             )
 
+        alerts.record(events)
+
         total = (subtotal - discount + tax).quantize(Decimal("0.01"))
         if total < 0:
             total = Decimal("0.00")
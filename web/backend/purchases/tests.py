@@ -1,3 +1,30 @@
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.synthetic import generate_restaurant
+from forecasting.services import MAX_HORIZON
+from . import views
+
+
+class DraftFromForecastTests(TestCase):
+    url = "/api/purchases/invoices/from-forecast/"
+
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="draft", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+        cls.supplier_id = ids["supplier_id"]
 
-# Create your tests here.
+    def test_horizon_is_clamped_to_the_forecast_horizon(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        for asked, used in ((90, MAX_HORIZON), (0, 1), (7, 7)):
+            with self.subTest(horizon_days=asked):
+                with mock.patch.object(views, "build_ingredient_plan", return_value={"ingredients": []}) as plan:
+                    r = client.post(self.url, {"supplier": self.supplier_id, "horizon_days": asked}, format="json")
+                # nothing to order in the mocked plan
+                self.assertEqual(r.status_code, 400)
+                self.assertEqual(plan.call_args.kwargs["horizon_days"], used)
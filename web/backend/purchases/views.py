@@ -3,6 +3,7 @@ from datetime import date
 from decimal import Decimal
 
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.http import HttpResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date
@@ -11,17 +12,25 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from core.db_routing import replica_reads
 from core.mixins import RestaurantScopedQuerysetMixin
+from forecasting.services import MAX_HORIZON
 from forecasting.services_ingredients import build_ingredient_plan
+from inventory import alerts
+from inventory.ledger import unreceive
 from inventory.models import InventoryItem, StockMovement
 from inventory.permissions import IsStaff
 from .models import PurchaseInvoice, PurchaseLine, Supplier
 from .serializers import (
+    PURCHASE_LINES_PREFETCH,
     PurchaseDraftFromForecastSerializer,
     PurchaseInvoiceCreateSerializer,
+    PurchaseInvoiceListSerializer,
     PurchaseInvoiceOutSerializer,
     PurchaseVoidSerializer,
     SupplierSerializer,
+    attach_purchase_lines,
+    purchase_invoice_rows,
 )
 
 
@@ -41,7 +50,7 @@ class PurchaseInvoiceViewSet(
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = PurchaseInvoice.objects.select_related("supplier", "created_by").prefetch_related("lines__item").all()
+    queryset = PurchaseInvoice.objects.select_related("supplier", "created_by").prefetch_related(PURCHASE_LINES_PREFETCH).all()
     permission_classes = [IsStaff]
     filterset_fields = ["supplier", "status", "invoice_date"]
     search_fields = ["id", "invoice_no", "supplier__name"]
@@ -52,14 +61,28 @@ class PurchaseInvoiceViewSet(
             return PurchaseInvoiceCreateSerializer
         return PurchaseInvoiceOutSerializer
 
+    def list(self, request, *args, **kwargs):
+        # values() read path: 2 queries total, no model instances
+        rows = purchase_invoice_rows(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            data = PurchaseInvoiceListSerializer(attach_purchase_lines(page), many=True).data
+            return self.get_paginated_response(data)
+
+        data = PurchaseInvoiceListSerializer(attach_purchase_lines(rows), many=True).data
+        return Response(data)
+
     def create(self, request, *args, **kwargs):
         s = PurchaseInvoiceCreateSerializer(data=request.data, context={"request": request})
         s.is_valid(raise_exception=True)
         invoice = s.save()
+        prefetch_related_objects([invoice], PURCHASE_LINES_PREFETCH)
         out = PurchaseInvoiceOutSerializer(invoice, context={"request": request})
         return Response(out.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=["get"], url_path="export-csv")
+    @replica_reads
     def export_csv(self, request):
         """
         GET /api/purchases/invoices/export-csv/?from=2025-01-01&to=2025-12-31&mode=invoices|lines
@@ -194,6 +217,7 @@ class PurchaseInvoiceViewSet(
 
         # pass 2: apply reversal + movement
         user = request.user
+        events = []
         for line in lines:
             item_qs = InventoryItem.objects.select_for_update().filter(pk=line.item_id)
             if not user.is_superuser:
@@ -202,11 +226,14 @@ class PurchaseInvoiceViewSet(
             if not item:
                 raise ValidationError({"detail": f"Item {line.item_id} not found in your restaurant."})
 
-            item.current_stock = (item.current_stock - line.qty).quantize(Decimal("0.01"))
-            item.save(update_fields=["current_stock", "updated_at"])
+            old_stock = item.current_stock
+            unreceive(item, line.qty, line.unit_cost)
+            item.save(update_fields=["current_stock", "avg_cost", "updated_at"])
+            events.append(alerts.crossing(item, old_stock))
 
             StockMovement.objects.create(
                 item=item,
+                restaurant_id=item.restaurant_id,
                 movement_type=StockMovement.Type.OUT,
                 quantity=line.qty,
                 reason="Purchase void",
@@ -214,6 +241,8 @@ class PurchaseInvoiceViewSet(
                 created_by=user,
             )
 
+        alerts.record(events)
+
         invoice.status = PurchaseInvoice.Status.VOID
         invoice.voided_at = timezone.now()
         invoice.voided_by = request.user
@@ -242,7 +271,7 @@ class PurchaseInvoiceViewSet(
             raise ValidationError({"supplier": "Supplier not found in your restaurant."})
 
         scope = v.get("scope", "next7")
-        horizon = int(v.get("horizon_days", 7))
+        horizon = max(1, min(int(v.get("horizon_days", 7)), MAX_HORIZON))
         top_n = int(v.get("top_n", 50))
         include_ok = bool(v.get("include_ok", False))
         invoice_date = v.get("invoice_date") or timezone.localdate()
@@ -273,7 +302,7 @@ class PurchaseInvoiceViewSet(
             raise ValidationError({"detail": "No purchase needed (suggested_purchase_qty = 0 for all items)."})
 
         invoice = PurchaseInvoice.objects.create(
-            restaurant=request.user.restaurant,
+            restaurant_id=request.user.restaurant_id,
             supplier=supplier,
             invoice_no="",
             invoice_date=invoice_date,
@@ -305,6 +334,7 @@ class PurchaseInvoiceViewSet(
 
             PurchaseLine.objects.create(
                 invoice=invoice,
+                restaurant_id=invoice.restaurant_id,
                 item_id=item_id,
                 qty=qty,
                 unit_cost=unit_cost,
@@ -315,6 +345,7 @@ class PurchaseInvoiceViewSet(
         invoice.subtotal = subtotal.quantize(Decimal("0.01"))
         invoice.total = invoice.subtotal
         invoice.save(update_fields=["subtotal", "total"])
+        prefetch_related_objects([invoice], PURCHASE_LINES_PREFETCH)
 
         out = PurchaseInvoiceOutSerializer(invoice, context={"request": request})
         return Response(out.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import MenuItemDailyCost
+
+
+@admin.register(MenuItemDailyCost)
+class MenuItemDailyCostAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "menu_item", "qty_sold", "revenue", "cogs", "restaurant")
+    list_filter = ("date",)
+    search_fields = ("menu_item__name",)
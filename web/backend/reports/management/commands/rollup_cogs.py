@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from reports.services import rollup_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-menu-item daily sales/COGS rollup behind /api/reports/cogs/. "
+        "Run nightly; the default re-rolls the last 7 finished days so voids and late imports are picked up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Last day to roll up, YYYY-MM-DD (default: yesterday)")
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--restaurant", type=int, help="Only this restaurant id")
+
+    def handle(self, *args, **opts):
+        end = parse_date(opts["date"]) if opts["date"] else timezone.localdate() - timedelta(days=1)
+        if end is None:
+            raise CommandError(f"Invalid --date '{opts['date']}'")
+
+        start = end - timedelta(days=max(1, opts["days"]) - 1)
+        written = rollup_days(start, end, restaurant_id=opts["restaurant"])
+        self.stdout.write(f"{written} rollup rows for {start} .. {end}")
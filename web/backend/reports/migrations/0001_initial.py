@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0003_user_email_lower_uniq'),
+        ('menu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemDailyCost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('qty_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('unit_cost', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14)),
+                ('cogs', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_costs', to='menu.menuitem')),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='menu_item_daily_cost', to='accounts.restaurant')),
+            ],
+            options={
+                'ordering': ['date', 'menu_item_id'],
+                'indexes': [models.Index(fields=['restaurant', 'date'], name='reports_men_restaur_2cb4fd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('menu_item', 'date'), name='menu_item_daily_cost_uniq')],
+            },
+        ),
+    ]
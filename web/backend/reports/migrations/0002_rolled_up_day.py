@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_email_lower_uniq'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RolledUpDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rolled_up_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rolled_up_day', to='accounts.restaurant')),
+            ],
+            options={
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date', 'restaurant'], name='rolledupday_date_rest_idx')],
+            },
+        ),
+    ]
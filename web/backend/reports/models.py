@@ -0,0 +1,58 @@
+from decimal import Decimal
+from django.db import models
+
+
+class MenuItemDailyCost(models.Model):
+    """
+    Sales rollup per menu item and local day with its cost of goods:
+    cogs = sum of qty x the sale line's unit_cost frozen when the sale was
+    deducted (lines from before unit_cost existed: current recipe cost).
+    Written by reports.services.rollup_days; the COGS reports only read these rows.
+    """
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="menu_item_daily_cost",
+        null=True,
+        blank=True,
+    )
+    menu_item = models.ForeignKey("menu.MenuItem", on_delete=models.CASCADE, related_name="daily_costs")
+    date = models.DateField()
+
+    qty_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal("0.0000"))
+    cogs = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date", "menu_item_id"]
+        constraints = [models.UniqueConstraint(fields=["menu_item", "date"], name="menu_item_daily_cost_uniq")]
+        indexes = [models.Index(fields=["restaurant", "date"])]
+
+    def __str__(self):
+        return f"{self.menu_item_id} @ {self.date}: {self.qty_sold} / {self.cogs}"
+
+
+class RolledUpDay(models.Model):
+    """
+    A local day rollup_days() has covered, for one restaurant or (NULL) all of
+    them, so the reports can tell a day without sales from one never rolled up.
+    """
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="rolled_up_day",
+        null=True,
+        blank=True,
+    )
+    date = models.DateField()
+    rolled_up_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date"]
+        indexes = [models.Index(fields=["date", "restaurant"], name="rolledupday_date_rest_idx")]
+
+    def __str__(self):
+        return f"{self.date} ({self.restaurant_id or 'all'})"
@@ -0,0 +1,239 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from core import scoping
+from core.dates import day_bounds
+from inventory.ledger import stock_at
+from inventory.models import InventoryItem, StockSnapshot
+from menu.models import MenuItem, RecipeLine
+from sales.models import Sale, SaleItem
+from .models import MenuItemDailyCost, RolledUpDay
+
+GROUPS = ("day", "month", "item")
+
+
+def recipe_unit_costs(menu_item_ids):
+    """{menu_item_id: cost of one portion} from the recipe lines and current ingredient avg_cost."""
+    rows = (
+        RecipeLine.objects.filter(menu_item_id__in=menu_item_ids)
+        .values("menu_item_id")
+        .annotate(
+            cost=Sum(
+                F("qty") * F("ingredient__avg_cost"),
+                output_field=DecimalField(max_digits=20, decimal_places=6),
+            )
+        )
+    )
+    return {r["menu_item_id"]: Decimal(r["cost"] or 0).quantize(Decimal("0.0001")) for r in rows}
+
+
+def build_rows(start, end, restaurant_id=None):
+    """Unsaved MenuItemDailyCost rows for PAID sales in [start, end] (local days)."""
+    date_field = f"sale__{scoping.date_field(Sale)}"
+    lo, hi = day_bounds(start, end)
+
+    qs = SaleItem.objects.filter(
+        sale__status="PAID",
+        menu_item__isnull=False,
+        **{f"{date_field}__gte": lo, f"{date_field}__lt": hi},
+    )
+    if restaurant_id is not None:
+        qs = qs.filter(sale__restaurant_id=restaurant_id)
+
+    sales = list(
+        qs.annotate(day=TruncDate(date_field))
+        .values("sale__restaurant_id", "menu_item_id", "day")
+        .annotate(
+            sold=Sum("qty"),
+            revenue=Sum("line_total"),
+            stamped_cogs=Sum(
+                F("qty") * F("unit_cost"),
+                filter=Q(unit_cost__isnull=False),
+                output_field=DecimalField(max_digits=20, decimal_places=4),
+            ),
+            unstamped_qty=Sum("qty", filter=Q(unit_cost__isnull=True)),
+        )
+        .order_by()
+    )
+    # lines sold before unit_cost was frozen at deduction fall back to today's recipe cost
+    costs = recipe_unit_costs({r["menu_item_id"] for r in sales if r["unstamped_qty"]})
+
+    rows = []
+    for r in sales:
+        qty = r["sold"] or 0
+        cogs = Decimal(r["stamped_cogs"] or 0) + costs.get(r["menu_item_id"], Decimal("0")) * (r["unstamped_qty"] or 0)
+        rows.append(
+            MenuItemDailyCost(
+                restaurant_id=r["sale__restaurant_id"],
+                menu_item_id=r["menu_item_id"],
+                date=r["day"],
+                qty_sold=qty,
+                revenue=r["revenue"] or Decimal("0.00"),
+                unit_cost=(cogs / qty).quantize(Decimal("0.0001")) if qty else Decimal("0.0000"),
+                cogs=cogs.quantize(Decimal("0.01")),
+            )
+        )
+    return rows
+
+
+@transaction.atomic
+def rollup_days(start, end, restaurant_id=None):
+    """(Re)build the rollup for [start, end]; idempotent, so re-running picks up voids and late imports."""
+    existing = MenuItemDailyCost.objects.filter(date__gte=start, date__lte=end)
+    if restaurant_id is not None:
+        existing = existing.filter(restaurant_id=restaurant_id)
+    existing.delete()
+
+    rows = build_rows(start, end, restaurant_id)
+    MenuItemDailyCost.objects.bulk_create(rows, batch_size=1000)
+
+    RolledUpDay.objects.filter(restaurant_id=restaurant_id, date__gte=start, date__lte=end).delete()
+    RolledUpDay.objects.bulk_create(
+        [RolledUpDay(restaurant_id=restaurant_id, date=start + timedelta(days=i)) for i in range((end - start).days + 1)],
+        batch_size=1000,
+    )
+    return len(rows)
+
+
+def _missing_days(start, end, restaurant_id):
+    """[(first, last)] runs of days in [start, end] that no rollup covered for the restaurant."""
+    covered = RolledUpDay.objects.filter(date__gte=start, date__lte=end)
+    if restaurant_id is not None:
+        covered = covered.filter(Q(restaurant_id=restaurant_id) | Q(restaurant__isnull=True))
+    else:
+        covered = covered.filter(restaurant__isnull=True)
+    covered = set(covered.values_list("date", flat=True))
+
+    runs = []
+    day = start
+    while day <= end:
+        if day not in covered:
+            if runs and runs[-1][1] == day - timedelta(days=1):
+                runs[-1] = (runs[-1][0], day)
+            else:
+                runs.append((day, day))
+        day += timedelta(days=1)
+    return runs
+
+
+def _key(group, date, menu_item_id):
+    if group == "day":
+        return date
+    if group == "month":
+        return date.replace(day=1)
+    return menu_item_id
+
+
+def cogs_report(start, end, group="day", restaurant_id=None):
+    """
+    Revenue / COGS / margin for [start, end] grouped by day, month or menu item.
+    Finished days come from the rollup (grouped in the database); today and
+    finished days never rolled up (yesterday before the nightly run, days
+    before the first run) are computed live and listed in `live_days`.
+    """
+    today = timezone.localdate()
+    buckets = {}
+
+    def add(key, qty, revenue, cogs):
+        b = buckets.setdefault(key, [0, Decimal("0.00"), Decimal("0.00")])
+        b[0] += qty or 0
+        b[1] += Decimal(revenue or 0).quantize(Decimal("0.01"))
+        b[2] += Decimal(cogs or 0).quantize(Decimal("0.01"))
+
+    last_finished = min(end, today - timedelta(days=1))
+    stored = MenuItemDailyCost.objects.filter(date__gte=start, date__lte=last_finished)
+    if restaurant_id is not None:
+        stored = stored.filter(restaurant_id=restaurant_id)
+    if group == "month":
+        stored = stored.annotate(k=TruncMonth("date"))
+    else:
+        stored = stored.annotate(k=F("date" if group == "day" else "menu_item_id"))
+    for r in stored.values("k").annotate(qty=Sum("qty_sold"), revenue=Sum("revenue"), cogs=Sum("cogs")).order_by():
+        add(r["k"], r["qty"], r["revenue"], r["cogs"])
+
+    live = _missing_days(start, last_finished, restaurant_id)
+    if end >= today:
+        live.append((max(start, today), end))
+    for lo, hi in live:
+        for row in build_rows(lo, hi, restaurant_id):
+            add(_key(group, row.date, row.menu_item_id), row.qty_sold, row.revenue, row.cogs)
+
+    names = {}
+    if group == "item":
+        names = dict(MenuItem.objects.filter(pk__in=list(buckets)).values_list("id", "name"))
+
+    rows = []
+    total = [0, Decimal("0.00"), Decimal("0.00")]
+    for key in sorted(buckets):
+        qty, revenue, cogs = buckets[key]
+        total = [total[0] + qty, total[1] + revenue, total[2] + cogs]
+        row = {"menu_item": key, "name": names.get(key, "")} if group == "item" else {group: str(key)}
+        row.update(qty_sold=qty, revenue=str(revenue), cogs=str(cogs), gross_margin=str(revenue - cogs))
+        rows.append(row)
+
+    return {
+        "start": str(start),
+        "end": str(end),
+        "group": group,
+        "live_days": [str(lo + timedelta(days=i)) for lo, hi in live for i in range((hi - lo).days + 1)],
+        "rows": rows,
+        "total": {
+            "qty_sold": total[0],
+            "revenue": str(total[1]),
+            "cogs": str(total[2]),
+            "gross_margin": str(total[1] - total[2]),
+        },
+    }
+
+
+def valuation(day=None, restaurant_id=None):
+    """
+    Stock value (qty x avg_cost) per ingredient: live for today, from the
+    day's StockSnapshot rows otherwise. Items without a snapshot that day are
+    valued from the ledger at today's avg_cost and flagged `estimated`.
+    """
+    today = timezone.localdate()
+    items = InventoryItem.objects.all()
+    if restaurant_id is not None:
+        items = items.filter(restaurant_id=restaurant_id)
+
+    if day is None or day >= today:
+        day = today
+        lines = {
+            r["id"]: (r["current_stock"], r["avg_cost"], False)
+            for r in items.values("id", "current_stock", "avg_cost")
+        }
+    else:
+        snaps = StockSnapshot.objects.filter(date=day, item__in=items)
+        lines = {r["item_id"]: (r["closing_stock"], r["avg_cost"], False) for r in snaps.values("item_id", "closing_stock", "avg_cost")}
+        missing = items.exclude(pk__in=list(lines))
+        costs = dict(missing.values_list("id", "avg_cost"))
+        if costs:
+            for item_id, qty in stock_at(missing, day).items():
+                lines[item_id] = (qty, costs[item_id], True)
+
+    meta = {r["id"]: r for r in items.filter(pk__in=list(lines)).values("id", "name", "sku", "unit")}
+    out = []
+    total = Decimal("0.00")
+    for item_id in sorted(lines, key=lambda i: meta[i]["name"]):
+        qty, cost, estimated = lines[item_id]
+        value = (qty * cost).quantize(Decimal("0.01"))
+        total += value
+        out.append(
+            {
+                "item": item_id,
+                "name": meta[item_id]["name"],
+                "sku": meta[item_id]["sku"],
+                "unit": meta[item_id]["unit"],
+                "stock": str(qty),
+                "avg_cost": str(cost),
+                "value": str(value),
+                "estimated": estimated,
+            }
+        )
+    return {"date": str(day), "items": out, "total_value": str(total)}
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.synthetic import generate_restaurant
+from inventory.models import InventoryItem
+from sales.models import Sale, SaleItem
+from .models import MenuItemDailyCost
+from .services import cogs_report, rollup_days
+
+
+class CogsRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rid = generate_restaurant(0, prefix="cogs", menu_items=4, ingredients=4, days=10, sales_per_day=15)["restaurant_id"]
+        cls.today = timezone.localdate()
+        cls.start = cls.today - timedelta(days=10)
+        cls.end = cls.today - timedelta(days=1)
+
+    def rollup(self):
+        return sorted(
+            MenuItemDailyCost.objects.filter(restaurant_id=self.rid).values_list(
+                "menu_item_id", "date", "qty_sold", "revenue", "cogs"
+            )
+        )
+
+    def paid_revenue(self):
+        return SaleItem.objects.filter(sale__restaurant_id=self.rid, sale__status="PAID").aggregate(s=Sum("line_total"))["s"]
+
+    def test_rollup_is_idempotent(self):
+        n = rollup_days(self.start, self.end, self.rid)
+        first = self.rollup()
+        self.assertEqual(len(first), n)
+        self.assertEqual(rollup_days(self.start, self.end, self.rid), n)
+        self.assertEqual(self.rollup(), first)
+
+    def test_rerun_picks_up_voids(self):
+        rollup_days(self.start, self.end, self.rid)
+        sale = Sale.objects.filter(restaurant_id=self.rid, status="PAID").first()
+        sold = sum(sale.items.values_list("qty", flat=True))
+        before = MenuItemDailyCost.objects.filter(restaurant_id=self.rid).aggregate(s=Sum("qty_sold"))["s"]
+
+        Sale.objects.filter(pk=sale.pk).update(status="VOID")
+        rollup_days(self.start, self.end, self.rid)
+        after = MenuItemDailyCost.objects.filter(restaurant_id=self.rid).aggregate(s=Sum("qty_sold"))["s"]
+        self.assertEqual(after, before - sold)
+
+    def test_groupings_share_totals(self):
+        rollup_days(self.start, self.end, self.rid)
+        reports = {g: cogs_report(self.start, self.end, g, self.rid) for g in ("day", "month", "item")}
+
+        self.assertEqual(Decimal(reports["day"]["total"]["revenue"]), self.paid_revenue())
+        self.assertEqual(reports["day"]["total"], reports["month"]["total"])
+        self.assertEqual(reports["day"]["total"], reports["item"]["total"])
+        self.assertEqual(reports["day"]["live_days"], [])
+
+        days = {r["day"] for r in reports["day"]["rows"]}
+        self.assertTrue(days <= {str(self.start + timedelta(days=i)) for i in range(10)})
+        self.assertEqual(len(reports["month"]["rows"]), len({d[:7] for d in days}))
+        for row in reports["item"]["rows"]:
+            self.assertTrue(row["name"])
+            self.assertEqual(Decimal(row["gross_margin"]), Decimal(row["revenue"]) - Decimal(row["cogs"]))
+
+    def test_days_never_rolled_up_are_computed_live(self):
+        rolled = self.end - timedelta(days=2)
+        rollup_days(self.start, rolled, self.rid)
+        partial = cogs_report(self.start, self.today, "day", self.rid)
+        self.assertEqual(
+            partial["live_days"],
+            [str(rolled + timedelta(days=i)) for i in range(1, 3)] + [str(self.today)],
+        )
+
+        rollup_days(self.start, self.end, self.rid)
+        full = cogs_report(self.start, self.today, "day", self.rid)
+        self.assertEqual(full["live_days"], [str(self.today)])
+        self.assertEqual(partial["total"], full["total"])
+
+    def test_stamped_unit_cost_is_not_repriced(self):
+        item = SaleItem.objects.filter(sale__restaurant_id=self.rid, sale__status="PAID").first().menu_item
+        lines = SaleItem.objects.filter(sale__restaurant_id=self.rid, sale__status="PAID", menu_item=item)
+        lines.update(unit_cost=Decimal("2.5000"))
+        qty = lines.aggregate(s=Sum("qty"))["s"]
+
+        rollup_days(self.start, self.end, self.rid)
+        InventoryItem.objects.filter(restaurant_id=self.rid).update(avg_cost=Decimal("999.0000"))
+        rollup_days(self.start, self.end, self.rid)
+
+        report = cogs_report(self.start, self.end, "item", self.rid)
+        row = next(r for r in report["rows"] if r["menu_item"] == item.pk)
+        self.assertEqual(Decimal(row["cogs"]), Decimal("2.50") * qty)
+
+
+class ReportDateParamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ids = generate_restaurant(0, prefix="dates", menu_items=1, ingredients=1, days=0, sales_per_day=0)
+        cls.owner = User.objects.get(pk=ids["owner_id"])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_malformed_and_impossible_dates_are_400(self):
+        cases = [
+            ("/api/reports/cogs/", {"month": "2026-13"}),
+            ("/api/reports/cogs/", {"month": "Sept"}),
+            ("/api/reports/cogs/", {"start": "2026-02-30"}),
+            ("/api/reports/cogs/", {"end": "2026-02-30"}),
+            ("/api/reports/cogs/", {"end": "yesterday"}),
+            ("/api/reports/valuation/", {"date": "2026-02-30"}),
+            ("/api/reports/valuation/", {"date": "2026/02/01"}),
+        ]
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                r = self.client.get(url, params)
+                self.assertEqual(r.status_code, 400)
+                self.assertIn("detail", r.data)
+
+    def test_valid_dates(self):
+        self.assertEqual(self.client.get("/api/reports/cogs/", {"month": "2026-02"}).status_code, 200)
+        self.assertEqual(self.client.get("/api/reports/cogs/", {"start": "2026-02-01", "end": "2026-02-28"}).status_code, 200)
+        self.assertEqual(self.client.get("/api/reports/valuation/", {"date": "2026-02-28"}).status_code, 200)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import CogsReportView, ValuationView
+
+urlpatterns = [
+    path("cogs/", CogsReportView.as_view()),
+    path("valuation/", ValuationView.as_view()),
+]
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from inventory.permissions import IsStaff
+from .services import GROUPS, cogs_report, valuation
+
+
+def _date(raw):
+    # parse_date() returns None for malformed input but raises for impossible dates (2026-02-30)
+    try:
+        return parse_date(raw)
+    except ValueError:
+        return None
+
+
+def _restaurant_id(request):
+    # (restaurant_id, error response); superusers see every restaurant
+    if request.user.is_superuser:
+        return None, None
+    restaurant_id = getattr(request.user, "restaurant_id", None)
+    if not restaurant_id:
+        return None, Response({"detail": "User has no restaurant assigned."}, status=400)
+    return restaurant_id, None
+
+
+class CogsReportView(APIView):
+    """
+    GET /api/reports/cogs/?start=2026-09-01&end=2026-09-30&group=day|month|item
+    GET /api/reports/cogs/?month=2026-09&group=item
+    Revenue, cost of goods and gross margin of PAID sales (default: last 30 days by day).
+    """
+    permission_classes = [IsStaff]
+
+    def get(self, request):
+        restaurant_id, error = _restaurant_id(request)
+        if error:
+            return error
+
+        group = request.query_params.get("group", "day")
+        if group not in GROUPS:
+            return Response({"detail": f"group must be one of: {', '.join(GROUPS)}"}, status=400)
+
+        today = timezone.localdate()
+        month = request.query_params.get("month")
+        if month:
+            start = _date(f"{month}-01")
+            if not start:
+                return Response({"detail": "month must be YYYY-MM."}, status=400)
+            end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        else:
+            raw_start, raw_end = request.query_params.get("start"), request.query_params.get("end")
+            end = _date(raw_end) if raw_end else today
+            start = _date(raw_start) if raw_start else (end and end - timedelta(days=29))
+            if not (start and end):
+                return Response({"detail": "start and end must be YYYY-MM-DD."}, status=400)
+
+        if start > end:
+            return Response({"detail": "start must be on or before end."}, status=400)
+        if (end - start).days > 3 * 366:
+            return Response({"detail": "Range is limited to 3 years."}, status=400)
+
+        return Response(cogs_report(start, end, group=group, restaurant_id=restaurant_id))
+
+
+class ValuationView(APIView):
+    """
+    GET /api/reports/valuation/?date=2026-09-30
+    Stock on hand x weighted-average cost per ingredient (default: now).
+    """
+    permission_classes = [IsStaff]
+
+    def get(self, request):
+        restaurant_id, error = _restaurant_id(request)
+        if error:
+            return error
+
+        raw = request.query_params.get("date")
+        day = _date(raw) if raw else None
+        if raw and not day:
+            return Response({"detail": "date must be YYYY-MM-DD."}, status=400)
+
+        return Response(valuation(day, restaurant_id=restaurant_id))
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('status', 'PAID')), fields=['restaurant', 'status', 'sold_at'], name='sale_paid_rest_sold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['sale', 'menu_item'], include=('qty',), name='saleitem_sale_menu_qty_idx'),
+        ),
+    ]
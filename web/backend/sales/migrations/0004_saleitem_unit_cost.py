@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_backfill_saleitem_restaurant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleitem',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_email_lower_uniq'),
+        ('sales', '0004_saleitem_unit_cost'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_paid_rest_sold_idx',
+        ),
+        migrations.AlterField(
+            model_name='saleitem',
+            name='sale',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='sales.sale'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('status', 'PAID')), fields=['restaurant', 'sold_at'], name='sale_paid_rest_sold_idx'),
+        ),
+    ]
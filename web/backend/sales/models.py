@@ -45,13 +45,23 @@ class Sale(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["restaurant", "created_at"])]
+        indexes = [
+            models.Index(fields=["restaurant", "created_at"]),
+            # forecasting/reporting: PAID sales of a restaurant in a sold_at range;
+            # status stays out of the key (the condition fixes it) so sold_at bounds the scan
+            models.Index(
+                fields=["restaurant", "sold_at"],
+                condition=models.Q(status="PAID"),
+                name="sale_paid_rest_sold_idx",
+            ),
+        ]
     def __str__(self):
         return f"Sale #{self.id} - {self.total}"
 
 
 class SaleItem(models.Model):
-    sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name="items")
+    # no index of its own: saleitem_sale_menu_qty_idx leads with sale_id
+    sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name="items", db_index=False)
     restaurant = models.ForeignKey(
         "accounts.Restaurant",
         on_delete=models.CASCADE,
@@ -65,10 +75,16 @@ class SaleItem(models.Model):
     qty = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=12, decimal_places=2)
     line_total = models.DecimalField(max_digits=12, decimal_places=2)
+    # cost of one portion when the sale deducted inventory; NULL for older or undeducted sales
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
     sort_order = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["sort_order", "id"]
-        indexes = [models.Index(fields=["restaurant", "sale", "menu_item"])]
+        indexes = [
+            models.Index(fields=["restaurant", "sale", "menu_item"]),
+            # per-item qty sums join on sale_id; INCLUDE keeps them index-only (PostgreSQL)
+            models.Index(fields=["sale", "menu_item"], include=["qty"], name="saleitem_sale_menu_qty_idx"),
+        ]
     def __str__(self):
         return f"{self.name} x{self.qty}"
@@ -2,8 +2,11 @@ from collections import defaultdict
 from decimal import Decimal
 
 from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 
+from core import events
+from inventory import alerts
 from inventory.models import InventoryItem, StockMovement
 from menu.models import MenuItem, RecipeLine
 from .models import Sale, SaleItem
@@ -48,6 +51,104 @@ class SaleSerializer(serializers.ModelSerializer):
         read_only_fields = ("created_by", "subtotal", "total", "restaurant")
 
 
+# Detail reads: one query for the lines, menu item names joined in.
+SALE_ITEMS_PREFETCH = Prefetch("items", queryset=SaleItem.objects.select_related("menu_item"))
+
+SALE_LIST_FIELDS = (
+    "id",
+    "restaurant_id",
+    "created_at",
+    "created_by_id",
+    "customer_name",
+    "status",
+    "payment_method",
+    "subtotal",
+    "discount",
+    "tax",
+    "total",
+    "notes",
+)
+
+SALE_ITEM_LIST_FIELDS = (
+    "id",
+    "sale_id",
+    "menu_item_id",
+    "menu_item__name",
+    "name",
+    "qty",
+    "unit_price",
+    "line_total",
+)
+
+_money = serializers.DecimalField(max_digits=12, decimal_places=2)
+_timestamp = serializers.DateTimeField()
+
+
+def sale_list_rows(qs):
+    """
+    Flat values() rows for the list view (no model instances).
+    Any prefetch/select_related on the viewset queryset is dropped here.
+    """
+    return qs.prefetch_related(None).select_related(None).values(*SALE_LIST_FIELDS)
+
+
+def attach_sale_items(rows):
+    """
+    Adds row["items"] to every sale row using ONE extra query
+    (menu item name comes from a LEFT JOIN, no per-line lookups).
+    """
+    rows = list(rows)
+    by_sale = {r["id"]: r for r in rows}
+    for r in rows:
+        r["items"] = []
+
+    if by_sale:
+        item_qs = (
+            SaleItem.objects.filter(sale_id__in=list(by_sale))
+            .order_by("sort_order", "id")
+            .values(*SALE_ITEM_LIST_FIELDS)
+        )
+        for it in item_qs:
+            by_sale[it["sale_id"]]["items"].append(it)
+
+    return rows
+
+
+class SaleListSerializer(serializers.BaseSerializer):
+    """
+    Read-only list serializer over sale_list_rows() + attach_sale_items().
+    Output is the same shape as SaleSerializer.
+    """
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "restaurant": row["restaurant_id"],
+            "created_at": _timestamp.to_representation(row["created_at"]),
+            "created_by": row["created_by_id"],
+            "customer_name": row["customer_name"],
+            "status": row["status"],
+            "payment_method": row["payment_method"],
+            "subtotal": _money.to_representation(row["subtotal"]),
+            "discount": _money.to_representation(row["discount"]),
+            "tax": _money.to_representation(row["tax"]),
+            "total": _money.to_representation(row["total"]),
+            "notes": row["notes"],
+            "items": [self.item_representation(it) for it in row["items"]],
+        }
+
+    def item_representation(self, it):
+        out = {"id": it["id"], "menu_item": it["menu_item_id"]}
+        # SaleItemSerializer skips menu_item_name when there is no menu item
+        if it["menu_item_id"] is not None:
+            out["menu_item_name"] = it["menu_item__name"]
+        out["name"] = it["name"]
+        out["qty"] = it["qty"]
+        out["unit_price"] = _money.to_representation(it["unit_price"])
+        out["line_total"] = _money.to_representation(it["line_total"])
+        return out
+
+
 class SaleCreateSerializer(serializers.Serializer):
     customer_name = serializers.CharField(required=False, allow_blank=True)
     payment_method = serializers.ChoiceField(choices=Sale.PaymentMethod.choices)
@@ -65,15 +166,15 @@ class SaleCreateSerializer(serializers.Serializer):
     @transaction.atomic
     def create(self, validated):
         user = self.context["request"].user
-        restaurant = getattr(user, "restaurant", None)
-        if not restaurant and not user.is_superuser:
+        restaurant_id = getattr(user, "restaurant_id", None)
+        if not restaurant_id and not user.is_superuser:
             raise serializers.ValidationError({"detail": "User has no restaurant assigned."})
 
         discount = validated.get("discount", Decimal("0.00"))
         tax = validated.get("tax", Decimal("0.00"))
 
         sale = Sale.objects.create(
-            restaurant=restaurant,
+            restaurant_id=restaurant_id,
             created_by=user,
             customer_name=validated.get("customer_name", ""),
             payment_method=validated["payment_method"],
@@ -112,6 +213,7 @@ class SaleCreateSerializer(serializers.Serializer):
 
             SaleItem.objects.create(
                 sale=sale,
+                restaurant_id=sale.restaurant_id,
                 menu_item=menu_item,
                 name=name,
                 qty=qty,
@@ -130,14 +232,34 @@ class SaleCreateSerializer(serializers.Serializer):
 
         if sale.status == Sale.Status.PAID:
             deduct_inventory_for_sale(sale)
+            events.publish(
+                sale.restaurant_id,
+                events.SALE_POSTED,
+                {"id": sale.pk, "total": sale.total, "sold_at": sale.sold_at},
+            )
 
         return sale
 
 
+def _stamp_unit_costs(sale_items, recipe_by_menu, item_map):
+    """
+    Portion cost of each menu line at deduction time (recipe qty x ingredient
+    avg_cost), so the COGS rollup does not re-price past sales at later costs.
+    """
+    lines = [si for si in sale_items if si.menu_item_id]
+    for si in lines:
+        cost = sum(
+            (rl.qty * item_map[rl.ingredient_id].avg_cost for rl in recipe_by_menu.get(si.menu_item_id, [])),
+            Decimal("0"),
+        )
+        si.unit_cost = cost.quantize(Decimal("0.0001"))
+    SaleItem.objects.bulk_update(lines, ["unit_cost"])
+
+
 def deduct_inventory_for_sale(sale: Sale):
     """
     Deduct ingredients based on recipes for sale items.
-    Creates StockMovement OUT entries.
+    Creates StockMovement OUT entries and freezes each line's unit_cost.
     """
     if sale.inventory_deducted:
         return
@@ -146,7 +268,7 @@ def deduct_inventory_for_sale(sale: Sale):
         raise serializers.ValidationError({"detail": "Sale has no restaurant assigned."})
 
     required = defaultdict(Decimal)  # ingredient_id -> total_qty_needed
-    sale_items = sale.items.select_related("menu_item").all()
+    sale_items = list(sale.items.select_related("menu_item").all())
 
     menu_item_ids = [si.menu_item_id for si in sale_items if si.menu_item_id]
     if not menu_item_ids:
@@ -171,6 +293,7 @@ def deduct_inventory_for_sale(sale: Sale):
             required[rl.ingredient_id] += (rl.qty * Decimal(si.qty)).quantize(Decimal("0.01"))
 
     if not required:
+        _stamp_unit_costs(sale_items, recipe_by_menu, {})
         sale.inventory_deducted = True
         sale.save(update_fields=["inventory_deducted"])
         return
@@ -194,13 +317,17 @@ def deduct_inventory_for_sale(sale: Sale):
                 )
             })
 
+    events = []
     for ing_id, need in required.items():
         it = item_map[ing_id]
+        old_stock = it.current_stock
         it.current_stock = (it.current_stock - need).quantize(Decimal("0.01"))
         it.save(update_fields=["current_stock", "updated_at"])
+        events.append(alerts.crossing(it, old_stock))
 
         StockMovement.objects.create(
             item=it,
+            restaurant_id=it.restaurant_id,
             movement_type="OUT",
             quantity=need,
             reason="Sale",
@@ -208,5 +335,7 @@ def deduct_inventory_for_sale(sale: Sale):
             created_by=sale.created_by,
         )
 
+    alerts.record(events)
+    _stamp_unit_costs(sale_items, recipe_by_menu, item_map)
     sale.inventory_deducted = True
     sale.save(update_fields=["inventory_deducted"])
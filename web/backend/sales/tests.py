@@ -1,3 +1,68 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
 from django.test import TestCase
+from django.utils import timezone
+
+from core.dates import day_bounds
+from core.synthetic import generate_restaurant
+from .models import Sale, SaleItem
+
+
+def explain(qs):
+    # tiny test tables: make PostgreSQL show the plan it would use at real volume
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # fresh statistics: without them every tiny table looks like one row
+            cursor.execute("ANALYZE sales_sale")
+            cursor.execute("ANALYZE sales_saleitem")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            # at real volume a date window is a sliver of sale items: probed per sale, not hashed whole
+            cursor.execute("SET LOCAL enable_hashjoin = off")
+            cursor.execute("SET LOCAL enable_mergejoin = off")
+    return qs.explain()
+
+
+class HotPathIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # other tenants and older history, so the queried restaurant's 10 days are a small slice as in production
+        for i in range(1, 20):
+            generate_restaurant(i, prefix="idx", menu_items=5, ingredients=5, days=30, sales_per_day=5)
+        cls.rid = generate_restaurant(0, prefix="idx", menu_items=5, ingredients=5, days=30, sales_per_day=5)["restaurant_id"]
+        if connection.vendor == "postgresql":
+            # live tables interleave tenants in time order; generated data is one restaurant after another
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, "sales_sale")
+                by_time = next(n for n, c in constraints.items() if c["index"] and c["columns"] == ["sold_at"])
+                cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                cursor.execute(f"CLUSTER sales_sale USING {by_time}")
+        today = timezone.localdate()
+        cls.lo, cls.hi = day_bounds(today - timedelta(days=9), today)
+
+    def test_paid_sales_range_uses_partial_index(self):
+        # reports and forecasting aggregate over the range, so no default ordering
+        qs = Sale.objects.filter(
+            restaurant_id=self.rid, status="PAID", sold_at__gte=self.lo, sold_at__lt=self.hi
+        ).order_by()
+        self.assertIn("sale_paid_rest_sold_idx", explain(qs))
 
-# Create your tests here.
+    def test_daily_qty_map_shape_uses_sale_and_item_indexes(self):
+        # same shape as forecasting.services._daily_qty_map
+        qs = (
+            SaleItem.objects.filter(
+                sale__restaurant_id=self.rid,
+                sale__status="PAID",
+                sale__sold_at__gte=self.lo,
+                sale__sold_at__lt=self.hi,
+                menu_item__isnull=False,
+            )
+            .annotate(day=TruncDate("sale__sold_at"))
+            .values("menu_item_id", "day")
+            .annotate(qty=Sum("qty"))
+        )
+        plan = explain(qs)
+        self.assertIn("sale_paid_rest_sold_idx", plan)
+        self.assertIn("saleitem_sale_menu_qty_idx", plan)
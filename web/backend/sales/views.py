@@ -1,6 +1,6 @@
 from datetime import timedelta
 
-from django.db.models import Count, Sum
+from django.db.models import Count, Sum, prefetch_related_objects
 from django.db.models.functions import TruncDate
 from django.utils import timezone
 from django.utils.dateparse import parse_date
@@ -8,14 +8,23 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from core.dates import day_bounds
+from core.db_routing import replica_reads
 from core.mixins import RestaurantScopedQuerysetMixin
 from .models import Sale
 from .permissions import IsStaff
-from .serializers import SaleCreateSerializer, SaleSerializer
+from .serializers import (
+    SALE_ITEMS_PREFETCH,
+    SaleCreateSerializer,
+    SaleListSerializer,
+    SaleSerializer,
+    attach_sale_items,
+    sale_list_rows,
+)
 
 
 class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
-    queryset = Sale.objects.prefetch_related("items").select_related("created_by").all()
+    queryset = Sale.objects.prefetch_related(SALE_ITEMS_PREFETCH).select_related("created_by").all()
     permission_classes = [IsStaff]
     filterset_fields = ["status", "payment_method"]
     search_fields = ["id", "customer_name", "created_by__email", "created_by__username"]
@@ -26,10 +35,23 @@ class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
             return SaleCreateSerializer
         return SaleSerializer
 
+    def list(self, request, *args, **kwargs):
+        # values() read path: 2 queries total, no model instances
+        rows = sale_list_rows(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            data = SaleListSerializer(attach_sale_items(page), many=True).data
+            return self.get_paginated_response(data)
+
+        data = SaleListSerializer(attach_sale_items(rows), many=True).data
+        return Response(data)
+
     def create(self, request, *args, **kwargs):
         serializer = SaleCreateSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
         sale = serializer.save()
+        prefetch_related_objects([sale], SALE_ITEMS_PREFETCH)
 
         out = SaleSerializer(sale, context={"request": request})
         return Response(out.data, status=status.HTTP_201_CREATED)
@@ -40,7 +62,8 @@ class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
         d = parse_date(request.query_params.get("date", "") or "")
         qs = self.get_queryset()
         if d:
-            qs = qs.filter(created_at__date=d)
+            lo, hi = day_bounds(d)
+            qs = qs.filter(created_at__gte=lo, created_at__lt=hi)
 
         agg = qs.aggregate(count=Count("id"), total=Sum("total"))
         return Response(
@@ -52,6 +75,7 @@ class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"])
+    @replica_reads
     def summary(self, request):
         """
         /api/sales/sales/summary/?days=7
@@ -66,10 +90,11 @@ class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
         today = timezone.localdate()
         start = today - timedelta(days=days - 1)
 
+        lo, hi = day_bounds(start, today)
         qs = self.get_queryset().filter(
             status="PAID",
-            created_at__date__gte=start,
-            created_at__date__lte=today,
+            created_at__gte=lo,
+            created_at__lt=hi,
         )
 
         rows = (
@@ -96,6 +121,7 @@ class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
         return Response(data)
 
     @action(detail=False, methods=["get"])
+    @replica_reads
     def daily_totals(self, request):
         """
         GET /api/sales/sales/daily_totals/?days=14
@@ -110,10 +136,11 @@ class SaleViewSet(RestaurantScopedQuerysetMixin, viewsets.ModelViewSet):
         today = timezone.localdate()
         start = today - timedelta(days=days - 1)
 
+        lo, hi = day_bounds(start, today)
         qs = self.get_queryset().filter(
             status="PAID",
-            created_at__date__gte=start,
-            created_at__date__lte=today,
+            created_at__gte=lo,
+            created_at__lt=hi,
         )
 
         rows = (